@@ -0,0 +1,56 @@
+"""
+Benchmark for :func:`dynairxvis.batch.render_batch`.
+
+Renders the NT chart set of many synthetic patients with an increasing
+number of worker processes and prints the throughput, which should grow
+close to linearly with the number of cores.
+
+Run with::
+
+    python benchmarks/bench_batch.py
+"""
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from dynairxvis.batch import render_batch
+
+N_PATIENTS = 64
+ROWS_PER_PATIENT = 20
+REFS = ['Condition', 'Start_Date', 'End_Date']
+
+
+def make_patients(n_patients, rows, seed=0):
+    rng = np.random.default_rng(seed)
+    n = n_patients * rows
+    start = pd.Timestamp('2015-01-01') + pd.to_timedelta(
+        rng.integers(0, 3000, n), unit='D')
+    return pd.DataFrame({
+        'patient': np.repeat(np.arange(n_patients), rows),
+        'Condition': rng.choice(['Asthma', 'COPD', 'Diabetes', 'Gout'], n),
+        'Start_Date': start,
+        'End_Date': start + pd.to_timedelta(rng.integers(1, 400, n),
+                                            unit='D'),
+    })
+
+
+def main():
+    df = make_patients(N_PATIENTS, ROWS_PER_PATIENT)
+    jobs = [(group, REFS, {}) for group in df.groupby('patient')]
+    workers = 1
+    while workers <= (os.cpu_count() or 1):
+        with tempfile.TemporaryDirectory() as out_dir:
+            start = time.perf_counter()
+            manifest = render_batch(jobs, workers=workers, out_dir=out_dir)
+            elapsed = time.perf_counter() - start
+        failed = sum(job['error'] is not None for job in manifest)
+        print(f'workers={workers:>3}  {elapsed:7.2f}s  '
+              f'{len(jobs) / elapsed:7.1f} jobs/s  failed={failed}')
+        workers *= 2
+
+
+if __name__ == '__main__':
+    main()
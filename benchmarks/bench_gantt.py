@@ -0,0 +1,58 @@
+"""
+Benchmark for :func:`dynairxvis.gantt.gantt`.
+
+Renders Gantt charts headless (Agg) at increasing interval counts and
+prints the wall time of drawing plus saving a PNG for the per-row
+(``vectorized=False``) and collection (``vectorized=True``) modes.
+
+Run with::
+
+    python benchmarks/bench_gantt.py
+"""
+import io
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from dynairxvis.gantt import gantt  # noqa: E402
+
+SIZES = [1_000, 10_000, 100_000]
+# the per-row mode is too slow to be worth timing at the largest size
+ROW_MODE_LIMIT = 10_000
+
+
+def make_intervals(n, n_categories=50, seed=0):
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp('2000-01-01') + pd.to_timedelta(
+        rng.integers(0, 365 * 20, n), unit='D')
+    end = start + pd.to_timedelta(rng.integers(1, 180, n), unit='D')
+    categories = pd.Series(
+        rng.integers(0, n_categories, n)).map('Drug {}'.format)
+    return categories, pd.Series(start), pd.Series(end)
+
+
+def time_render(n, vectorized):
+    categories, start, end = make_intervals(n)
+    t0 = time.perf_counter()
+    fig, ax = plt.subplots(figsize=(6, 4))
+    gantt(categories, start, end, ax=ax, vectorized=vectorized)
+    fig.savefig(io.BytesIO(), format='png')
+    elapsed = time.perf_counter() - t0
+    plt.close(fig)
+    return elapsed
+
+
+def main():
+    print(f"{'intervals':>10} {'per-row (s)':>12} {'vectorized (s)':>15}")
+    for n in SIZES:
+        row = time_render(n, False) if n <= ROW_MODE_LIMIT else float('nan')
+        vec = time_render(n, True)
+        print(f"{n:>10} {row:>12.3f} {vec:>15.3f}")
+
+
+if __name__ == '__main__':
+    main()
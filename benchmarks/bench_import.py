@@ -0,0 +1,69 @@
+"""
+Import-time benchmark for the package, based on ``python -X importtime``.
+
+Every target is imported in a fresh interpreter. The script reports the
+cumulative import time, the time spent in dynairxvis modules themselves,
+and checks two budgets:
+
+- the modules listed in NO_MATPLOTLIB must not import matplotlib at all;
+- the self time of dynairxvis modules must stay under OWN_BUDGET_MS.
+
+It exits with status 1 if a budget is exceeded, so it can run in CI.
+
+Run with::
+
+    python benchmarks/bench_import.py
+"""
+import subprocess
+import sys
+
+TARGETS = ['dynairxvis', 'dynairxvis.utils', 'dynairxvis.intervals',
+           'dynairxvis.plot', 'dynairxvis.specs', 'dynairxvis.gantt']
+# Profiling and data preparation must not need matplotlib
+NO_MATPLOTLIB = ['dynairxvis', 'dynairxvis.utils', 'dynairxvis.intervals',
+                 'dynairxvis.plot', 'dynairxvis.specs']
+OWN_BUDGET_MS = 20
+REPEATS = 5
+
+
+def import_times(module):
+    """
+    Returns ``{name: (self_us, cumulative_us)}`` for every module imported
+    by ``import module`` in a fresh interpreter.
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, check=True)
+    times = {}
+    for row in result.stderr.splitlines():
+        if not row.startswith('import time:') or 'self [us]' in row:
+            continue
+        self_us, cumulative_us, name = row[len('import time:'):].split('|')
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def main():
+    failed = False
+    for module in TARGETS:
+        runs = [import_times(module) for _ in range(REPEATS)]
+        total_ms = min(run[module][1] for run in runs) / 1000
+        own_ms = min(sum(self_us for name, (self_us, _) in run.items()
+                         if name.startswith('dynairxvis'))
+                     for run in runs) / 1000
+        uses_matplotlib = any(name.startswith('matplotlib')
+                              for name in runs[0])
+        problems = []
+        if own_ms > OWN_BUDGET_MS:
+            problems.append(f'own time over {OWN_BUDGET_MS} ms')
+        if module in NO_MATPLOTLIB and uses_matplotlib:
+            problems.append('imports matplotlib')
+        failed = failed or bool(problems)
+        print(f'{module:<22} total {total_ms:7.1f} ms  own {own_ms:5.1f} ms'
+              f"  matplotlib {'yes' if uses_matplotlib else 'no ':<3}  "
+              f"{'FAIL: ' + ', '.join(problems) if problems else 'ok'}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,68 @@
+"""
+Benchmark for :func:`dynairxvis.templates.render_template`.
+
+Renders one small chart per synthetic patient to PNG bytes, once with a
+new figure per chart and once on a reused template, and prints the mean
+time per chart for each chart type.
+
+Run with::
+
+    python benchmarks/bench_templates.py
+"""
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from dynairxvis.templates import TEMPLATE_CHARTS, render_template  # noqa
+
+N_PATIENTS = 50
+ROWS_PER_PATIENT = 20
+
+
+def make_patient(seed, rows=ROWS_PER_PATIENT):
+    rng = np.random.default_rng(seed)
+    start = pd.Series(pd.Timestamp('2015-01-01') + pd.to_timedelta(
+        rng.integers(0, 3000, rows), unit='D'))
+    end = start + pd.to_timedelta(rng.integers(1, 400, rows), unit='D')
+    conditions = list(rng.choice(['Asthma', 'COPD', 'Diabetes', 'Gout'],
+                                 rows))
+    return conditions, start, end
+
+
+def chart_args(chart, conditions, start, end):
+    df = pd.DataFrame({'Condition': conditions, 'Start_Date': start})
+    return {
+        'gantt': ((conditions, start, end), {}),
+        'line': ((conditions, start, end), {}),
+        'heatmap': ((df,), {'date_col': 'Start_Date',
+                            'y_col': 'Condition'}),
+        'calendar': ((df,), {'y_column': 'Condition',
+                             'x_column': 'Start_Date'}),
+    }[chart]
+
+
+def main():
+    patients = [make_patient(seed) for seed in range(N_PATIENTS)]
+    for chart in ['gantt', 'line', 'heatmap', 'calendar']:
+        chart_func = TEMPLATE_CHARTS[chart]
+        timings = {}
+        for label in ['new figure', 'template']:
+            start = time.perf_counter()
+            for patient in patients:
+                args, kwargs = chart_args(chart, *patient)
+                if label == 'template':
+                    render_template(chart, *args, output='png', **kwargs)
+                else:
+                    chart_func(*args, output='png', **kwargs)
+            timings[label] = (time.perf_counter() - start) / N_PATIENTS
+        saving = 1 - timings['template'] / timings['new figure']
+        print(f"{chart:>9}: new figure {timings['new figure'] * 1e3:6.1f} ms"
+              f"  template {timings['template'] * 1e3:6.1f} ms"
+              f"  saving {saving:5.1%}")
+
+
+if __name__ == '__main__':
+    main()
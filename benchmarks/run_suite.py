@@ -0,0 +1,289 @@
+"""
+Benchmark suite for every chart function across data sizes.
+
+For each chart and size (100 to 1,000,000 rows by default) the suite
+renders the chart headless on Agg and records:
+
+- the wall time of each phase: ``prepare``, ``draw_artists`` and
+  ``legend`` as reported by the chart itself (see dynairxvis.instrument),
+  ``layout`` (the chart's own tight_layout plus one more on the returned
+  figure) and ``savefig`` (PNG encoding into memory);
+- the peak memory of the render, measured with tracemalloc in a separate
+  run so that tracing does not distort the timings;
+- the number of artists in the figure.
+
+Results are written to JSON. Two result files can then be compared, and
+any chart/size whose total time grew by more than a threshold is flagged.
+
+Run with::
+
+    python benchmarks/run_suite.py --out before.json
+    python benchmarks/run_suite.py --out after.json
+    python benchmarks/run_suite.py compare before.json after.json
+
+Use ``--charts`` and ``--sizes`` to run a subset, e.g.
+``--charts gantt calendar --sizes 100 10000``.
+"""
+import argparse
+import datetime
+import io
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from dynairxvis.bar import bar  # noqa: E402
+from dynairxvis.box import box  # noqa: E402
+from dynairxvis.calendar import calendar  # noqa: E402
+from dynairxvis.dot import dot  # noqa: E402
+from dynairxvis.gantt import gantt  # noqa: E402
+from dynairxvis.heatmap import heatmap, heatmap_nq  # noqa: E402
+from dynairxvis.hist import histogram  # noqa: E402
+from dynairxvis.instrument import record_spans, SPANS  # noqa: E402
+from dynairxvis.pie import pie, table_list  # noqa: E402
+from dynairxvis.plotgrid import plot_grid  # noqa: E402
+from dynairxvis.radar import radar  # noqa: E402
+from dynairxvis.scatter import scatter  # noqa: E402
+from dynairxvis.time import line  # noqa: E402
+from dynairxvis.violin import violin  # noqa: E402
+
+SIZES = [100, 1_000, 10_000, 100_000, 1_000_000]
+N_CATEGORIES = 50
+# A chart is not run at larger sizes once one render took longer than this
+MAX_SECONDS = 60
+# compare: flag a slowdown above this ratio and this many seconds
+THRESHOLD = 1.25
+MIN_DELTA = 0.01
+
+
+def make_data(n, seed=0):
+    """
+    Synthetic event data: one row per interval, with a category, start and
+    end date and a small integer value.
+    """
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp('2000-01-01') + pd.to_timedelta(
+        rng.integers(0, 365 * 20, n), unit='D')
+    return pd.DataFrame({
+        'category': pd.Series(rng.integers(0, N_CATEGORIES, n)).map(
+            'Condition {}'.format),
+        'start': start,
+        'end': start + pd.to_timedelta(rng.integers(1, 365, n), unit='D'),
+        'value': rng.integers(0, 100, n),
+    })
+
+
+def _grid(df, n_rows=40):
+    # a patient overview: one gantt or line row per slice of the data
+    rows = np.array_split(np.arange(len(df)), n_rows)
+    return ([df['category'].iloc[r] for r in rows],
+            [df['start'].iloc[r] for r in rows],
+            [df['end'].iloc[r] for r in rows],
+            ['gantt' if i % 2 else 'line' for i in range(n_rows)]), \
+        {'vectorized': True}
+
+
+def _few(df, n_categories=5):
+    # pie(time=True) draws one subplot per category
+    return df[df['category'].isin(df['category'].unique()[:n_categories])]
+
+
+# name: (chart function, largest size worth running, arguments for a frame)
+# The arguments are built before timing starts. Charts that draw one
+# subplot, tick label or artist per row are capped where that stops
+# being a realistic input.
+CHARTS = {
+    'bar': (bar, 1_000, lambda df: (
+        (list(df['category']), list(df['value'])), {})),
+    'box': (box, None, lambda df: ((df['value'],), {})),
+    'dot': (dot, None, lambda df: ((df['value'],), {})),
+    'histogram': (histogram, None, lambda df: ((df['value'],), {})),
+    'violin': (violin, None, lambda df: ((df['value'],), {})),
+    'radar': (radar, 1_000, lambda df: (
+        (list(df['category']), list(df['value'])), {})),
+    'pie': (pie, 1_000, lambda df: ((list(df['category']),), {})),
+    'pie_time': (pie, None, lambda df: ((_few(df)['category'],), {
+        'time': True, 'vectorized': True,
+        'start_dates': _few(df)['start'], 'end_dates': _few(df)['end']})),
+    'scatter': (scatter, 1_000, lambda df: (
+        (list(df['category']),), {'values': list(df['value']),
+                                  'mode': 'scatter'})),
+    'gantt': (gantt, None, lambda df: (
+        (df['category'], df['start'], df['end']), {'vectorized': True})),
+    'line': (line, None, lambda df: (
+        (df['category'], df['start'], df['end']), {'vectorized': True})),
+    'heatmap': (heatmap, None, lambda df: ((df.copy(),), {
+        'date_col': 'start', 'y_col': 'category', 'vectorized': True})),
+    'heatmap_nq': (heatmap_nq, None, lambda df: (
+        (df['category'],), {'values': df['value'], 'bins': 10})),
+    'calendar': (calendar, None, lambda df: ((df.copy(),), {
+        'y_column': 'category', 'x_column': 'start', 'vectorized': True})),
+    'plot_grid': (plot_grid, None, _grid),
+    'table_list': (table_list, None, lambda df: ((df[['category']],), {})),
+}
+
+
+def render(chart, args, kwargs):
+    """
+    Renders one chart and returns ``(phases, artists)``.
+    """
+    func = CHARTS[chart][0]
+    if chart == 'table_list':
+        with record_spans() as records:
+            func(*args, file=io.StringIO(), **kwargs)
+        return _chart_phases(records), 0
+    with record_spans() as records:
+        fig = func(*args, output='figure', **kwargs)
+    phases = _chart_phases(records)
+    t0 = time.perf_counter()
+    fig.tight_layout()
+    t1 = time.perf_counter()
+    fig.savefig(io.BytesIO(), format='png')
+    t2 = time.perf_counter()
+    phases['layout'] += t1 - t0
+    phases['savefig'] = t2 - t1
+    artists = len(fig.findobj())
+    plt.close(fig)
+    return phases, artists
+
+
+def _chart_phases(records):
+    # Spans of the outer chart call plus those of the charts it called
+    phases = dict.fromkeys(SPANS, 0.0)
+    for record in records:
+        for span, seconds in record['spans'].items():
+            phases[span] += seconds
+    for span in ['encode', 'write']:
+        if not phases[span]:
+            del phases[span]
+    return phases
+
+
+def peak_memory(chart, args, kwargs):
+    """
+    Peak traced memory, in bytes, of rendering the chart once.
+    """
+    tracemalloc.start()
+    try:
+        render(chart, args, kwargs)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(charts, sizes, repeat=1, memory=True, max_seconds=MAX_SECONDS):
+    results = []
+    for chart in charts:
+        max_rows = CHARTS[chart][1]
+        for n in sizes:
+            if max_rows is not None and n > max_rows:
+                break
+            args, kwargs = CHARTS[chart][2](make_data(n))
+            best = None
+            for _ in range(repeat):
+                phases, artists = render(chart, args, kwargs)
+                if best is None or sum(phases.values()) < \
+                        sum(best.values()):
+                    best = phases
+            total = sum(best.values())
+            entry = {'chart': chart, 'rows': n, 'phases': best,
+                     'total': total, 'artists': artists,
+                     'peak_bytes': (peak_memory(chart, args, kwargs)
+                                    if memory else None)}
+            results.append(entry)
+            print(f"{chart:>11} {n:>9}  total {total:8.3f}s  " +
+                  '  '.join(f'{k} {v:7.3f}s' for k, v in best.items()) +
+                  f"  artists {artists:>7}" +
+                  (f"  peak {entry['peak_bytes'] / 2**20:8.1f} MiB"
+                   if memory else ''), flush=True)
+            if total > max_seconds:
+                break
+    return results
+
+
+def metadata():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                                capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'matplotlib': matplotlib.__version__,
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+    }
+
+
+def compare(before_path, after_path, threshold=THRESHOLD,
+            min_delta=MIN_DELTA):
+    """
+    Prints the change in total time per chart and size between two result
+    files and returns the number of regressions.
+    """
+    with open(before_path) as f:
+        before = {(r['chart'], r['rows']): r for r in json.load(f)['results']}
+    with open(after_path) as f:
+        after = json.load(f)['results']
+    regressions = 0
+    for entry in after:
+        old = before.get((entry['chart'], entry['rows']))
+        if old is None:
+            continue
+        ratio = entry['total'] / old['total'] if old['total'] else np.inf
+        slower = (ratio > threshold and
+                  entry['total'] - old['total'] > min_delta)
+        regressions += slower
+        print(f"{entry['chart']:>11} {entry['rows']:>9}  "
+              f"{old['total']:8.3f}s -> {entry['total']:8.3f}s  "
+              f"x{ratio:5.2f}{'  REGRESSION' if slower else ''}")
+    return regressions
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ['compare']:
+        parser = argparse.ArgumentParser(prog='run_suite.py compare')
+        parser.add_argument('before')
+        parser.add_argument('after')
+        parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                            help='flag totals that grew by more than this '
+                                 'ratio (default %(default)s)')
+        options = parser.parse_args(argv[1:])
+        return 1 if compare(options.before, options.after,
+                            options.threshold) else 0
+
+    parser = argparse.ArgumentParser(prog='run_suite.py')
+    parser.add_argument('--charts', nargs='+', default=list(CHARTS),
+                        choices=list(CHARTS))
+    parser.add_argument('--sizes', nargs='+', type=int, default=SIZES)
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='keep the fastest of this many renders')
+    parser.add_argument('--no-memory', action='store_true',
+                        help='skip the tracemalloc run')
+    parser.add_argument('--max-seconds', type=float, default=MAX_SECONDS)
+    parser.add_argument('--out', default='benchmark_results.json')
+    options = parser.parse_args(argv)
+    results = run(options.charts, options.sizes, repeat=options.repeat,
+                  memory=not options.no_memory,
+                  max_seconds=options.max_seconds)
+    with open(options.out, 'w') as f:
+        json.dump({'meta': metadata(), 'results': results}, f, indent=1)
+    print(f'Results written to {options.out}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
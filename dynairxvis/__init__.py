@@ -15,8 +15,10 @@ except Exception:  # e.g. not installed
 __all__ = [
     # public re-exports (populated lazily below)
     "dot", "box", "bar", "pie", "table_list", "line", "gantt",
-    "radar", "violin", "histogram", "scatter", "heatmap", "calendar",
-    "profile", "findIndex",
+    "radar", "violin", "histogram", "scatter", "heatmap", "heatmap_nq",
+    "calendar", "profile", "findIndex", "plot_charts", "plot_grid",
+    "render_batch", "render_template", "record_spans", "add_span_listener",
+    "remove_span_listener", "cache_info", "clear_caches", "read_events",
 ]
 
 # --- lazy re-exports ---------------------------------------------------------
@@ -44,9 +46,20 @@ def __getattr__(name: str) -> _t.Any:
         "histogram": ".hist",
         "scatter": ".scatter",
         "heatmap": ".heatmap",
+        "heatmap_nq": ".heatmap",
         "calendar": ".calendar",
         "profile": ".utils",
         "findIndex": ".utils",
+        "plot_charts": ".plot",
+        "plot_grid": ".plotgrid",
+        "render_batch": ".batch",
+        "render_template": ".templates",
+        "record_spans": ".instrument",
+        "add_span_listener": ".instrument",
+        "remove_span_listener": ".instrument",
+        "cache_info": ".cache",
+        "clear_caches": ".cache",
+        "read_events": ".sources",
     }
     if name in module_map:
         mod = _imp(module_map[name], package=__name__)
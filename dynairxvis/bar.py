@@ -1,8 +1,10 @@
+from .instrument import _instrumented
 from .scatter import scatter
 
 
+@_instrumented('bar')
 def bar(categories, values, horizontal=False, markers=None,
-        fig_kw={}, plot_kw={}, **kwargs):
+        fig_kw={}, plot_kw={}, output='show', **kwargs):
     """
     Creates and displays a bar chart with quantities on the y-axis and
     nominal categories on the x-axis. Supports both vertical and horizontal
@@ -25,6 +27,10 @@ def bar(categories, values, horizontal=False, markers=None,
         Keyword arguments for plt.subplots() to customize the figure.
     plot_kw : dict
         Keyword arguments for ax.bar() to further customize the bar chart.
+    output : str, optional
+        'show' (default) displays the chart, 'figure' returns the Figure
+        and 'png', 'svg' or 'rgba' return the rendered image without
+        touching the screen or the filesystem.
     **kwargs : dict
         Additional keyword arguments for customization not related to ax.bar().
 
@@ -39,5 +45,6 @@ def bar(categories, values, horizontal=False, markers=None,
     # Call the scatter function with mode set to 'bar'
     orientation = 'horizontal' if horizontal else 'vertical'
 
-    scatter(categories, values=values, mode='bar', markers=markers,
-            fig_kw=fig_kw, plot_kw=plot_kw, orientation=orientation, **kwargs)
+    return scatter(categories, values=values, mode='bar', markers=markers,
+                   fig_kw=fig_kw, plot_kw=plot_kw, orientation=orientation,
+                   output=output, **kwargs)
@@ -0,0 +1,225 @@
+"""
+Render many `plot_charts` chart sets in parallel, headless.
+
+Each job is rendered in a worker process on the Agg backend and every
+figure it produces is saved to `out_dir`, so nothing is ever shown on
+screen. With a `cache_dir`, the figures of a job are also kept under a hash
+of its data and options, and a job that did not change is copied from
+there instead of being rendered.
+"""
+import os
+import shutil
+import signal
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pandas as pd
+
+from .cache import _disk_path, _publish_dir, _read_bytes, _write_bytes
+
+
+def render_batch(jobs, workers=None, out_dir='.', timeout=None, fmt='png',
+                 savefig_kw={}, cache_dir=None, rasterize=False):
+    """
+    Renders the `plot_charts` chart set of every job across a process pool.
+
+    Parameters
+    ----------
+    jobs : iterable of tuple
+        One ``(data, column_refs, kwargs)`` tuple per chart set. `data` is a
+        DataFrame or a ``(name, DataFrame)`` pair as yielded by iterating a
+        ``DataFrame.groupby``; `column_refs` and `kwargs` are passed to
+        `plot_charts`. `kwargs` may be omitted. `data` may also be a
+        Parquet path (see dynairxvis.sources.read_events), read in the
+        worker with the filters in ``kwargs['source_kw']``, so only the
+        path is sent to the worker process.
+    workers : int, optional
+        Number of worker processes. Default is the number of CPUs.
+    out_dir : str, optional
+        Directory the figures are written to; created if needed.
+        Default is the current directory.
+    timeout : float, optional
+        Seconds a single job may run before it is abandoned and reported
+        as failed. Only enforced where SIGALRM exists (Linux, macOS).
+        Default is None, no limit.
+    fmt : str, optional
+        File format passed to savefig(). Default is 'png'.
+    savefig_kw : dict, optional
+        Further keyword arguments for savefig(), e.g. ``{'dpi': 100}``.
+        PNG, SVG and PDF files are written without timestamps or creator
+        strings, so the same job always gives the same bytes.
+    cache_dir : str, optional
+        Directory of the render cache. The figures of every successful job
+        are kept there under a hash of its data, column references,
+        keyword arguments, format and savefig_kw, and a later job with the
+        same hash copies them to `out_dir` instead of rendering. Output
+        files already holding the same bytes are not rewritten. Default is
+        None, no cache.
+    rasterize : bool or dict, optional
+        For 'pdf', 'svg' and 'eps' files, writes the dense data layers of
+        every figure (e.g. the cells of a calendar) as one image at the
+        'dpi' of dynairxvis.utils.RASTER_POLICY, and keeps axes, text and
+        legends as vectors. A dict overrides some of the 'artists',
+        'vertices' and 'dpi' of the policy. Default is False.
+
+    Returns
+    -------
+    list of dict
+        A manifest with one entry per job, in job order, holding the job
+        'name' (its index, followed by the group key if any), the saved
+        'paths', the rendering time in 'seconds', the 'error' message
+        (None if the job succeeded), whether it was 'cached' and the total
+        size of its files in 'bytes'. If a worker process dies, the jobs
+        that had not finished are reported as failed with a
+        'BrokenProcessPool' error.
+
+    Example
+    -------
+    jobs = [(group, ['Condition', 'Start_Date', 'End_Date'], {})
+            for group in df.groupby('patient_id')]
+    manifest = render_batch(jobs, workers=8, out_dir='charts', timeout=60,
+                            cache_dir='render_cache')
+    failed = [job for job in manifest if job['error']]
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    if cache_dir is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+    tasks = []
+    for i, job in enumerate(jobs):
+        data, column_refs = job[0], job[1]
+        kwargs = job[2] if len(job) > 2 else {}
+        name = str(i)
+        if isinstance(data, tuple):  # (key, DataFrame) from a groupby
+            key, data = data
+            key = '_'.join(map(str, key)) if isinstance(key, tuple) \
+                else str(key)
+            name = f'{i}_{key}'
+        tasks.append((name, data, column_refs, kwargs))
+
+    with ProcessPoolExecutor(max_workers=workers,
+                             initializer=_init_worker) as executor:
+        futures = [executor.submit(_render_job, *task, out_dir=out_dir,
+                                   timeout=timeout, fmt=fmt,
+                                   savefig_kw=savefig_kw,
+                                   cache_dir=cache_dir, rasterize=rasterize)
+                   for task in tasks]
+        manifest = []
+        for task, future in zip(tasks, futures):
+            try:
+                manifest.append(future.result())
+            except BrokenProcessPool as e:
+                # a worker died: the jobs that finished keep their entry
+                entry = _entry(task[0])
+                entry['error'] = f'BrokenProcessPool: {e}'
+                manifest.append(entry)
+        return manifest
+
+
+def _init_worker():
+    # Headless: select Agg before any chart module draws
+    import matplotlib
+    matplotlib.use('Agg', force=True)
+
+
+class _JobTimeout(BaseException):
+    """
+    Raised when a job runs out of time. Not an Exception, so the
+    `except Exception` blocks of the code being run cannot swallow it.
+    """
+
+
+def _on_timeout(signum, frame):
+    raise _JobTimeout
+
+
+def _entry(name):
+    return {'name': name, 'paths': [], 'seconds': 0.0, 'error': None,
+            'cached': False, 'bytes': 0}
+
+
+def _render_job(name, data, column_refs, kwargs, out_dir='.', timeout=None,
+                fmt='png', savefig_kw={}, cache_dir=None, rasterize=False):
+    """
+    Renders one job in a worker and saves every figure it opened.
+    Failures are caught and reported in the manifest entry.
+    """
+    import matplotlib.pyplot as plt
+    from .plot import plot_charts, _render_key
+    from .sources import is_source, read_events
+    from .utils import _savefig
+
+    entry = _entry(name)
+    use_alarm = timeout is not None and hasattr(signal, 'SIGALRM')
+    plt.close('all')
+    start = time.perf_counter()
+    tmp_dir = None
+    try:
+        if use_alarm:
+            signal.signal(signal.SIGALRM, _on_timeout)
+            signal.setitimer(signal.ITIMER_REAL, timeout)
+        if is_source(data):
+            kwargs = dict(kwargs)
+            data = read_events(data, columns=column_refs,
+                               **kwargs.pop('source_kw', {}))
+            column_refs = list(data.columns)
+        data = pd.DataFrame(data)
+        cached = None
+        if cache_dir is not None:
+            key = _render_key('render_batch', data, list(column_refs),
+                              dict(sorted(kwargs.items())), fmt,
+                              dict(sorted(savefig_kw.items())), rasterize)
+            cached = None if key is None else _disk_path(cache_dir, key)
+        if cached is not None and os.path.isdir(cached):
+            # one file per figure, in the order they were opened
+            figures = sorted(os.listdir(cached),
+                             key=lambda f: int(f.split('.')[0]))
+            for i, figure in enumerate(figures):
+                path = os.path.join(out_dir, f'{name}_{i}.{fmt}')
+                entry['bytes'] += _copy_if_changed(
+                    os.path.join(cached, figure), path)
+                entry['paths'].append(path)
+            entry['cached'] = True
+        else:
+            plot_charts(data, column_refs=column_refs, **kwargs)
+            tmp_dir = None if cached is None else tempfile.mkdtemp(
+                dir=cache_dir)
+            for i, num in enumerate(plt.get_fignums()):
+                path = os.path.join(out_dir, f'{name}_{i}.{fmt}')
+                if tmp_dir is None:
+                    entry['bytes'] += _savefig(plt.figure(num), path,
+                                               format=fmt, rasterize=rasterize,
+                                               **savefig_kw)
+                else:
+                    figure = os.path.join(tmp_dir, f'{i}.{fmt}')
+                    _savefig(plt.figure(num), figure, format=fmt,
+                             rasterize=rasterize, **savefig_kw)
+                    entry['bytes'] += _copy_if_changed(figure, path)
+                entry['paths'].append(path)
+            if tmp_dir is not None:
+                _publish_dir(tmp_dir, cached)
+    except _JobTimeout:
+        entry['error'] = f'TimeoutError: job timed out after {timeout}s'
+    except Exception as e:
+        entry['error'] = f'{type(e).__name__}: {e}'
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+        plt.close('all')
+        if tmp_dir is not None and os.path.isdir(tmp_dir):
+            # the job failed before its figures were published
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    entry['seconds'] = time.perf_counter() - start
+    return entry
+
+
+def _copy_if_changed(source, path):
+    """
+    Copies the file `source` to `path`, unless `path` already holds the
+    same bytes. Returns the size of the file.
+    """
+    data = _read_bytes(source)
+    if _read_bytes(path) != data:
+        _write_bytes(path, data)
+    return len(data)
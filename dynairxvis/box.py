@@ -1,8 +1,10 @@
-import matplotlib.pyplot as plt
-from .utils import FIG_SIZE
+from .instrument import _instrumented, _phase
+from .utils import FIG_SIZE, _render_output, _subplots
 
 
-def box(values, horizontal=False, fig_kw={}, plot_kw={}, **kwargs):
+@_instrumented('box')
+def box(values, horizontal=False, fig_kw={}, plot_kw={}, output='show',
+        **kwargs):
     """
     Creates and displays a box plot based on the provided values.
 
@@ -13,9 +15,13 @@ def box(values, horizontal=False, fig_kw={}, plot_kw={}, **kwargs):
     horizontal : bool, optional
         Whether to display the box plot horizontally. Defaults to False.
     fig_kw : dict
-        Keyword arguments for plt.figure() to customize the figure.
+        Keyword arguments for the Figure to customize it.
     plot_kw : dict
-        Keyword arguments for plt.boxplot() for further customization.
+        Keyword arguments for ax.boxplot() for further customization.
+    output : str, optional
+        'show' (default) displays the chart, 'figure' returns the Figure
+        and 'png', 'svg' or 'rgba' return the rendered image without
+        touching the screen or the filesystem.
     **kwargs : dict
         Additional keyword arguments for customization.
 
@@ -30,28 +36,31 @@ def box(values, horizontal=False, fig_kw={}, plot_kw={}, **kwargs):
     default_fig_kw.update(fig_kw)
 
     # Create the figure
-    plt.figure(**default_fig_kw)
+    _phase('draw_artists')
+    fig, ax = _subplots(output=output, **default_fig_kw)
 
-    # Configure median properties if not provided
+    # Configure median properties if not provided, without modifying the
+    # caller's plot_kw
+    plot_kw = dict(plot_kw)
     medianprops = plot_kw.pop('medianprops', {'color': 'black',
                                               'linewidth': 2})
 
     # Plot the box plot
-    plt.boxplot(values, vert=not horizontal, medianprops=medianprops,
-                **plot_kw)
+    ax.boxplot(values, vert=not horizontal, medianprops=medianprops,
+               **plot_kw)
 
     # Set axis labels and grid
     if horizontal:
-        plt.xlabel(kwargs.get('xlabel', 'Values'))  # Set xlabel
-        plt.yticks([1], kwargs.get('yticks_labels', ['Value Set']))
-        plt.grid(True, which='both', axis='x', linestyle='--', linewidth=0.5)
+        ax.set_xlabel(kwargs.get('xlabel', 'Values'))  # Set xlabel
+        ax.set_yticks([1], kwargs.get('yticks_labels', ['Value Set']))
+        ax.grid(True, which='both', axis='x', linestyle='--', linewidth=0.5)
     else:
-        plt.ylabel(kwargs.get('ylabel', 'Values'))  # Set ylabel
-        plt.xticks([1], kwargs.get('xticks_labels', ['Value Set']))
-        plt.grid(True, which='both', axis='y', linestyle='--', linewidth=0.5)
+        ax.set_ylabel(kwargs.get('ylabel', 'Values'))  # Set ylabel
+        ax.set_xticks([1], kwargs.get('xticks_labels', ['Value Set']))
+        ax.grid(True, which='both', axis='y', linestyle='--', linewidth=0.5)
 
     # Apply title
-    plt.title(kwargs.get('title', 'Box Plot of Values'))
+    ax.set_title(kwargs.get('title', 'Box Plot of Values'))
 
     # Show the plot
-    plt.show()
+    return _render_output(fig, output)
@@ -0,0 +1,280 @@
+"""
+Memoization of chart preparation.
+
+The data preparation of a chart (profiling the column types, factorizing
+the categories, counting the events per cell) only depends on the data and
+a few data-affecting arguments. Repeated renders of the same data, or
+renders that only change cosmetic arguments such as the title, colours of
+the axes or the output format, can reuse it.
+
+Entries are keyed on a content hash of the data: the raw buffer of every
+referenced numeric or datetime column, and pd.util.hash_pandas_object of
+the others, is fed to SHA-1 together with the dtypes and the
+data-affecting arguments. Hashing is linear in the data but several times
+cheaper than the preparation it replaces, and a changed value anywhere in
+the data gives a new key. Each cache is a least-recently-used mapping
+bounded in number of entries and in bytes, and counts its hits and misses.
+
+Rendered images can also be kept on disk, in a content-addressed directory
+(see the `cache_dir` argument of `plot` and `render_batch`): each file is
+named after the hash of the chart, its data and options, so an unchanged
+chart is read back instead of being drawn again.
+
+This module does not import matplotlib.
+"""
+import hashlib
+import os
+import shutil
+import sys
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+# Bounds of the cache of chart specs
+SPEC_CACHE_ENTRIES = 256
+SPEC_CACHE_BYTES = 256 * 2 ** 20
+# Maximum number of columns whose inferred type profile() remembers
+PROFILE_CACHE_ENTRIES = 4096
+
+_SCALARS = (type(None), bool, int, float, complex, str, bytes, np.generic,
+            pd.Timestamp, pd.Timedelta, datetime, date, timedelta)
+
+
+class LRUCache:
+    """
+    A thread-safe least-recently-used mapping, bounded by its number of
+    entries and by the total size of its values.
+
+    Parameters
+    ----------
+    max_entries : int
+        Maximum number of entries.
+    max_bytes : int, optional
+        Maximum total size, as given to `put`. None (default) for no bound.
+    """
+
+    def __init__(self, max_entries, max_bytes=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.nbytes = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        """
+        Returns the value of `key` and marks it as recently used, or
+        `default` if it is not cached.
+        """
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key][0]
+            self.misses += 1
+            return default
+
+    def put(self, key, value, nbytes=0):
+        """
+        Caches `value` of size `nbytes`, dropping the least recently used
+        entries beyond the bounds. A value larger than `max_bytes` is not
+        cached.
+        """
+        if self.max_bytes is not None and nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self.nbytes -= self._data.pop(key)[1]
+            self._data[key] = (value, nbytes)
+            self.nbytes += nbytes
+            while (len(self._data) > self.max_entries or
+                   (self.max_bytes is not None and
+                    self.nbytes > self.max_bytes)):
+                _, (_, dropped) = self._data.popitem(last=False)
+                self.nbytes -= dropped
+
+    def clear(self):
+        """
+        Drops all entries and resets the counters.
+        """
+        with self._lock:
+            self._data.clear()
+            self.nbytes = self.hits = self.misses = 0
+
+    def info(self):
+        """
+        Returns the counters and bounds as a dict.
+        """
+        return {'hits': self.hits, 'misses': self.misses,
+                'entries': len(self._data), 'bytes': self.nbytes,
+                'max_entries': self.max_entries, 'max_bytes': self.max_bytes}
+
+
+_SPEC_CACHE = LRUCache(SPEC_CACHE_ENTRIES, SPEC_CACHE_BYTES)
+_PROFILE_CACHE = LRUCache(PROFILE_CACHE_ENTRIES)
+
+
+def cache_info():
+    """
+    Reports the hits, misses, entries and size of the caches.
+
+    Returns
+    -------
+    dict
+        'specs' for the prepared charts (see `dynairxvis.specs.prepare`)
+        and 'profiles' for the column types inferred by `profile`, each
+        with 'hits', 'misses', 'entries', 'bytes', 'max_entries' and
+        'max_bytes'.
+    """
+    return {'specs': _SPEC_CACHE.info(), 'profiles': _PROFILE_CACHE.info()}
+
+
+def clear_caches():
+    """
+    Empties the spec and profile caches and resets their counters.
+    """
+    _SPEC_CACHE.clear()
+    _PROFILE_CACHE.clear()
+
+
+def content_hash(*objs):
+    """
+    Hashes the contents of DataFrames, Series, arrays, lists and scalars.
+
+    Parameters
+    ----------
+    *objs
+        The objects to hash. DataFrames are hashed column by column with
+        their names and dtypes; the index of pandas objects is ignored.
+
+    Returns
+    -------
+    str or None
+        A hex digest, or None if an object cannot be hashed (e.g. an
+        arbitrary Python object), in which case it should not be cached.
+    """
+    digest = hashlib.sha1(usedforsecurity=False)
+    try:
+        for obj in objs:
+            _update(digest, obj)
+    except TypeError:
+        return None
+    return digest.hexdigest()
+
+
+def _update(digest, obj):
+    if isinstance(obj, pd.DataFrame):
+        digest.update(f'frame{obj.shape}'.encode())
+        for j, name in enumerate(obj.columns):
+            digest.update(repr(name).encode())
+            _update(digest, obj.iloc[:, j])
+    elif isinstance(obj, (pd.Series, pd.Index)):
+        # the repr of a categorical dtype includes its categories and order
+        digest.update(f'series{len(obj)}{obj.dtype!r}'.encode())
+        digest.update(_hashable_buffer(obj))
+    elif isinstance(obj, np.ndarray):
+        if obj.dtype == object:
+            _update(digest, pd.Series(obj.ravel()))
+            digest.update(repr(obj.shape).encode())
+        else:
+            digest.update(f'array{obj.shape}{obj.dtype}'.encode())
+            digest.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, (list, tuple)):
+        # hashed as the Series the charts would make of it
+        try:
+            values = pd.Series(obj, dtype=None if obj else object)
+            buffer = _hashable_buffer(values)
+        except (TypeError, ValueError):  # e.g. nested lists
+            digest.update(f'list{len(obj)}'.encode())
+            for item in obj:
+                _update(digest, item)
+        else:
+            digest.update(f'series{len(values)}{values.dtype!r}'.encode())
+            digest.update(buffer)
+    elif isinstance(obj, dict):
+        digest.update(f'dict{len(obj)}'.encode())
+        for key, value in obj.items():
+            _update(digest, key)
+            _update(digest, value)
+    elif isinstance(obj, _SCALARS):
+        digest.update(f'{type(obj).__name__}:{obj!r}'.encode())
+    else:
+        raise TypeError(f'cannot hash {type(obj).__name__}')
+
+
+def _hashable_buffer(values):
+    """
+    The values of a Series or Index as a contiguous buffer: the data itself
+    for NumPy numeric, boolean and datetime dtypes, else one 64-bit hash
+    per value.
+    """
+    if isinstance(values.dtype, np.dtype) and values.dtype.kind in 'biufcmM':
+        return np.ascontiguousarray(values.to_numpy())
+    return pd.util.hash_pandas_object(values, index=False).to_numpy()
+
+
+def _disk_path(cache_dir, key, suffix=''):
+    """
+    The path of `key` in a content-addressed directory, spread over
+    sub-directories named after the first two hex digits of the key.
+    """
+    return os.path.join(cache_dir, key[:2], key + suffix)
+
+
+def _read_bytes(path):
+    """
+    The contents of `path`, or None if it does not exist.
+    """
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def _write_bytes(path, data):
+    """
+    Writes `data` to `path` atomically, so that concurrent readers and
+    writers of the same key never see a partial file.
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _publish_dir(tmp_dir, path):
+    """
+    Moves the directory `tmp_dir` to `path` in one step. If another
+    process published the same key first, its copy is kept.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    try:
+        os.rename(tmp_dir, path)
+    except OSError:
+        if not os.path.isdir(path):
+            raise
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def _nbytes(value):
+    """
+    Approximate size of a spec: its arrays, lists and labels.
+    """
+    if isinstance(value, np.ndarray):
+        if value.dtype == object:
+            return value.nbytes + sum(map(sys.getsizeof, value.ravel()))
+        return value.nbytes
+    if isinstance(value, dict):
+        return sum(_nbytes(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(map(_nbytes, value))
+    return sys.getsizeof(value)
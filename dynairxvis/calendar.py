@@ -1,14 +1,76 @@
 import matplotlib.pyplot as plt
+from matplotlib.collections import PolyCollection
+from matplotlib.patches import Rectangle
 import numpy as np
-from .utils import FIG_SIZE
+from .instrument import _instrumented, _phase
+from .specs import prepare
+from .utils import FIG_SIZE, _render_output, _subplots
 
 
+@_instrumented('calendar')
 def calendar(df=None, y_column=None, x_column=None, dot_size=0.2,
-             ax=None, fig_kw={}, plot_kw={}, **kwargs):
+             ax=None, fig_kw={}, plot_kw={}, output='show', cache=False,
+             vectorized=False, **kwargs):
+    """
+    Creates a calendar chart: a grid of categories (rows) by years
+    (columns) where each event in a cell is drawn as a small square dot.
+
+    Parameters
+    ----------
+    df : pd.DataFrame or iterable of pd.DataFrame
+        DataFrame containing the events, or an iterable of DataFrame
+        chunks (e.g. from ``pd.read_csv(chunksize=...)``), which are
+        counted one at a time without holding all events in memory.
+    y_column : str
+        The name of the column containing the categories (e.g. diseases).
+    x_column : str
+        The name of the datetime column used to derive the year.
+    dot_size : float, optional
+        The maximum size of a dot. It is reduced when there are many events.
+    ax : matplotlib.axes.Axes, optional
+        Axes object to plot on. If None, creates a new figure and axis.
+    fig_kw : dict, optional
+        Keyword arguments for plt.subplots(); 'xlabel', 'ylabel' and
+        'title' are used for the axis labels and title.
+    plot_kw : dict, optional
+        Not used yet.
+    output : str, optional
+        'show' (default) displays the chart, 'figure' returns the Figure
+        and 'png', 'svg' or 'rgba' return the rendered image without
+        touching the screen or the filesystem.
+    cache : bool, optional
+        If True, the counts per cell are memoized on a content hash of the
+        two columns, so redrawing the same events skips the counting.
+        Default is False.
+    vectorized : bool, optional
+        If True, the cell grid and all dots are drawn as one collection
+        each, and a cell holding more events than it has room for shows its
+        count instead of dots. The number of artists is then bounded by the
+        number of cells. Default is False, which adds one Rectangle per
+        cell and per dot, and drops the dots that do not fit.
+    **kwargs : dict
+        Additional keyword arguments, not used yet.
+
+    Example
+    -------
+    >>> calendar(df, y_column='disease', x_column='date')
+    """
     assert (df is not None), "Dataframe must be provided."
     assert (y_column is not None), "Y column must be provided."
     assert (x_column is not None), "X column must be provided."
 
+    spec = prepare('calendar', df, y_column, x_column, cache=cache)
+    return _draw_calendar(spec, dot_size=dot_size, ax=ax,
+                          vectorized=vectorized, fig_kw=fig_kw,
+                          plot_kw=plot_kw, output=output, **kwargs)
+
+
+def _draw_calendar(spec, dot_size=0.2, ax=None, fig_kw={}, plot_kw={},
+                   output='show', vectorized=False, **kwargs):
+    """
+    Draws a calendar spec (see dynairxvis.specs). The arguments are those
+    of `calendar`.
+    """
     # Merge the default figure settings with any user overrides.
     # FIG_SIZE might contain keys meant for the axis; we'll extract those.
     fig_defaults = FIG_SIZE.copy()
@@ -25,16 +87,15 @@ def calendar(df=None, y_column=None, x_column=None, dot_size=0.2,
     chart_height = fig_defaults['figsize'][1]
 
     # Use the provided ax or create a new one and track if we created it.
+    own_figure = ax is None
+    _phase('draw_artists')
     if ax is None:
-        fig, ax = plt.subplots(**fig_defaults)
-
-    # TODO: enforce x column to be date
-    df['year'] = df[x_column].dt.year
-    g = df.groupby([y_column, 'year'], sort=False).size().unstack(fill_value=0)
+        fig, ax = _subplots(output=output, **fig_defaults)
 
     # Get list of diseases and years
-    diseases = g.index.tolist()
-    years = g.columns.tolist()
+    diseases = spec['rows']
+    years = spec['columns']
+    counts = spec['counts']
 
     # Ensure non-zero row heights and column widths
     min_row_height = 0.5
@@ -44,41 +105,48 @@ def calendar(df=None, y_column=None, x_column=None, dot_size=0.2,
     col_width = max(chart_width / len(years), min_col_width)
 
     # Calculate dot size based on available space and total dots
-    te = len(df)
+    te = spec['n_events']
     possible_dot_size = np.sqrt((chart_width * chart_height) / te * 2)
     dot_size = min(dot_size, possible_dot_size)
 
-    # Draw cells and dots for each disease and year
-    for i, disease in enumerate(diseases):
-        for j, year in enumerate(years):
-            count = g.at[disease, year]
-            x_start = j * col_width
-            y_start = i * row_height
-
-            # Draw the background rectangle for the cell
-            ax.add_patch(plt.Rectangle((x_start, y_start), col_width,
-                                       row_height, color='white', ec='black'))
-
-            # Calculate how many dots fit in this bin
-            dots_per_row = max(int(col_width / dot_size), 1)
-            dots_per_col = max(int(row_height / dot_size), 1)
-
-            # Adjust dot size if necessary to ensure full space is used
-            # if dots_per_row * dots_per_col < count:
-            #     dot_size = max(col_width / dots_per_row,
-            #                    row_height / dots_per_col)
-
-            # Compute the final number of dots to be placed
-            total_dots = min(count, dots_per_row * dots_per_col)
-
-            for d in range(total_dots):
-                x_offset = x_start + (d % dots_per_row) * dot_size + 0.1
-                y_offset = y_start + (d // dots_per_row) * dot_size + 0.1
-                if (y_offset + dot_size < y_start + row_height and
-                        x_offset + dot_size < x_start + col_width):
-                    ax.add_patch(plt.Rectangle((x_offset, y_offset), dot_size,
-                                               dot_size, color='grey',
-                                               ec='black'))
+    if vectorized:
+        _draw_calendar_collections(ax, counts, col_width, row_height,
+                                   dot_size)
+    else:
+        # Draw cells and dots for each disease and year
+        for i, disease in enumerate(diseases):
+            for j, year in enumerate(years):
+                count = counts[i, j]
+                x_start = j * col_width
+                y_start = i * row_height
+
+                # Draw the background rectangle for the cell
+                ax.add_patch(Rectangle((x_start, y_start), col_width,
+                                       row_height, color='white',
+                                       ec='black'))
+
+                # Calculate how many dots fit in this bin
+                dots_per_row = max(int(col_width / dot_size), 1)
+                dots_per_col = max(int(row_height / dot_size), 1)
+
+                # Adjust dot size if necessary to ensure full space is used
+                # if dots_per_row * dots_per_col < count:
+                #     dot_size = max(col_width / dots_per_row,
+                #                    row_height / dots_per_col)
+
+                # Compute the final number of dots to be placed
+                total_dots = min(count, dots_per_row * dots_per_col)
+
+                for d in range(total_dots):
+                    x_offset = (x_start + (d % dots_per_row) * dot_size +
+                                0.1)
+                    y_offset = (y_start + (d // dots_per_row) * dot_size +
+                                0.1)
+                    if (y_offset + dot_size < y_start + row_height and
+                            x_offset + dot_size < x_start + col_width):
+                        ax.add_patch(Rectangle((x_offset, y_offset),
+                                               dot_size, dot_size,
+                                               color='grey', ec='black'))
 
     # Set axis labels and limits
     ax.set_xlim(0, chart_width)
@@ -95,7 +163,81 @@ def calendar(df=None, y_column=None, x_column=None, dot_size=0.2,
     ax.set_ylabel(axis_params.get('ylabel', 'Disease'))
     ax.set_title(axis_params.get('title', 'Calendar Heatmap'))
 
+    if output != 'show':
+        return _render_output(ax.figure, output, close=own_figure)
     # If no ax adjust layout and display it.
     if ax is None:
         plt.tight_layout()
         plt.show()
+
+
+def _dot_layout(counts, col_width, row_height, dot_size):
+    """
+    Computes the position of every dot of a calendar chart as arrays.
+
+    Dots are laid out row by row from the bottom-left corner of their cell,
+    0.1 away from the cell border, and only as many as fit in a cell are
+    placed. Cells with more events than that are reported as overflowing.
+
+    Parameters
+    ----------
+    counts : np.ndarray
+        Matrix of event counts, rows are categories and columns are years.
+    col_width, row_height : float
+        The size of a cell in data units.
+    dot_size : float
+        The size of a dot in data units.
+
+    Returns
+    -------
+    tuple
+        - x and y arrays with the bottom-left corner of every dot.
+        - A boolean matrix shaped like `counts`, True for the cells whose
+          count exceeds their capacity (these get no dots).
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    # a dot fits if it ends before the cell border
+    cols = max(int(np.ceil((col_width - 0.1) / dot_size)) - 1, 0)
+    rows = max(int(np.ceil((row_height - 0.1) / dot_size)) - 1, 0)
+    overflow = counts > cols * rows
+
+    drawn = np.where(overflow, 0, counts).ravel()
+    cell = np.repeat(np.arange(drawn.size), drawn)
+    # index of each dot within its cell
+    d = np.arange(cell.size) - np.repeat(np.cumsum(drawn) - drawn, drawn)
+    cell_row, cell_col = np.divmod(cell, counts.shape[1])
+    x = cell_col * col_width + (d % max(cols, 1)) * dot_size + 0.1
+    y = cell_row * row_height + (d // max(cols, 1)) * dot_size + 0.1
+    return x, y, overflow
+
+
+def _rectangles(x, y, width, height):
+    """Vertices of axis-aligned rectangles, shape (n, 4, 2)."""
+    verts = np.empty((len(x), 4, 2))
+    verts[:, 0, 0] = verts[:, 3, 0] = x
+    verts[:, 1, 0] = verts[:, 2, 0] = x + width
+    verts[:, 0, 1] = verts[:, 1, 1] = y
+    verts[:, 2, 1] = verts[:, 3, 1] = y + height
+    return verts
+
+
+def _draw_calendar_collections(ax, counts, col_width, row_height, dot_size):
+    """
+    Draws the calendar cells and dots as one PolyCollection each, plus a
+    count label for every cell that overflows.
+    """
+    n_rows, n_cols = counts.shape
+    cell_row, cell_col = np.divmod(np.arange(n_rows * n_cols), n_cols)
+    ax.add_collection(PolyCollection(
+        _rectangles(cell_col * col_width, cell_row * row_height,
+                    col_width, row_height),
+        facecolors='white', edgecolors='black'), autolim=False)
+
+    x, y, overflow = _dot_layout(counts, col_width, row_height, dot_size)
+    ax.add_collection(PolyCollection(
+        _rectangles(x, y, dot_size, dot_size),
+        facecolors='grey', edgecolors='black'), autolim=False)
+
+    for i, j in zip(*np.nonzero(overflow)):
+        ax.text((j + 0.5) * col_width, (i + 0.5) * row_height,
+                str(counts[i, j]), ha='center', va='center')
@@ -1,9 +1,10 @@
 import numpy as np
-import matplotlib.pyplot as plt
-from .utils import FIG_SIZE
+from .instrument import _instrumented, _phase
+from .utils import FIG_SIZE, _render_output, _subplots
 
 
-def dot(values, fig_kw={}, ax_kw={}, plot_kw={}, **kwargs):
+@_instrumented('dot')
+def dot(values, fig_kw={}, ax_kw={}, plot_kw={}, output='show', **kwargs):
     """
     Creates and displays a dot plot based on the provided values.
 
@@ -13,7 +14,7 @@ def dot(values, fig_kw={}, ax_kw={}, plot_kw={}, **kwargs):
         The values to be plotted. Each unique value's occurrence count
         determines the number of dots plotted for that value.
     fig_kw : dict
-        Keyword arguments for plt.subplots() to customize the figure.
+        Keyword arguments for the Figure to customize it.
         Default is an empty dict. Example: {'figsize': (6, 4)}
     ax_kw : dict
         Keyword arguments for ax.set() to customize the Axes.
@@ -21,6 +22,10 @@ def dot(values, fig_kw={}, ax_kw={}, plot_kw={}, **kwargs):
     plot_kw : dict
         Additional keyword arguments to pass to ax.plot() for further
         customization.
+    output : str, optional
+        'show' (default) displays the chart, 'figure' returns the Figure
+        and 'png', 'svg' or 'rgba' return the rendered image without
+        touching the screen or the filesystem.
     kwargs : dict
         Additional keyword arguments for other matplotlib customizations
         that might not fit into the above categories.
@@ -35,11 +40,12 @@ def dot(values, fig_kw={}, ax_kw={}, plot_kw={}, **kwargs):
     vs, counts = np.unique(values, return_counts=True)
 
     # Default figure and axes setup
-    fig_defaults = FIG_SIZE
-    fig_defaults.update(fig_kw)  # Update with any user-provided figure kwargs
+    # Update with any user-provided figure kwargs, keeping FIG_SIZE as is
+    fig_defaults = {**FIG_SIZE, **fig_kw}
 
     # Create figure and axes
-    fig, ax = plt.subplots(**fig_defaults)
+    _phase('draw_artists')
+    fig, ax = _subplots(output=output, **fig_defaults)
 
     # Default plot properties
     plot_defaults = {'marker': 'o', 'color': 'k', 'linestyle': '', 'ms': 10}
@@ -69,4 +75,4 @@ def dot(values, fig_kw={}, ax_kw={}, plot_kw={}, **kwargs):
         elif attr == 'xaxis.tick_params':
             ax.tick_params(**value)
 
-    plt.show()
+    return _render_output(fig, output)
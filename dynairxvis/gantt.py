@@ -1,14 +1,22 @@
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
+from matplotlib.collections import PathCollection
+from matplotlib.lines import Line2D
 from matplotlib.patches import Patch
+from matplotlib.path import Path
+import numpy as np
 import pandas as pd
 
-from .utils import FIG_SIZE, get_color_palette
+from .instrument import _instrumented, _phase
+from .specs import prepare
+from .utils import FIG_SIZE, _dates_to_num, _render_output, _subplots
 
 
+@_instrumented('gantt')
 def gantt(categories, start_dates, end_dates, values=None,
           use_values_as_height=False, ax=None,
-          fig_kw={}, plot_kw={}, **kwargs):
+          fig_kw={}, plot_kw={}, output='show', cache=False, coalesce=False,
+          vectorized=False, **kwargs):
     """
     Creates and displays a Gantt chart based on the provided categories
     and date ranges.
@@ -18,9 +26,12 @@ def gantt(categories, start_dates, end_dates, values=None,
     categories : list of str
         The categories or names of the categorical list.
     start_dates : list of datetime
-        The start dates for each category.
+        The start dates for each category. A datetime64 or int64
+        (nanoseconds since the epoch) array or a timezone-aware column is
+        also accepted, and converted to Matplotlib date numbers in one
+        vectorised pass; timezone-aware dates are drawn in UTC.
     end_dates : list of datetime
-        The end dates for each category.
+        The end dates for each category, as `start_dates`.
     values : list of numeric or str, optional
         The values for each bar in the Gantt chart. If numeric, these values
         will be used to adjust the bar height dynamically or as hue for colors.
@@ -32,7 +43,29 @@ def gantt(categories, start_dates, end_dates, values=None,
     fig_kw : dict
         Keyword arguments for plt.subplots() to customize the figure.
     plot_kw : dict
-        Keyword arguments for ax.barh() to further customize the bars.
+        Keyword arguments for ax.barh() (or the collection when
+        `vectorized` is True) to further customize the bars.
+    output : str, optional
+        'show' (default) displays the chart, 'figure' returns the Figure
+        and 'png', 'svg' or 'rgba' return the rendered image without
+        touching the screen or the filesystem.
+    cache : bool, optional
+        If True, the rows, colours and legend entries are memoized on a
+        content hash of the data, values and colours, so rendering the same
+        data again, e.g. with another title or output, skips preparing
+        them. Default is False.
+    coalesce : bool or timedelta-like, optional
+        If True, the overlapping and touching intervals of a category that
+        share a colour and height are merged into one bar before drawing,
+        e.g. repeated prescriptions of the same drug. A timedelta-like
+        value such as '1D' also merges intervals at most that far apart.
+        The number of merged intervals is reported by
+        ``prepare('gantt', ..., coalesce=...)['merged']``. Default is
+        False.
+    vectorized : bool, optional
+        If True, all bars are drawn as one collection per colour instead
+        of one Rectangle per row. The picture is the same, but drawing
+        thousands of intervals stays fast. Default is False.
     **kwargs : dict
         Additional keyword arguments for customization not related to ax.barh()
         This includes 'xlabel', 'title', and any axis formatter settings.
@@ -44,130 +77,159 @@ def gantt(categories, start_dates, end_dates, values=None,
           end_dates=[datetime(2021, 1, 1), datetime(2020, 7, 1)],
           values=[2, 3, 5], use_values_as_height=True)
     """
-    # Set up default figure settings
-    default_fig_kw = FIG_SIZE
-    default_fig_kw.update(fig_kw)
-    # Use existing ax or create new figure and axis
+    spec = prepare('gantt', categories, start_dates, end_dates,
+                   values=values, use_values_as_height=use_values_as_height,
+                   colors=kwargs.get('colors', None),
+                   colors_labels=kwargs.get('colors_labels', None),
+                   coalesce=coalesce, cache=cache)
+    return _draw_gantt(spec, ax=ax, vectorized=vectorized, fig_kw=fig_kw,
+                       plot_kw=plot_kw, output=output, **kwargs)
+
+
+def _draw_gantt(spec, ax=None, fig_kw={}, plot_kw={}, output='show',
+                vectorized=False, **kwargs):
+    """
+    Draws a gantt spec (see dynairxvis.specs). The arguments are those of
+    `gantt`.
+    """
+    # Set up default figure settings, without modifying FIG_SIZE
+    default_fig_kw = {**FIG_SIZE, **fig_kw}
+    # Use existing ax or create new figure and axis; only a figure created
+    # here is closed once it has been encoded
+    own_figure = ax is None
+    _phase('draw_artists')
     if ax is None:
-        fig, ax = plt.subplots(**default_fig_kw)
+        fig, ax = _subplots(output=output, **default_fig_kw)
     SINGLE_COLOR = 'gray'
 
-    # If values is not provided, generate a color map based on the unique
-    # categories
-    if values is None:
-        unique_cats = list(set(categories))
-        single_color = plt.cm.Greys(0.8)  # Gray color
-        unique_colors = {cat: single_color for cat in unique_cats}
+    heights, colors = spec['heights'], spec['colors']
+    # The dates are converted to Matplotlib date numbers once, for all bars
+    left = _dates_to_num(spec['starts'])
+    right = _dates_to_num(spec['ends'])
+    if vectorized:
+        _draw_bar_collections(ax, spec['codes'], spec['labels'], left, right,
+                              heights, colors, plot_kw)
     else:
-        if pd.api.types.is_numeric_dtype(pd.Series(values)):
-            if use_values_as_height:
-                # Scale values for height
-                max_height = max(values)
-                min_height = min(values)
-
-                def height_scaling(x): return 0.1 + 0.3 * (x - min_height) / \
-                    (max_height - min_height) if max_height != min_height \
-                    else 0.4
-                unique_colors = {cat: SINGLE_COLOR for cat in categories}
-            else:
-                # Use values as hue for colors
-                unique_cats = list(set(values))
-                unique_colors = {
-                    val: plt.cm.Greys(0.2 + 0.6 * (
-                        val - min(values)) / (
-                            max(values) - min(values))) for val in unique_cats}
-        else:
-            unique_cats = list(set(values))
-            unique_colors = dict(zip(unique_cats,
-                                     get_color_palette(len(unique_cats))))
-
-    # Track which categories have been added to the legend
-    legend_patches = {}
-
-    # Plot each task using the provided plot kwargs
-    for i, (category, start, end) in enumerate(zip(categories, start_dates,
-                                                   end_dates)):
-        if (values is not None
-            and pd.api.types.is_numeric_dtype(pd.Series(values))
-                and use_values_as_height):
-            height = height_scaling(values[i])
-        else:
-            height = 0.8
-
-        # Determine the color based on the logic
-        if values is not None and not use_values_as_height:
-            color_key = values[i]
-        else:
-            color_key = category
-
-        # if colors are provided as kwargs, use them
-        colors_provided = kwargs.get('colors', None)
-        colors_labels = kwargs.get('colors_labels', None)
-        if colors_provided:
-            color = colors_provided[i]
-            color_label = (
-                colors_labels[i] if colors_labels is not None else color)
-            # add color to the legend
-            if color_label not in legend_patches:
-                print(color)
-                legend_patches[color_key] = Patch(facecolor=color,
-                                                  edgecolor='black',
-                                                  label=color_label)
-        else:
-            color = unique_colors.get(color_key, 'black')
-
-        ax.barh(category, end - start, left=start, height=height, color=color,
-                edgecolor='black', **plot_kw)
-
-        # Only add unique color keys to the legend
-        if values is not None and not use_values_as_height:
-            if color_key not in legend_patches:
-                legend_patches[color_key] = Patch(facecolor=color,
-                                                  edgecolor='black',
-                                                  label=color_key)
+        # Plot each task using the provided plot kwargs, on a date axis
+        ax.xaxis_date()
+        widths = right - left
+        for i, code in enumerate(spec['codes']):
+            ax.barh(spec['labels'][code], widths[i], left=left[i],
+                    height=heights[i], color=colors[i], edgecolor='black',
+                    **plot_kw)
 
     # Set the x-axis to use a date format, if not overridden by kwargs
     if not kwargs.get('suppress_date_format'):
-        ax.xaxis_date()
+        if vectorized:
+            # The collections hold date numbers already. Registering a date
+            # converter would make Matplotlib convert every bar at draw time,
+            # so only the locator and formatter are set.
+            ax.xaxis.set_major_locator(mdates.AutoDateLocator())
+        else:
+            ax.xaxis_date()
         myFmt = kwargs.get('date_formatter', mdates.DateFormatter('%Y'))
         ax.xaxis.set_major_formatter(myFmt)
 
     # Set x-axis limits if not provided in kwargs
-    if not kwargs.get('xlim'):
-        ax.set_xlim(
-            [min(start_dates) - (max(end_dates) - min(start_dates)) / 10,
-             max(end_dates) + (max(end_dates) - min(start_dates)) / 10])
+    if not kwargs.get('xlim') and len(left):
+        min_date, max_date = left.min(), right.max()
+        ax.set_xlim([min_date - (max_date - min_date) / 10,
+                     max_date + (max_date - min_date) / 10])
 
     # Add labels, and title using kwargs
-    plt.xlabel(kwargs.get('xlabel', 'Time'))
-    plt.title(kwargs.get('title', 'Gantt Chart'))
-
-    # Add legend if values are provided and used as height
-    if values is not None:
-        if use_values_as_height:
-            height_values = [height for height in sorted(set(values))]
-            height_labels = [f'{v:.2f}' for v in height_values]
-            # Create custom legend elements with varying linewidths to
-            # represent heights
-            legend_handles = [
-                plt.Line2D([0], [0], color=SINGLE_COLOR,
-                           lw=height_scaling(val) * 20, label=label)
-                for val, label in zip(height_values, height_labels)
-            ]
-
-            # Add the custom lines to the legend
-            plt.legend(handles=legend_handles, title='Bar Heights', loc='best')
+    ax.set_xlabel(kwargs.get('xlabel', 'Time'))
+    ax.set_title(kwargs.get('title', 'Gantt Chart'))
+
+    # Add the legend: bar heights, values or the provided colors
+    _phase('legend')
+    legend = spec['legend']
+    if legend == 'heights':
+        # Custom legend lines with varying linewidths to represent heights
+        legend_handles = [
+            Line2D([0], [0], color=SINGLE_COLOR, lw=width, label=label)
+            for label, width in zip(spec['legend_labels'],
+                                    spec['legend_widths'])
+        ]
+        ax.legend(handles=legend_handles, title='Bar Heights', loc='best')
+    elif legend is not None:
+        legend_patches = [Patch(facecolor=color, edgecolor='black',
+                                label=label)
+                          for label, color in zip(spec['legend_labels'],
+                                                  spec['legend_colors'])]
+        if legend == 'values':
+            ax.legend(handles=legend_patches, title='Values')
         else:
-            plt.legend(handles=list(legend_patches.values()), title='Values')
-
-    if colors_provided:
-        # Add the custom colors to the legend
-        legend_patches = dict(sorted(legend_patches.items()))
-        plt.legend(handles=legend_patches.values(),
-                   title=kwargs.get('legend_title', 'Colors'),
-                   loc=kwargs.get('loc', 'best'))
+            ax.legend(handles=legend_patches,
+                      title=kwargs.get('legend_title', 'Colors'),
+                      loc=kwargs.get('loc', 'best'))
 
+    if output != 'show':
+        return _render_output(ax.figure, output, close=own_figure)
     # If no ax provided, show the plot
     if ax is None:
         plt.tight_layout()
         plt.show()
+
+
+def _draw_bar_collections(ax, codes, labels, left, right, heights, colors,
+                          plot_kw):
+    """
+    Draws Gantt bars as one PathCollection per distinct colour.
+
+    All bars of a colour are packed into a single compound path, so the
+    number of artists (and Path objects) does not grow with the number of
+    intervals. Categories are placed on the y-axis in order of first
+    appearance, which matches what repeated ax.barh() calls with string
+    categories produce.
+
+    Parameters
+    ----------
+    ax : matplotlib.axes.Axes
+        The axis to draw on.
+    codes : np.ndarray
+        The row of each bar, an index into `labels`.
+    labels : list of str
+        The categories, in order of first appearance.
+    left, right : np.ndarray
+        The start and end of each bar as Matplotlib date numbers.
+    heights : np.ndarray
+        The height of each bar.
+    colors : np.ndarray
+        RGBA color of each bar, shape (n, 4).
+    plot_kw : dict
+        Keyword arguments for the PathCollection.
+    """
+    bottom = codes - heights / 2
+    top = codes + heights / 2
+
+    # One closed rectangle (5 vertices) per bar
+    verts = np.empty((len(codes), 5, 2))
+    verts[:, 0, 0] = verts[:, 3, 0] = verts[:, 4, 0] = left
+    verts[:, 1, 0] = verts[:, 2, 0] = right
+    verts[:, 0, 1] = verts[:, 1, 1] = verts[:, 4, 1] = bottom
+    verts[:, 2, 1] = verts[:, 3, 1] = top
+    rect_codes = np.array([Path.MOVETO, Path.LINETO, Path.LINETO,
+                           Path.LINETO, Path.CLOSEPOLY], dtype=Path.code_type)
+
+    # Group bars by colour with a single sort rather than a mask per colour.
+    # Colours are packed into one integer each so the grouping is a 1-D
+    # factorize instead of a row-wise unique over the RGBA array.
+    packed = (np.round(np.asarray(colors) * 255).astype(np.uint32) <<
+              np.array([24, 16, 8, 0], dtype=np.uint32)).sum(axis=1)
+    group, unique_packed = pd.factorize(packed)
+    order = np.argsort(group, kind='stable')
+    bounds = np.cumsum(np.bincount(group, minlength=len(unique_packed)))
+    collection_kw = {'edgecolors': 'black'}
+    collection_kw.update(plot_kw)
+    for rows in np.split(order, bounds[:-1]):
+        path = Path(verts[rows].reshape(-1, 2), np.tile(rect_codes, len(rows)))
+        ax.add_collection(PathCollection([path], facecolors=[colors[rows[0]]],
+                                         **collection_kw), autolim=False)
+
+    # Data limits are known from the arrays, no need to measure the paths
+    if len(codes):
+        ax.update_datalim([(left.min(), bottom.min()),
+                           (right.max(), top.max())])
+    ax.set_yticks(np.arange(len(labels)))
+    ax.set_yticklabels(labels)
+    ax.autoscale_view()
@@ -1,12 +1,17 @@
 from .time import grouped_chart
-from collections import defaultdict
 import numpy as np
-import pandas as pd
 import matplotlib.pyplot as plt
 from matplotlib.cm import ScalarMappable
 from matplotlib.colors import Normalize
+from matplotlib.patches import Rectangle
+from matplotlib.ticker import MaxNLocator
+from matplotlib import colormaps
 import colorsys
 
+from .instrument import _instrumented, _phase
+from .specs import prepare
+from .utils import _render_output, _subplots
+
 xfs = 11
 yfs = 11
 chart_h = 6
@@ -15,21 +20,24 @@ dpi = 100
 
 
 def add_colorbar(ax, cmap, vmin, vmax, label="Event Count",
-                 font_size=xfs):
+                 font_size=xfs, ticks=None):
     """
     Adds a color legend (colorbars) to a heatmap
     Panametens :
     etc
+    ticks: the colorbar ticks or a Locator. Default is None, one tick per
+    integer from vmin to vmax.
     """
     # mappable object for cbar
     norm = Normalize(vmin=vmin, vmax=vmax)
     sm = ScalarMappable(cmap=cmap, norm=norm)
     sm.set_array([])  # density hence
 
-    cbar = plt.colorbar(sm, ax=ax, orientation='horizontal',
-                        location='top',
-                        ticks=range(vmin, vmax + 1),
-                        fraction=0.05, pad=0.02)
+    cbar = ax.figure.colorbar(sm, ax=ax, orientation='horizontal',
+                              location='top',
+                              ticks=(range(vmin, vmax + 1) if ticks is None
+                                     else ticks),
+                              fraction=0.05, pad=0.02)
     cbar.ax.tick_params(labelsize=font_size)
     cbar.set_label(label, fontsize=font_size)
 
@@ -40,16 +48,21 @@ def color_contrast(rgba, thresh=0.5):
     return 'black' if lightness > thresh else 'white'
 
 
-def heatmap(adf, date_col='obsdate', y_col='Disease',
-            fig_kw={}, **kwargs):
+@_instrumented('heatmap')
+def heatmap(adf, date_col='obsdate', y_col='Disease', fig_kw={},
+            output='show', cache=False, ax=None, vectorized=False,
+            **kwargs):
     """
     Creates a heatmap of disease counts over years. It also takes
     additional parameters to customize the appearance of the heatmap.
 
     Parameters
     ----------
-    adf : pd.DataFrame
-        DataFrame containing the data to be visualized.
+    adf : pd.DataFrame or iterable of pd.DataFrame
+        DataFrame containing the data to be visualized, or an iterable of
+        DataFrame chunks, e.g. ``pd.read_csv(path, chunksize=100_000,
+        parse_dates=[date_col])``. Chunks are counted one at a time, so
+        only a chunk and the category x year counts are held in memory.
     date_col : str
         The name of the column containing date information.
     y_col : str
@@ -57,6 +70,22 @@ def heatmap(adf, date_col='obsdate', y_col='Disease',
     fig_kw : dict
         Additional keyword arguments for customizing the figure size and 
         layout.
+    output : str, optional
+        'show' (default) displays the chart, 'figure' returns the Figure
+        and 'png', 'svg' or 'rgba' return the rendered image without
+        touching the screen or the filesystem.
+    cache : bool, optional
+        If True, the count matrix is memoized on a content hash of the
+        `date_col` and `y_col` columns, so redrawing the same events skips
+        the counting. Default is False.
+    ax : matplotlib.axes.Axes, optional
+        Axes object to plot on. If None, creates a new figure and axis.
+    vectorized : bool, optional
+        If True, the count matrix is drawn as a single pcolormesh, counts
+        are only written into cells large enough to read them and tick
+        labels are thinned to those that fit. Render time and memory then
+        stay flat as the matrix grows. Default is False, which draws one
+        Rectangle and one text per cell.
     **kwargs : dict
         Additional keyword arguments for customizing the heatmap, such as:
         - 'font_size': Font size for the x and y axis labels.
@@ -75,67 +104,144 @@ def heatmap(adf, date_col='obsdate', y_col='Disease',
             fig_kw={'figsize': (12, 6)},
             font_size=12, title='Disease Heatmap')
     """
-    assert isinstance(adf, pd.DataFrame)
-    adf['year'] = adf[date_col].dt.year
-    min_year, max_year = adf['year'].min(), adf['year'].max()
-    year_bins = range(min_year, max_year + 1)
-
-    data = (
-        adf.groupby([y_col, 'year'], sort=False)
-        .size()
-        .unstack(fill_value=0)
-        .reindex(columns=year_bins, fill_value=0)
-    )
+    spec = prepare('heatmap', adf, date_col=date_col, y_col=y_col,
+                   cache=cache)
+    return _draw_heatmap(spec, ax=ax, vectorized=vectorized, fig_kw=fig_kw,
+                         output=output, **kwargs)
+
+
+def _draw_heatmap(spec, ax=None, fig_kw={}, output='show', vectorized=False,
+                  **kwargs):
+    """
+    Draws a heatmap spec (see dynairxvis.specs). The arguments are those
+    of `heatmap`.
+    """
+    _phase('draw_artists')
     default_figsize = {'figsize': (chart_w, chart_h)}
     default_figsize.update(fig_kw)
-    fig, ax = plt.subplots(**default_figsize)
+    # Use existing ax or create new figure and axis; only a figure created
+    # here is laid out, and closed once it has been encoded
+    own_figure = ax is None
+    if ax is None:
+        fig, ax = _subplots(output=output, **default_figsize)
+    fig = ax.figure
     # fonts
     x_fs = kwargs.get("font_size", xfs)
     y_fs = kwargs.get("font_size", yfs)
 
-    diseases = data.index
-    years = data.columns
-
-    for i, disease, in enumerate(diseases):
-        for j, year in enumerate(years):
-            count = data.at[disease, year]
-            color = plt.cm.Greys(count/data.values.max())
-            ax.add_patch(
-                plt.Rectangle(
-                    (j, i), 1, 1,
-                    color=color,
-                    ec='black'
-                )
-            )
-            if count > 0:
-                ax.text(
-                    j + 0.5, 1 + 0.5, str(count),
-                    ha='center', va='center', fontsize=x_fs,
-                    color=color_contrast(color)
+    diseases = spec['rows']
+    years = spec['columns']
+    counts = spec['counts']
+    max_count = counts.max()
+
+    if vectorized:
+        _draw_count_mesh(ax, counts, max_count, x_fs)
+    else:
+        for i in range(len(diseases)):
+            for j in range(len(years)):
+                count = counts[i, j]
+                color = colormaps['Greys'](count/max_count)
+                ax.add_patch(
+                    Rectangle(
+                        (j, i), 1, 1,
+                        color=color,
+                        ec='black'
+                    )
                 )
-                # add a scatter marker?
-                # ax. scatter(j + 0.5, i + 0.5,
-                #   color='black', s=10, alpha=0.2)
+                if count > 0:
+                    ax.text(
+                        j + 0.5, i + 0.5, str(count),
+                        ha='center', va='center', fontsize=x_fs,
+                        color=color_contrast(color)
+                    )
+                    # add a scatter marker?
+                    # ax. scatter(j + 0.5, i + 0.5,
+                    #   color='black', s=10, alpha=0.2)
 
+    # Every tick label, or (vectorized) only as many as fit on screen
+    x_step = _tick_step(ax, len(years), x_fs, 'x') if vectorized else 1
+    y_step = _tick_step(ax, len(diseases), y_fs, 'y') if vectorized else 1
     # ax tick font sizes
-    ax.set_xticks(np.arange(len(years)) + 0.5)
-    ax.set_xticklabels(years, rotation=45, fontsize=x_fs)
-    ax.set_yticks(np.arange(len(diseases)) + 0.5)
-    ax.set_yticklabels(diseases, fontsize=y_fs)
+    ax.set_xticks(np.arange(0, len(years), x_step) + 0.5)
+    ax.set_xticklabels(years[::x_step], rotation=45, fontsize=x_fs)
+    ax.set_yticks(np.arange(0, len(diseases), y_step) + 0.5)
+    ax.set_yticklabels(diseases[::y_step], fontsize=y_fs)
     ax.set_xlim(0, len(years))
     ax.set_ylim(0, len(diseases))
     # ax.set_ylabel('Diseases')
     ax.grid(False)
 
-    add_colorbar(ax, plt.cm.Greys, vmin=0, vmax=data.values.max(),
-                 font_size=x_fs)
-    plt.tight_layout()
-    plt.title(kwargs.get('title', 'Heatmap'), fontsize=x_fs+1)
-    plt.show()
+    _phase('legend')
+    # a few integer ticks rather than one per count, which would make
+    # the layout and encoding grow with the number of events
+    add_colorbar(ax, colormaps['Greys'], vmin=0, vmax=max_count,
+                 font_size=x_fs,
+                 ticks=MaxNLocator(integer=True) if vectorized else None)
+    _phase('layout')
+    if own_figure:
+        fig.tight_layout()
+    _phase('draw_artists')
+    ax.set_title(kwargs.get('title', 'Heatmap'), fontsize=x_fs+1)
+    return _render_output(fig, output, close=own_figure)
+
+
+def _tick_step(ax, n_ticks, font_size, axis):
+    """
+    Returns the step that thins `n_ticks` tick labels down to the number
+    that fit along the x or y `axis` of `ax` without overlapping.
+    """
+    bbox = ax.get_window_extent()
+    available = bbox.width if axis == 'x' else bbox.height
+    label_px = 1.5 * font_size * ax.figure.dpi / 72
+    max_labels = max(int(available // label_px), 1)
+    return max(int(np.ceil(n_ticks / max_labels)), 1)
 
 
+def _draw_count_mesh(ax, counts, max_count, font_size):
+    """
+    Draws a count matrix as one QuadMesh with cell edges, annotating the
+    non-zero cells only when a cell is big enough on screen for its label.
+
+    Parameters
+    ----------
+    ax : matplotlib.axes.Axes
+        The axis to draw on; cell (i, j) spans [j, j+1] x [i, i+1].
+    counts : np.ndarray
+        2-D matrix of counts (rows are categories, columns are years).
+    max_count : int
+        The largest count, used to normalise the colormap.
+    font_size : int
+        Font size of the annotations.
+    """
+    n_rows, n_cols = counts.shape
+    ax.pcolormesh(np.arange(n_cols + 1), np.arange(n_rows + 1), counts,
+                  cmap='Greys', vmin=0, vmax=max(max_count, 1),
+                  edgecolors='black', linewidth=0.5)
+
+    # All cells share one size, so they are either all readable or none is
+    bbox = ax.get_window_extent()
+    px_per_pt = ax.figure.dpi / 72
+    label_w = 0.6 * font_size * px_per_pt * len(str(max_count))
+    label_h = 1.2 * font_size * px_per_pt
+    if bbox.width / n_cols < label_w or bbox.height / n_rows < label_h:
+        return
+
+    rows, cols = np.nonzero(counts)
+    cell_counts = counts[rows, cols]
+    # Text color per distinct count rather than per cell
+    levels, level_idx = np.unique(cell_counts, return_inverse=True)
+    text_colors = [color_contrast(colormaps['Greys'](v / max_count))
+                   for v in levels]
+    for i, j, count, k in zip(rows, cols, cell_counts, level_idx.ravel()):
+        ax.text(j + 0.5, i + 0.5, str(count), ha='center', va='center',
+                fontsize=font_size, color=text_colors[k])
+
+
+@_instrumented('heatmap_nq')
 def heatmap_nq(categories, values=None, start_dates=None, end_dates=None,
-               ax=None, mode='heatmap', fig_kw={}, cmap='Greys', **kwargs):
+               ax=None, mode='heatmap', fig_kw={}, cmap='Greys',
+               output='show', cache=False, bins=None, quantiles=None,
+               **kwargs):
     """
     Creates and displays a heatmap for given categories
     and associated values or time intervals.
@@ -157,6 +263,20 @@ def heatmap_nq(categories, values=None, start_dates=None, end_dates=None,
         Keyword arguments for plt.subplots() to customize the figure.
     cmap : str or Colormap, optional
         The colormap to use for the heatmap.
+    output : str, optional
+        'show' (default) displays the chart, 'figure' returns the Figure
+        and 'png', 'svg' or 'rgba' return the rendered image without
+        touching the screen or the filesystem.
+    cache : bool, optional
+        If True, the count matrix is memoized on a content hash of the
+        categories, values and bins. Default is False.
+    bins : int or sequence of scalars, optional
+        ('heatmap' mode) Bin quantitative values into this many equal-width
+        bins, or into the given bin edges, instead of one column per
+        distinct value.
+    quantiles : int, optional
+        ('heatmap' mode) Bin quantitative values into this many quantile
+        bins. Ignored if `bins` is given.
     **kwargs : dict
         Additional keyword arguments for customization such as 'xlabel',
         'ylabel', 'title', and 'colorbar'.
@@ -166,6 +286,7 @@ def heatmap_nq(categories, values=None, start_dates=None, end_dates=None,
     >>> categories = ['Category 1', 'Category 2', 'Category 3']
     >>> values = [1, 2, 3]
     >>> heatmap(categories, values=values, mode='heatmap')
+    >>> heatmap_nq(categories * 100, values=np.random.rand(300), bins=10)
     >>> start_dates = [datetime(2020, 1, 1), datetime(2020, 6, 1),
         datetime(2020, 8, 1)]
     >>> end_dates = [datetime(2020, 3, 1), datetime(2020, 9, 1),
@@ -182,42 +303,34 @@ def heatmap_nq(categories, values=None, start_dates=None, end_dates=None,
             "Start and end dates must be provided for 'gantt' mode.")
     if mode == 'gantt':
         return grouped_chart(categories, start_dates, end_dates,
-                             chart_type='heatmap', fig_kw=fig_kw, **kwargs)
-
-    # Improved flattening function that checks type of each item
-    def flatten(values):
-        flattened_values = []
-        for item in values:
-            if isinstance(item, list):
-                flattened_values.extend(item)
-            else:
-                flattened_values.append(item)
-        return flattened_values
-
-    # Aggregate values by category
-    category_values = defaultdict(list)
-    for cat, val in zip(categories, values):
-        if isinstance(val, list):
-            category_values[cat].extend(val)
-        else:
-            category_values[cat].append(val)
+                             chart_type='heatmap', fig_kw=fig_kw,
+                             output=output, cache=cache, **kwargs)
 
-    unique_categories = sorted(category_values.keys())
-    unique_values = sorted(set(flatten(values)))
-    heatmap_matrix = np.zeros((len(unique_categories), len(unique_values)))
+    spec = prepare('heatmap_nq', categories, values, bins=bins,
+                   quantiles=quantiles, cache=cache)
+    return _draw_heatmap_nq(spec, ax=ax, fig_kw=fig_kw, cmap=cmap,
+                            output=output, **kwargs)
 
-    # Fill the heatmap matrix
-    for i, cat in enumerate(unique_categories):
-        for val in category_values[cat]:
-            value_index = unique_values.index(val)
-            heatmap_matrix[i, value_index] += 1  # Increment for occurrences
+
+def _draw_heatmap_nq(spec, ax=None, fig_kw={}, cmap='Greys', output='show',
+                     **kwargs):
+    """
+    Draws a heatmap_nq spec (see dynairxvis.specs). The arguments are
+    those of `heatmap_nq`.
+    """
+    unique_categories = spec['rows']
+    unique_values = spec['columns']
+    heatmap_matrix = spec['counts']
 
     # Set default figure properties
+    _phase('draw_artists')
     default_fig_kw = {'figsize': (5, len(unique_categories))}
     default_fig_kw.update(fig_kw)
-    # Use existing ax or create new figure and axis
+    # Use existing ax or create new figure and axis; only a figure created
+    # here is closed once it has been encoded
+    own_figure = ax is None
     if ax is None:
-        fig, ax = plt.subplots(**default_fig_kw)
+        fig, ax = _subplots(output=output, **default_fig_kw)
 
     # Create the heatmap
     cax = ax.matshow(heatmap_matrix, cmap=cmap, aspect='auto')
@@ -238,12 +351,15 @@ def heatmap_nq(categories, values=None, start_dates=None, end_dates=None,
     ax.set_title(kwargs.get('title', 'Heatmap'))
 
     # Colorbar settings if needed
+    _phase('legend')
     if kwargs.get('colorbar', False):
         if ax is None:
             fig.colorbar(cax, ax=ax, **kwargs.get('colorbar_kw', {}))
         else:
             ax.figure.colorbar(cax, ax=ax, **kwargs.get('colorbar_kw', {}))
 
+    if output != 'show':
+        return _render_output(ax.figure, output, close=own_figure)
     # Additional plot adjustments
     if ax is None:
         plt.tight_layout()
@@ -1,9 +1,11 @@
-import matplotlib.pyplot as plt
-from .utils import FIG_SIZE, _resolve_orientation
+from .instrument import _instrumented, _phase
+from .utils import (FIG_SIZE, _resolve_orientation, _render_output,
+                    _subplots)
 
 
+@_instrumented('histogram')
 def histogram(values, bins=None, orientation='vertical',
-              fig_kw={}, plot_kw={}, **kwargs):
+              fig_kw={}, plot_kw={}, output='show', **kwargs):
     """
     Creates and displays a histogram based on the provided values.
 
@@ -16,13 +18,17 @@ def histogram(values, bins=None, orientation='vertical',
     orientation : str, optional
         The orientation of the histogram ('vertical' or 'horizontal').
     fig_kw : dict
-        Keyword arguments for plt.figure() to customize the figure.
+        Keyword arguments for the Figure to customize it.
         Uses {'figsize': (6, 4)} as default.
     plot_kw : dict
-        Keyword arguments for plt.hist() for further customization.
+        Keyword arguments for ax.hist() for further customization.
+    output : str, optional
+        'show' (default) displays the chart, 'figure' returns the Figure
+        and 'png', 'svg' or 'rgba' return the rendered image without
+        touching the screen or the filesystem.
     **kwargs : dict
         Additional keyword arguments for customization
-        not related to plt.hist().
+        not related to ax.hist().
 
     Example
     -------
@@ -37,32 +43,33 @@ def histogram(values, bins=None, orientation='vertical',
     default_fig_kw.update(fig_kw)  # Merge user-provided fig_kw
 
     # Setup figure
-    plt.figure(**default_fig_kw)
+    _phase('draw_artists')
+    fig, ax = _subplots(output=output, **default_fig_kw)
 
     # Set default plot properties
     plot_defaults = {'edgecolor': 'black', 'color': 'gray'}
     plot_defaults.update(plot_kw)  # Merge user-provided plot_kw
 
     # Plot the histogram
-    plt.hist(values, bins=bins, orientation=orientation, **plot_defaults)
+    ax.hist(values, bins=bins, orientation=orientation, **plot_defaults)
 
     # Dynamically adjust labels based on orientation
     if orientation == 'horizontal':
-        plt.xlabel(kwargs.get('xlabel', 'Frequency'))  # xlabel gets 'ylabel'
-        plt.ylabel(kwargs.get('ylabel', 'Value'))      # ylabel gets 'xlabel'
+        ax.set_xlabel(kwargs.get('xlabel', 'Frequency'))  # gets 'ylabel'
+        ax.set_ylabel(kwargs.get('ylabel', 'Value'))      # gets 'xlabel'
     else:
-        plt.xlabel(kwargs.get('xlabel', 'Value'))
-        plt.ylabel(kwargs.get('ylabel', 'Frequency'))
+        ax.set_xlabel(kwargs.get('xlabel', 'Value'))
+        ax.set_ylabel(kwargs.get('ylabel', 'Frequency'))
 
     # Title setup if provided
-    plt.title(kwargs.get('title', 'Histogram of Values'))
+    ax.set_title(kwargs.get('title', 'Histogram of Values'))
 
     # Adjust tick marks if specified in kwargs
     if 'xticks' in kwargs and 'xticklabels' in kwargs:
         if orientation == 'horizontal':
-            plt.yticks(kwargs['xticks'], kwargs['xticklabels'])
+            ax.set_yticks(kwargs['xticks'], kwargs['xticklabels'])
         else:
-            plt.xticks(kwargs['xticks'], kwargs['xticklabels'])
+            ax.set_xticks(kwargs['xticks'], kwargs['xticklabels'])
 
     # Show the figure
-    plt.show()
+    return _render_output(fig, output)
@@ -0,0 +1,150 @@
+"""
+Opt-in timing of the phases of chart rendering.
+
+Every public chart function and `plot_charts` report, when at least one
+listener is registered, a record of where their time went::
+
+    {'chart': 'gantt', 'rows': 1000, 'seconds': 0.31, 'depth': 0,
+     'spans': {'prepare': 0.01, 'draw_artists': 0.22, 'legend': 0.03,
+               'layout': 0.0, 'encode': 0.05, 'write': 0.0}}
+
+The spans are 'prepare' (data grouping and conversion), 'draw_artists'
+(figure and artist creation), 'legend' (legends and colorbars), 'layout'
+(tight_layout), 'encode' (PNG/SVG/RGBA output) and 'write' (the text
+output of `table_list`). A chart called by
+another one (e.g. `bar` calls `scatter`) gets its own record with a
+larger 'depth'; its time is not counted again in the caller's spans.
+
+With no listener registered the chart functions only pay for an empty
+list check.
+
+Example
+-------
+>>> with record_spans() as records:
+...     gantt(categories, start_dates, end_dates, output='png')
+>>> records[0]['spans']
+"""
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+SPANS = ['prepare', 'draw_artists', 'legend', 'layout', 'encode', 'write']
+_listeners = []
+_local = threading.local()
+
+
+def add_span_listener(callback):
+    """
+    Registers `callback`, called with the record of every chart rendered
+    from now on, in any thread.
+    """
+    global _listeners
+    # Replaced rather than mutated, so a render iterating it is not affected
+    _listeners = _listeners + [callback]
+
+
+def remove_span_listener(callback):
+    """
+    Unregisters a callback added with `add_span_listener`.
+    """
+    global _listeners
+    _listeners = [listener for listener in _listeners
+                  if listener != callback]
+
+
+@contextmanager
+def record_spans():
+    """
+    Collects the records of the charts rendered inside the block.
+
+    Yields
+    ------
+    list of dict
+        Filled with one record per chart call, in the order the calls
+        finish (inner charts before the charts that called them).
+    """
+    records = []
+    add_span_listener(records.append)
+    try:
+        yield records
+    finally:
+        remove_span_listener(records.append)
+
+
+class _Frame:
+    """
+    Phase clock of one chart call: time is attributed to the current
+    phase until the next phase starts.
+    """
+
+    def __init__(self, chart, rows, depth):
+        self.chart = chart
+        self.rows = rows
+        self.depth = depth
+        self.spans = dict.fromkeys(SPANS, 0.0)
+        self.phase = 'prepare'
+        self.started = self.phase_started = time.perf_counter()
+
+    def switch(self, phase, now=None):
+        now = time.perf_counter() if now is None else now
+        if self.phase is not None:
+            self.spans[self.phase] += now - self.phase_started
+        self.phase = phase
+        self.phase_started = now
+
+
+def _phase(name):
+    """
+    Attributes the time from now on to span `name` of the running chart.
+    """
+    if _listeners:
+        stack = getattr(_local, 'stack', None)
+        if stack:
+            stack[-1].switch(name)
+
+
+def _input_size(args, kwargs):
+    # The first argument is the data (categories, values or a DataFrame)
+    data = args[0] if args else next(iter(kwargs.values()), None)
+    try:
+        return len(data)
+    except TypeError:
+        return None
+
+
+def _instrumented(chart):
+    """
+    Decorator that reports the spans of a chart function to the listeners.
+    """
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _listeners:
+                return func(*args, **kwargs)
+            stack = getattr(_local, 'stack', None)
+            if stack is None:
+                stack = _local.stack = []
+            now = time.perf_counter()
+            caller_phase = stack[-1].phase if stack else None
+            if stack:
+                # pause the caller while this chart runs
+                stack[-1].switch(None, now)
+            frame = _Frame(chart, _input_size(args, kwargs), len(stack))
+            stack.append(frame)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                now = time.perf_counter()
+                frame.switch(None, now)
+                stack.pop()
+                if stack:
+                    # the caller resumes in the phase it was in
+                    stack[-1].switch(caller_phase, now)
+                record = {'chart': chart, 'rows': frame.rows,
+                          'seconds': now - frame.started,
+                          'depth': frame.depth, 'spans': frame.spans}
+                for listener in _listeners:
+                    listener(record)
+        return wrapper
+    return decorate
@@ -0,0 +1,198 @@
+"""
+Vectorised helpers for time intervals (start/end date pairs).
+
+Only NumPy and pandas are used here, so interval data can be prepared
+without importing Matplotlib.
+"""
+import numpy as np
+import pandas as pd
+
+TIME_BIN_FREQS = ['D', 'W', 'M', 'Y']
+
+
+def to_datetime64(dates):
+    """
+    Convert datetime-like values to a naive ``datetime64[ns]`` array.
+
+    Parameters
+    ----------
+    dates : list of datetime, np.ndarray, pd.Series or pd.Index
+        The dates to convert: datetimes, datetime64 values of any unit, or
+        int64 nanoseconds since the epoch. Timezone-aware values are
+        converted to UTC.
+
+    Returns
+    -------
+    np.ndarray
+        ``datetime64[ns]`` array, one element per input value. A
+        ``datetime64[ns]`` array is returned as it is, without a copy.
+    """
+    if isinstance(dates, np.ndarray) and dates.dtype.kind == 'M':
+        return dates.astype('datetime64[ns]', copy=False)
+    dates = pd.Series(dates)
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates)
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_convert('UTC').dt.tz_localize(None)
+    return dates.to_numpy(dtype='datetime64[ns]')
+
+
+def time_bin_edges(min_date, max_date, freq='M'):
+    """
+    Calendar-aligned bin edges covering ``[min_date, max_date]``.
+
+    Parameters
+    ----------
+    min_date, max_date : datetime-like
+        The first and last date that must fall inside the bins.
+    freq : str, optional
+        'D' for days, 'W' for ISO weeks (starting on Monday), 'M' for
+        calendar months and 'Y' for calendar years. Default is 'M'.
+
+    Returns
+    -------
+    np.ndarray
+        ``datetime64[ns]`` edges; bin ``i`` covers ``[edges[i], edges[i+1])``.
+
+    Raises
+    ------
+    ValueError
+        If `freq` is not one of 'D', 'W', 'M' or 'Y'.
+    """
+    if freq not in TIME_BIN_FREQS:
+        raise ValueError(f"Invalid freq '{freq}'. "
+                         f"Choose from {', '.join(TIME_BIN_FREQS)}.")
+    lo, hi = to_datetime64([min_date, max_date])
+    if freq == 'W':
+        first = lo.astype('datetime64[D]')
+        # 1970-01-01 was a Thursday, so Monday-based weekday is (days + 3) % 7
+        first = first - (first.astype(np.int64) + 3) % 7
+        n_weeks = (hi.astype('datetime64[D]') - first).astype(np.int64) // 7
+        edges = first + 7 * np.arange(n_weeks + 2)
+    else:
+        unit = f'datetime64[{freq}]'
+        edges = np.arange(lo.astype(unit), hi.astype(unit) + 2)
+    return edges.astype('datetime64[ns]')
+
+
+def interval_bin_counts(codes, n_categories, start_dates, end_dates, edges,
+                        count='presence'):
+    """
+    Fills a category x bin matrix from time intervals with a sweep.
+
+    Each interval adds +1 at its first bin and -1 after its last bin in a
+    difference array; a cumulative sum along the bins then gives, for every
+    bin, the number of intervals of each category overlapping it. The cost
+    is O(n log b + k * b) instead of a Python loop over the intervals.
+
+    Parameters
+    ----------
+    codes : np.ndarray of int
+        Category index of each interval, in ``range(n_categories)``.
+    n_categories : int
+        Number of rows of the result.
+    start_dates, end_dates : array-like of datetime
+        Start and end date of each interval.
+    edges : array-like of datetime
+        Sorted bin edges; bin ``i`` covers ``[edges[i], edges[i+1])``.
+    count : str, optional
+        'presence' for a 0/1 matrix (default) or 'overlap' for the number
+        of intervals overlapping each bin.
+
+    Returns
+    -------
+    np.ndarray
+        Integer matrix of shape ``(n_categories, len(edges) - 1)``.
+
+    Raises
+    ------
+    ValueError
+        If `count` is not 'presence' or 'overlap'.
+    """
+    if count not in ['presence', 'overlap']:
+        raise ValueError(
+            f"Invalid count '{count}'. Use 'presence' or 'overlap'.")
+    edges = to_datetime64(edges).astype(np.int64)
+    starts = to_datetime64(start_dates).astype(np.int64)
+    ends = to_datetime64(end_dates).astype(np.int64)
+
+    n_bins = len(edges) - 1
+    codes = np.asarray(codes, dtype=np.int64)
+    first = np.clip(np.searchsorted(edges, starts, side='right') - 1,
+                    0, n_bins - 1)
+    # an interval ending exactly on an edge does not reach the next bin
+    last = np.clip(np.searchsorted(edges, ends, side='left') - 1,
+                   first, n_bins - 1)
+
+    # Difference array with one spare column for the -1 after the last bin
+    width = n_bins + 1
+    diff = np.bincount(codes * width + first, minlength=n_categories * width)
+    diff = diff - np.bincount(codes * width + last + 1,
+                              minlength=n_categories * width)
+    counts = np.cumsum(diff.reshape(n_categories, width), axis=1)[:, :n_bins]
+    if count == 'presence':
+        counts = (counts > 0).astype(np.int64)
+    return counts
+
+
+def coalesce_intervals(codes, start_dates, end_dates, gap=0):
+    """
+    Merges the overlapping or adjacent intervals of each category.
+
+    The intervals are sorted by category and start in O(n log n); one scan
+    then compares every start with the latest end seen so far in its
+    category, and a new merged interval begins wherever the two are more
+    than `gap` apart.
+
+    Parameters
+    ----------
+    codes : array-like of int
+        Category index of each interval. Only intervals with the same code
+        are merged.
+    start_dates, end_dates : array-like of datetime
+        Start and end date of each interval.
+    gap : timedelta-like, optional
+        Largest gap between an end and the next start that is still
+        merged, e.g. '1D' for back-to-back daily records. Default is 0,
+        which merges overlapping and touching intervals only.
+
+    Returns
+    -------
+    tuple
+        - The position in the input of the first record of each merged
+          interval, in input order, to pick its category and values.
+        - The ``datetime64[ns]`` starts of the merged intervals.
+        - The ``datetime64[ns]`` ends of the merged intervals.
+        - The number of input intervals merged away.
+
+    Example
+    -------
+    >>> index, starts, ends, n_merged = coalesce_intervals(
+    ...     [0, 0, 1], ['2020-01-01', '2020-01-15', '2020-01-01'],
+    ...     ['2020-02-01', '2020-03-01', '2020-02-01'])
+    >>> index, n_merged
+    (array([0, 2]), 1)
+    """
+    codes = np.asarray(codes, dtype=np.int64)
+    starts = to_datetime64(start_dates).astype(np.int64)
+    ends = to_datetime64(end_dates).astype(np.int64)
+    gap = pd.Timedelta(gap).value
+    n = len(codes)
+    if n == 0:
+        return (np.arange(0), starts.astype('datetime64[ns]'),
+                ends.astype('datetime64[ns]'), 0)
+
+    order = np.lexsort((starts, codes))
+    codes, starts, ends = codes[order], starts[order], ends[order]
+    # The latest end so far within each category
+    reach = pd.Series(ends).groupby(codes).cummax().to_numpy()
+    new = np.ones(n, dtype=bool)
+    new[1:] = (codes[1:] != codes[:-1]) | (starts[1:] > reach[:-1] + gap)
+    first = np.flatnonzero(new)
+
+    # Back to input order, so categories keep their order of appearance
+    index = np.minimum.reduceat(order, first)
+    keep = np.argsort(index, kind='stable')
+    return (index[keep], starts[first][keep].astype('datetime64[ns]'),
+            np.maximum.reduceat(ends, first)[keep].astype('datetime64[ns]'),
+            n - len(first))
@@ -1,14 +1,21 @@
-import matplotlib.pyplot as plt
-from collections import defaultdict
-from .utils import is_valid_array
+from matplotlib import colormaps, rcParams
+from matplotlib.collections import PatchCollection
+from matplotlib.patches import Circle, Wedge
+import sys
+from .instrument import _instrumented, _phase
+from .intervals import to_datetime64
+from .specs import prepare
+from .utils import is_valid_array, _render_output, _subplots
 import numpy as np
 import pandas as pd
 
 gray_color_palette = ['grey', 'none']
 
 
+@_instrumented('pie')
 def pie(categories, values=None, time=False, start_dates=None,
-        end_dates=None, fig_kw={}, **kwargs):
+        end_dates=None, fig_kw={}, output='show', vectorized=False,
+        **kwargs):
     """
     Creates and displays a grid of pie charts for given categories
     and associated values, or time-based intervals if time=True.
@@ -22,10 +29,23 @@ def pie(categories, values=None, time=False, start_dates=None,
     time : bool
         If True, uses start_dates and end_dates to create time-based
         pie charts.
-    start_dates, end_dates : list of datetime, optional
-        Lists of start and end dates for each category if time=True.
+    start_dates, end_dates : array-like of datetime, optional
+        Start and end dates for each category if time=True: datetimes,
+        datetime64 or int64 (nanoseconds since the epoch) values, or a
+        timezone-aware column, which is converted to UTC.
     fig_kw : dict, optional
         Keyword arguments for plt.subplots() to customize the figure.
+    output : str, optional
+        'show' (default) displays the chart, 'figure' returns the Figure
+        and 'png', 'svg' or 'rgba' return the rendered image without
+        touching the screen or the filesystem.
+    vectorized : bool, optional
+        If True (and time=True), the interval angles are computed as arrays,
+        all wedges of a category are drawn as one PatchCollection, and only
+        intervals spanning at least `min_label_extent` degrees (a keyword
+        argument, default 15) get a date label. The keyword argument
+        `cache=True` then memoizes the angles and labels on a content hash
+        of the data. Default is False.
     **kwargs : dict
         Additional keyword arguments for customization such as 'startangle',
         and 'colors'.
@@ -44,24 +64,31 @@ def pie(categories, values=None, time=False, start_dates=None,
         if len(start_dates) != len(end_dates):
             raise ValueError(
                 "start_dates and end_dates must have equal lengths.")
+        if vectorized:
+            return _grouped_pie_collection(categories, start_dates,
+                                           end_dates, fig_kw=fig_kw,
+                                           output=output, **kwargs)
         return _grouped_pie(categories, start_dates, end_dates,
-                            fig_kw=fig_kw, **kwargs)
+                            fig_kw=fig_kw, output=output, **kwargs)
     else:
-        return _pie(categories, values, fig_kw=fig_kw, **kwargs)
+        return _pie(categories, values, fig_kw=fig_kw, output=output,
+                    **kwargs)
 
 
-def _show():
-    plt.tight_layout()
-    plt.show()
+def _show(fig, output='show'):
+    _phase('layout')
+    fig.tight_layout()
+    return _render_output(fig, output)
 
 
-def _figure_and_axes(num_plots, fig_kw, **kwargs):
+def _figure_and_axes(num_plots, fig_kw, output='show', **kwargs):
     """
     Creates a figure and the corresponding axes based on the number of plots.
 
     Parameters:
     num_plots (int): The number of plots (subplots) required.
     fig_kw (dict): Figure configuration parameters.
+    output (str): The output of the chart; only 'show' makes a pyplot figure.
 
     Returns:
     tuple: The figure and axes objects.
@@ -76,7 +103,8 @@ def _figure_and_axes(num_plots, fig_kw, **kwargs):
     rows = (num_plots // cols) + (num_plots % cols > 0)
 
     # Create figure and axes
-    fig, axs = plt.subplots(rows, cols, **default_fig_kw, **kwargs)
+    fig, axs = _subplots(rows, cols, output=output, **default_fig_kw,
+                         **kwargs)
 
     # Ensure axs is a flat list
     axs = axs.flatten() if isinstance(axs, (list, np.ndarray)) else [axs]
@@ -88,7 +116,7 @@ def _figure_and_axes(num_plots, fig_kw, **kwargs):
     return fig, axs[:num_plots]
 
 
-def _pie(categories, values, fig_kw, **kwargs):
+def _pie(categories, values, fig_kw, output='show', **kwargs):
     """
     Creates and displays pie charts based on the provided categories
     and values. If quantitative values are not provided, a single pie chart
@@ -123,22 +151,24 @@ def _pie(categories, values, fig_kw, **kwargs):
         num_pies = len(categories)
         total = sum(values)
 
+    _phase('draw_artists')
     if values is None:
         # Plot a single pie chart with equal segments
         default_fig_kw = {'figsize': (6, 6)}
         default_fig_kw.update(fig_kw)
-        fig, ax = plt.subplots(**default_fig_kw)
+        fig, ax = _subplots(output=output, **default_fig_kw)
         colors = kwargs.get('colors',
-                            plt.cm.Greys(np.linspace(0.2, 0.8, total)))
+                            colormaps['Greys'](np.linspace(0.2, 0.8, total)))
         ax.pie(values_1pie, labels=categories if total < 10 else None,
                colors=colors, startangle=kwargs.get('startangle', 90),
                autopct=kwargs.get('autopct', '%1.1f%%'),
                wedgeprops=kwargs.get('wedgeprops', {'edgecolor': 'black'}))
         if total >= 10:
+            _phase('legend')
             ax.legend(categories, loc="best",
                       fontsize=kwargs.get('fontsize', 8))
     else:
-        fig, axs = _figure_and_axes(num_pies, fig_kw)
+        fig, axs = _figure_and_axes(num_pies, fig_kw, output)
         # Create a pie chart for each category
         for ax, category, value in zip(axs, categories, values):
             # Calculate pie segments
@@ -152,78 +182,219 @@ def _pie(categories, values, fig_kw, **kwargs):
                    normalize=True)
             ax.set_title(category, fontsize=kwargs.get('fontsize', 10))
 
-    _show()
-
-
-def _grouped_pie(categories, start_dates, end_dates, fig_kw={}, **kwargs):
-    # Group intervals by category
-    intervals_by_category = defaultdict(list)
-    for category, start, end in zip(categories, start_dates, end_dates):
-        intervals_by_category[category].append((start, end))
-
-    num_categories = len(intervals_by_category)
-    fig, axs = _figure_and_axes(num_categories, fig_kw, **kwargs)
-
-    # Base date for normalization and plotting
-    min_date = min(start_dates)
-    max_date = max(end_dates)
-    total_duration = (max_date - min_date).total_seconds()
-
-    for ax, (category, intervals) in zip(axs, intervals_by_category.items()):
-        wedges = []
-        labels = []
-        for start, end in intervals:
-            start_sec = (start - min_date).total_seconds()
-            end_sec = (end - min_date).total_seconds()
-            start_angle = (start_sec / total_duration) * 360
-            extent = ((end_sec - start_sec) / total_duration) * 360
-            wedges.append((start_angle, extent))
-            labels.append(f"{start.strftime('%Y-%m-%d')}\n"
-                          f"{end.strftime('%Y-%m-%d')}")
-        wedges.sort()
+    return _show(fig, output)
+
+
+def _grouped_pie(categories, start_dates, end_dates, fig_kw={},
+                 output='show', min_label_extent=None, cache=False,
+                 **kwargs):
+    # min_label_extent and cache only apply to the vectorized chart; they
+    # are taken out here so they do not reach the figure
+    # Group intervals by category, in order of first appearance
+    codes, unique_cats = pd.factorize(pd.Series(categories, dtype=object),
+                                      sort=False)
+    starts = to_datetime64(start_dates)
+    ends = to_datetime64(end_dates)
+
+    _phase('draw_artists')
+    fig, axs = _figure_and_axes(len(unique_cats), fig_kw, output, **kwargs)
+
+    # Angles from int64 timestamps, normalised on the whole date range
+    min_ns = starts.astype(np.int64).min()
+    total_ns = ends.astype(np.int64).max() - min_ns
+    start_angles = (starts.astype(np.int64) - min_ns) / total_ns * 360
+    extents = (ends.astype(np.int64) - starts.astype(np.int64)) / \
+        total_ns * 360
+    labels = np.char.add(
+        np.char.add(np.datetime_as_string(starts, unit='D'), '\n'),
+        np.datetime_as_string(ends, unit='D'))
+
+    # Wedges in order of start angle, each with its own label
+    order = np.lexsort((extents, start_angles, codes))
+    bounds = np.cumsum(np.bincount(codes, minlength=len(unique_cats)))[:-1]
+    for ax, category, rows in zip(axs, unique_cats, np.split(order, bounds)):
         # Plot the pie chart with the start and end dates as labels
-        for i, (start_angle, extent) in enumerate(wedges):
+        for start_angle, extent, label in zip(start_angles[rows],
+                                              extents[rows], labels[rows]):
             ax.pie([extent, 360 - extent], colors=gray_color_palette,
                    startangle=start_angle + 90, counterclock=False,
                    wedgeprops={'edgecolor': 'black'},
-                   labels=[labels[i], ''], labeldistance=0.8)
+                   labels=[label, ''], labeldistance=0.8)
 
         ax.set_title(category)
 
-    _show()
+    return _show(fig, output)
 
 
-def table_list(data, **kwargs):
+def _grouped_pie_collection(categories, start_dates, end_dates, fig_kw={},
+                            min_label_extent=15, output='show', cache=False,
+                            **kwargs):
+    """
+    Draws the wedges of _grouped_pie (same angles, order and label
+    positions), but each category's intervals are drawn as a single
+    PatchCollection of wedges with the angles computed from int64
+    timestamps in one pass. Unlike _grouped_pie, only wedges spanning at
+    least `min_label_extent` degrees are labelled with their dates and
+    the remainder of each pie is left unfilled, so a wedge is not painted
+    over by the remainder of a later one.
+    """
+    spec = prepare('pie', categories, start_dates, end_dates,
+                   min_label_extent=min_label_extent, cache=cache)
+    return _draw_pie(spec, fig_kw=fig_kw, output=output, **kwargs)
+
+
+def _draw_pie(spec, fig_kw={}, output='show', **kwargs):
+    """
+    Draws a time pie spec (see dynairxvis.specs), one subplot per
+    category.
+    """
+    codes, unique_cats = spec['codes'], spec['labels']
+    theta1, theta2 = spec['theta1'], spec['theta2']
+    _phase('draw_artists')
+    fig, axs = _figure_and_axes(len(unique_cats), fig_kw, output, **kwargs)
+
+    # Wedges are drawn in (start, extent) order within a category, like
+    # the legacy chart
+    order = np.lexsort((theta2 - theta1, theta2, codes))
+    bounds = np.cumsum(np.bincount(codes, minlength=len(unique_cats)))[:-1]
+    for ax, category, rows in zip(axs, unique_cats, np.split(order, bounds)):
+        wedges = [Wedge((0, 0), 1, t1, t2)
+                  for t1, t2 in zip(theta1[rows], theta2[rows])]
+        ax.add_collection(PatchCollection(
+            wedges, facecolor=gray_color_palette[0], edgecolor='black'))
+        ax.add_patch(Circle((0, 0), 1, facecolor='none', edgecolor='black'))
+
+        # Label only the wedges wide enough to hold the dates
+        labelled = rows[spec['labelled'][rows]]
+        for x, y, label in zip(spec['label_x'][labelled],
+                               spec['label_y'][labelled],
+                               spec['label_text'][labelled]):
+            ax.text(x, y, label, ha='left' if x > 0 else 'right',
+                    va='center', fontsize=rcParams['xtick.labelsize'])
+
+        ax.set(frame_on=False, xticks=[], yticks=[], xlim=(-1.25, 1.25),
+               ylim=(-1.25, 1.25), aspect='equal')
+        ax.set_title(category)
+
+    return _show(fig, output)
+
+
+@_instrumented('table_list')
+def table_list(data, file=None, chunksize=10000, limit=None, page_size=None,
+               **kwargs):
     """
     Print a DataFrame, list, or series as a list with the column name in
     bold and underlined.
 
+    Rows are formatted a chunk at a time with vectorised string operations
+    and written straight to `file`, so memory use is bounded by
+    `chunksize` rather than by the length of the list.
+
     Parameters
     ----------
-    data : pandas.DataFrame, list, or pandas.Series
-        The data to print.
-
+    data : pandas.DataFrame, list, pandas.Series or iterator
+        The data to print. An iterator of DataFrames, Series or lists (for
+        example ``pd.read_csv(..., chunksize=...)``) is consumed one chunk
+        at a time. Only the first column is printed, its values padded to
+        the longest one (for an iterator, the longest one read so far).
+    file : text stream, optional
+        Where to write the list, e.g. a file or io.StringIO. Defaults to
+        sys.stdout.
+    chunksize : int, optional
+        Number of rows formatted per write for in-memory data.
+        Default is 10000.
+    limit : int, optional
+        Maximum number of rows to write. A final '...' line marks that the
+        list was cut.
+    page_size : int, optional
+        If given, the header is repeated every `page_size` rows, after a
+        blank line.
     **kwargs : dict
-        Additional keyword arguments for customization such as 'colormap',
-        'cellLoc', 'rowLabels', 'colLabels', 'loc', 'bbox', 'cellColours',
-        'cellLoc', 'rowColours', 'rowLoc', 'fontsize
+        Other keyword arguments are accepted and ignored.
+
+    Examples
+    --------
+    >>> table_list(pd.Series(['Aspirin', 'Metformin'], name='Medication'))
+    >>> with open('vocabulary.txt', 'w') as f:
+    ...     table_list(pd.read_csv('meds.csv', chunksize=50000), file=f)
     """
     if data is None:
         raise ValueError("data cannot be None.")
 
-    # Convert list or series to DataFrame
-    if isinstance(data, (list, pd.Series)):
-        data = pd.DataFrame(data)
+    out = sys.stdout if file is None else file
 
     # ANSI escape code for bold and underline
     BOLD_UNDERLINE = '\033[1m\033[4m'
     END = '\033[0m'
 
-    # Print the column name in bold and underlined
-    print(f"{BOLD_UNDERLINE}{data.columns[0]}{END}")
+    header = None
+    written = 0
+    # Values are padded to the longest one, over the whole column for
+    # in-memory data and over the chunks read so far for iterators
+    width = _column_width(data, chunksize) if _in_memory(data) else 0
+    _phase('write')
+    for chunk in _iter_chunks(data, chunksize):
+        if header is None:
+            # Print the column name in bold and underlined
+            header = f"{BOLD_UNDERLINE}{chunk.columns[0]}{END}\n"
+            out.write(header)
+        if limit is not None and written >= limit:
+            out.write('...\n')
+            return
+        column = chunk[chunk.columns[0]]
+        cut = limit is not None and written + len(column) > limit
+        if cut:
+            column = column.iloc[:limit - written]
+        if not len(column):
+            continue
+
+        # Left-aligned values, without the index
+        text = column.astype(str)
+        width = max(width, int(text.str.len().max()))
+        lines = text.str.ljust(width)
+        pos = 0
+        while pos < len(lines):
+            if page_size and written and written % page_size == 0:
+                out.write('\n' + header)
+            take = page_size - written % page_size if page_size \
+                else len(lines)
+            part = lines.iloc[pos:pos + take]
+            out.write('\n'.join(part) + '\n')
+            pos += len(part)
+            written += len(part)
+        if cut:
+            out.write('...\n')
+            return
+
+
+def _in_memory(data):
+    return isinstance(data, (list, np.ndarray, pd.Series, pd.DataFrame))
+
+
+def _column_width(data, chunksize):
+    """
+    Length of the longest value of the first column of in-memory `data`,
+    measured a chunk at a time.
+    """
+    width = 0
+    for chunk in _iter_chunks(data, chunksize):
+        if len(chunk):
+            width = max(width, int(
+                chunk[chunk.columns[0]].astype(str).str.len().max()))
+    return width
+
 
-    # Print the DataFrame without the index, left-aligned
-    max_width = max(data[data.columns[0]].astype(str).map(len))
-    for index, row in data.iterrows():
-        value = row[data.columns[0]]
-        print(str(value).ljust(max_width, **kwargs))
+def _iter_chunks(data, chunksize):
+    """
+    Yields `data` as DataFrames of at most `chunksize` rows (in-memory
+    data) or one DataFrame per item (iterators of chunks).
+    """
+    if _in_memory(data):
+        frame = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
+        # An empty frame is still yielded, for its column name
+        for start in range(0, max(len(frame), 1), chunksize):
+            yield frame.iloc[start:start + chunksize]
+    else:
+        for chunk in data:
+            yield chunk if isinstance(chunk, pd.DataFrame) \
+                else pd.DataFrame(chunk)
@@ -1,20 +1,34 @@
+import functools
+import hashlib
+import io
 import os
-import matplotlib.pyplot as plt
-
-from .dot import dot
-from .box import box
-from .bar import bar
-from .pie import pie, table_list
-from .time import line
-from .gantt import gantt
-# from .table import table
-from .radar import radar
-from .violin import violin
-from .hist import histogram
-from .scatter import scatter
-from .heatmap import heatmap, heatmap_nq
-from .calendar import calendar
-from .utils import profile, findIndex
+from collections.abc import Mapping
+from importlib import import_module
+
+from .cache import _disk_path, _read_bytes, _write_bytes, content_hash
+from .instrument import _instrumented
+from .sources import is_source, read_events
+from .utils import profile, findIndex, _savefig
+
+# Chart functions and the modules defining them. They are imported on first
+# use, so importing this module does not pull in matplotlib.
+_CHART_MODULES = {
+    'dot': '.dot',
+    'box': '.box',
+    'bar': '.bar',
+    'pie': '.pie',
+    'table_list': '.pie',
+    'line': '.time',
+    'gantt': '.gantt',
+    # 'table': '.table',
+    'radar': '.radar',
+    'violin': '.violin',
+    'histogram': '.hist',
+    'scatter': '.scatter',
+    'heatmap': '.heatmap',
+    'heatmap_nq': '.heatmap',
+    'calendar': '.calendar',
+}
 
 
 # For threshold of:  50.0 . These will be kept (10)
@@ -27,7 +41,44 @@ from .utils import profile, findIndex
 # =============================================================================
 # Internal
 # =============================================================================
-def _draw_fig(filename=None, overwrite=False, **kwargs):
+def _chart(name):
+    """
+    Returns the chart function `name`, importing its module if needed.
+    """
+    return getattr(import_module(_CHART_MODULES[name], __package__), name)
+
+
+def __getattr__(name):
+    # Keeps `from dynairxvis.plot import gantt` working without importing
+    # every chart module up front
+    if name in _CHART_MODULES:
+        return _chart(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class _LazyFunctions(Mapping):
+    """
+    Read-only mapping of plot names to chart functions, which imports each
+    chart module the first time its function is looked up.
+    """
+
+    def __init__(self, names):
+        self._names = names
+
+    def __getitem__(self, plot_name):
+        return _chart(self._names[plot_name])
+
+    def __contains__(self, plot_name):
+        return plot_name in self._names
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def __len__(self):
+        return len(self._names)
+
+
+def _draw_fig(filename=None, overwrite=False, fig=None, **kwargs):
     """
     Internal function, which is called to draw a plot to the screen or
     save it in a file.
@@ -40,39 +91,46 @@ def _draw_fig(filename=None, overwrite=False, **kwargs):
     overwrite : bool, optional
         If False, does not overwrite the file if it exists. If True,
         overwrites the file.
+    fig : matplotlib.figure.Figure, optional
+        The figure to save. Defaults to the current figure.
     **kwargs : dict
-        Keyword arguments for fig.savefig().
+        Keyword arguments for fig.savefig(), and 'rasterize' (see
+        `plot`).
 
     Returns
     -------
-    None.
+    int or None
+        The size of the saved file in bytes, None if nothing was saved.
     """
     if filename is not None:
         if overwrite or not os.path.isfile(filename):
-            fig = plt.gcf()
-            fig.savefig(filename, **kwargs)
+            if fig is None:
+                import matplotlib.pyplot as plt
+                fig = plt.gcf()
+            return _savefig(fig, filename, **kwargs)
         else:
             print('** WARNING **: Figure not saved. File exists.')
             print(filename)
     else:
+        import matplotlib.pyplot as plt
         plt.show()
 
 
 # Mapping of plot_name to plotting function
 # All 11 chart types added
-plot_functions = {
-    'bar': bar,
-    'box': box,
-    'dot': dot,
-    'gantt': gantt,
-    'line': line,
-    'heatmap': heatmap,
-    'hist': histogram,
-    'pie': pie,
-    'radar': radar,
-    'scatter': scatter,
-    'violin': violin
-}
+plot_functions = _LazyFunctions({
+    'bar': 'bar',
+    'box': 'box',
+    'dot': 'dot',
+    'gantt': 'gantt',
+    'line': 'line',
+    'heatmap': 'heatmap',
+    'hist': 'histogram',
+    'pie': 'pie',
+    'radar': 'radar',
+    'scatter': 'scatter',
+    'violin': 'violin'
+})
 
 
 def plot(plot_name, *args, **kwargs):
@@ -89,39 +147,163 @@ def plot(plot_name, *args, **kwargs):
     **kwargs : dict
         Keyword arguments passed directly to the plotting function. It should
         include 'filename' and 'overwrite' if saving the plot is desired.
+        With 'output' ('figure', 'png', 'svg' or 'rgba') the chart is
+        returned instead of being shown or saved. With 'cache_dir' (and a
+        'filename', or 'output' 'png' or 'svg') the encoded chart is kept
+        in that directory under a hash of the plot name, the arguments and
+        the Matplotlib and dynairxvis versions, and is read from there
+        instead of being drawn again when nothing changed. A file that
+        already holds the same bytes is not rewritten. With 'rasterize'
+        (True, or a dict overriding some of the 'artists', 'vertices' and
+        'dpi' of dynairxvis.utils.RASTER_POLICY) a PDF, SVG or EPS file
+        or 'svg' output keeps axes, text and legends as vectors but turns
+        the dense data layers, e.g. the thousands of cells of a calendar,
+        into one image, which keeps the file small.
 
     Returns
     -------
-    None.
+    None, or the Figure or rendered image when 'output' is given, or the
+    filename when saving with 'cache_dir', or the size of the saved file
+    in bytes when saving without it.
+
+    Raises
+    ------
+    ValueError
+        If 'cache_dir' is given without a filename and with an output other
+        than 'png' or 'svg'.
     """
     # Extract filename and overwrite from kwargs, defaulting to None and False
     # if not present
     filename = kwargs.pop('filename', None)
     overwrite = kwargs.pop('overwrite', False)
-
+    output = kwargs.pop('output', 'show')
+    cache_dir = kwargs.pop('cache_dir', None)
+    rasterize = kwargs.pop('rasterize', False)
+
+    fig = None
+    if plot_name in plot_functions and cache_dir is not None:
+        return _plot_cached(plot_name, args, kwargs, cache_dir,
+                            filename=filename, overwrite=overwrite,
+                            output=output, rasterize=rasterize)
     if plot_name in plot_functions:
         # Create the plot
         plot_func = plot_functions[plot_name]
-        # Ensure plot functions return fig, ax
-        plot_func(*args, **kwargs)
+        if output == 'svg' and rasterize:
+            return _encode(plot_func(*args, output='figure', **kwargs),
+                           output, rasterize)
+        if output != 'show':
+            return plot_func(*args, output=output, **kwargs)
+        if filename is None:
+            # displayed by pyplot
+            return plot_func(*args, **kwargs)
+        # Keep hold of the figure so the right one is saved
+        fig = plot_func(*args, output='figure', **kwargs)
     else:
         print(f"**WARNING: ** '{plot_name}' is not a supported plot type.")
 
     # Show the plot or save it to a file
-    _draw_fig(filename=filename, overwrite=overwrite, **kwargs)
+    if rasterize:
+        kwargs['rasterize'] = rasterize
+    return _draw_fig(filename=filename, overwrite=overwrite, fig=fig,
+                     **kwargs)
+
+
+def _render_key(*parts):
+    """
+    The content hash of a rendered chart: `parts` (the chart, its data and
+    options), the Matplotlib version and the source of the code drawing
+    it. None if the parts cannot be hashed.
+    """
+    import matplotlib
+    return content_hash(matplotlib.__version__, _source_hash(), *parts)
+
+
+@functools.lru_cache(maxsize=None)
+def _source_hash():
+    """
+    Hash of the source of the package modules, so an edited chart does not
+    hit the renders of the previous code even if the version is unchanged.
+    """
+    package = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha1(usedforsecurity=False)
+    for name in sorted(os.listdir(package)):
+        if name.endswith('.py'):
+            digest.update(name.encode())
+            digest.update(_read_bytes(os.path.join(package, name)))
+    return digest.hexdigest()
 
 
-def plot_charts(df, column_refs=[], **kwargs):
+def _encode(fig, fmt, rasterize=False):
+    """
+    The bytes of `fig` saved in format `fmt`; the figure is then closed.
+    """
+    buffer = io.BytesIO()
+    try:
+        _savefig(fig, buffer, format=fmt, rasterize=rasterize)
+    finally:
+        if fig.canvas.manager is not None:
+            import matplotlib.pyplot as plt
+            plt.close(fig)
+    return buffer.getvalue()
+
+
+def _plot_cached(plot_name, args, kwargs, cache_dir, filename=None,
+                 overwrite=False, output='show', rasterize=False):
+    """
+    `plot` through the render cache in `cache_dir`: returns the encoded
+    chart, or saves it to `filename`, drawing it only on a cache miss.
+    """
+    if output in ['png', 'svg']:
+        fmt = output
+    elif output == 'show' and filename is not None:
+        fmt = os.path.splitext(filename)[1][1:].lower() or 'png'
+    else:
+        raise ValueError("cache_dir needs a filename, or output 'png' or "
+                         "'svg'.")
+
+    key = _render_key(plot_name, fmt, list(args), dict(sorted(kwargs.items())),
+                      rasterize)
+    path = None if key is None else _disk_path(cache_dir, key, '.' + fmt)
+    data = None if path is None else _read_bytes(path)
+    if data is None:
+        data = _encode(plot_functions[plot_name](*args, output='figure',
+                                                 **kwargs), fmt, rasterize)
+        if path is not None:
+            _write_bytes(path, data)
+    if output != 'show':
+        return data
+
+    if os.path.isfile(filename) and not overwrite:
+        print('** WARNING **: Figure not saved. File exists.')
+        print(filename)
+    elif _read_bytes(filename) != data:
+        _write_bytes(filename, data)
+    return filename
+
+
+@_instrumented('plot_charts')
+def plot_charts(df, column_refs=[], cache=False, source_kw={}, **kwargs):
     """
     Plots charts based on the provided column references (names or indices)
     and their data types.
 
     Parameters
     ----------
-    df : pandas.DataFrame
-        The DataFrame from which to plot data.
+    df : pandas.DataFrame, str, path-like or pyarrow Dataset or Table
+        The DataFrame from which to plot data, or a Parquet/Arrow source of
+        which only the `column_refs` columns are read (see
+        dynairxvis.sources.read_events).
     column_refs : list
         List of column references (names or indices) to be used for plotting.
+    cache : bool, optional
+        Passed to the charts that prepare their data into a spec (gantt,
+        line, heatmap, calendar and the time scatter), which then memoize
+        it, so plotting the same columns again skips preparing them.
+        Default is False.
+    source_kw : dict, optional
+        The row filters of a Parquet/Arrow source, e.g.
+        ``{'patient_col': 'patient_id', 'patients': 42}``, passed to
+        dynairxvis.sources.read_events.
     **kwargs : dict
         Additional keyword arguments passed to plotting functions.
 
@@ -151,6 +333,11 @@ def plot_charts(df, column_refs=[], **kwargs):
         plot_charts(df, column_refs=['Condition', 'Blood_Pressure'])
 
     """
+    if is_source(df):
+        # only the referenced columns are read, in their order
+        df = read_events(df, columns=column_refs, **source_kw)
+        column_refs = list(df.columns)
+
     # Convert indices to column names if necessary
     col_names = [df.columns[idx] if isinstance(
         idx, int) else idx for idx in column_refs]
@@ -176,46 +363,63 @@ def plot_charts(df, column_refs=[], **kwargs):
     # Decision structure for plotting based on type codes and number of columns
     if len(col_names) == 1 and col_codes == 'Q':
         print(f"Q charts for {col_names[0]}...")
+        from .hist import histogram
+        from .violin import violin
+        from .box import box
         histogram(df[col_names[0]], **kwargs)
         violin(df[col_names[0]], **kwargs)
         box(df[col_names[0]], **kwargs)
     elif len(col_names) == 1 and col_codes == 'N':
         print('N charts...')
+        from .pie import pie, table_list
         pie(df[col_names[0]], **kwargs)
         table_list(df[[col_names[0]]], **kwargs)
     elif (len(col_names) == 2 and col_codes == 'NQ'):
         print('NQ charts...')
+        from .bar import bar
+        from .scatter import scatter
+        from .heatmap import heatmap_nq
+        from .pie import pie
         q_col = next(col for col,
                      dtype in col_types.items() if dtype == 'Q')
         # print(f"Plotting bar chart with categories from {n_col} and" +
         #       " values from {q_col}...")
         bar(df[n_col], df[q_col], **kwargs)
         scatter(df[n_col], values=df[q_col], mode='scatter')
-        heatmap_nq(df[n_col], values=df[q_col], mode='heatmap')
+        heatmap_nq(df[n_col], values=df[q_col], mode='heatmap', cache=cache)
         pie(df[n_col], df[q_col])
     elif len(col_names) == 3 and col_codes == 'NTT':
         # NT
         print('NT charts...')
-        gantt(df[n_col], start, end)
+        from .gantt import gantt
+        from .pie import pie
+        from .time import line
+        from .scatter import scatter
+        from .heatmap import heatmap
+        from .calendar import calendar
+        gantt(df[n_col], start, end, cache=cache)
         pie(df[n_col], start_dates=start, end_dates=end, time=True)
-        line(df[n_col], start_dates=start, end_dates=end)
-        scatter(df[n_col], start_dates=start, end_dates=end, mode='gantt')
-        heatmap(df, y_col=n_col, date_col=col_names[findIndex(a, 'start')])
+        line(df[n_col], start_dates=start, end_dates=end, cache=cache)
+        scatter(df[n_col], start_dates=start, end_dates=end, mode='gantt',
+                cache=cache)
+        heatmap(df, y_col=n_col, date_col=col_names[findIndex(a, 'start')],
+                cache=cache)
         # calendar(df, y_column=n_col, x_column='start')
-        calendar(df, y_column=n_col, x_column=col_names[findIndex(a, 'start')])
+        calendar(df, y_column=n_col,
+                 x_column=col_names[findIndex(a, 'start')], cache=cache)
     elif len(col_names) == 4 and col_codes == 'NOTT':
         print('NTO charts...')
-        _nott_nqtt(df[n_col], start, end, df[o_col])
+        _nott_nqtt(df[n_col], start, end, df[o_col], cache=cache)
         # ['Gantt', 'Line', 'Heatmap', 'Scatter']
     elif len(col_names) == 4 and col_codes == 'NQTT':
         print('NQT charts...')
-        _nott_nqtt(df[n_col], start, end, df[q_col])
+        _nott_nqtt(df[n_col], start, end, df[q_col], cache=cache)
         # ['Gantt', 'Line', 'Heatmap', 'Scatter']
     else:
         print("No suitable plot type found for the columns or data types.")
 
 
-def _nott_nqtt(categories, starts, ends, values):
+def _nott_nqtt(categories, starts, ends, values, cache=False):
     """
     Utility function to plot Gantt, Line, Heatmap, and Scatter plots for
     combinations of categories, start dates, end dates, and values. This
@@ -233,6 +437,8 @@ def _nott_nqtt(categories, starts, ends, values):
     values : list of numeric or str, optional
         The values associated with each category. These can be used to adjust
         bar heights, line colors, or other plot characteristics.
+    cache : bool, optional
+        Passed to the charts to memoize their prepared data.
 
     Raises
     ------
@@ -250,21 +456,27 @@ def _nott_nqtt(categories, starts, ends, values):
     >>> values = [2, 4, 6]
     >>> _nott_nqtt(categories, starts, ends, values)
     """
+    from .gantt import gantt
+    from .time import line
+    from .heatmap import heatmap_nq
+    from .scatter import scatter
+
     # Input validation
     if not (len(categories) == len(starts) == len(ends) == len(values)):
         raise ValueError("All input lists must have the same length to \
             generate Gantt, Line, Heatmap, and Scatter plots.")
 
     # Plot Gantt chart
-    gantt(categories, starts, ends, values)
+    gantt(categories, starts, ends, values, cache=cache)
 
     # Plot Line chart
-    line(categories, start_dates=starts, end_dates=ends, values=values)
+    line(categories, start_dates=starts, end_dates=ends, values=values,
+         cache=cache)
 
     # Plot Heatmap
     heatmap_nq(categories=categories, start_dates=starts, end_dates=ends,
-               values=values, mode='gantt')
+               values=values, mode='gantt', cache=cache)
 
     # Plot Scatter plot
     scatter(categories, start_dates=starts, end_dates=ends, values=values,
-            mode='gantt')
+            mode='gantt', cache=cache)
@@ -1,19 +1,34 @@
-import matplotlib.pyplot as plt
-from .time import grouped_chart
-from .utils import FIG_SIZE
-from .gantt import gantt
-from .utils import _plot_now_line
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 
+import pandas as pd
 
+from .gantt import _draw_gantt
+from .instrument import _instrumented, _phase
+from .specs import prepare
+from .time import _draw_grouped_chart
+from .utils import (FIG_SIZE, _dates_to_num, _plot_now_line, _render_output,
+                    _subplots)
+
+
+@_instrumented('plot_grid')
 def plot_grid(categories_list, start_dates_list, end_dates_list,
               chart_types, values_list=None,
-              titles_list=None, fig_kw={}, **kwargs):
+              titles_list=None, fig_kw={}, output='show', cache=False,
+              workers=None, **kwargs):
     """
     Plot multiple chart types in a grid layout with shared x-axis. The function
     supports 'line', 'scatter', 'heatmap', and 'gantt' chart types. The
     function will plot the first n charts where n is the minimum length of the
     input lists. If the lists have different lengths, it will print a warning.
 
+    The data of all rows is prepared first (see dynairxvis.specs), then the
+    rows are drawn on one figure. The shared x-axis range, the range of all
+    the intervals padded by a tenth on each side as in `gantt`, and the
+    position of the "now" line are computed once for the whole grid. The
+    range applies to every row, so a grid of only line or scatter rows
+    also gets the padded range rather than Matplotlib's autoscaled one.
+
     Parameters
     ----------
     categories_list : list of list
@@ -30,8 +45,25 @@ def plot_grid(categories_list, start_dates_list, end_dates_list,
         List of titles for each chart.
     fig_kw : dict, optional
         Figure customization arguments.
+    output : str, optional
+        'show' (default) displays the grid, 'figure' returns the Figure
+        and 'png', 'svg' or 'rgba' return the rendered image without
+        touching the screen or the filesystem.
+    cache : bool, optional
+        If True, the spec of every row is memoized on a content hash of its
+        data (see `gantt` and `grouped_chart`). Default is False.
+    workers : int, optional
+        Number of threads preparing the rows concurrently. Default is None,
+        which prepares them one after the other.
     **kwargs : dict
-        Additional arguments passed to individual charts.
+        Additional arguments passed to individual charts, including
+        'xlim', a pair of dates (list, array or DatetimeIndex) to set the
+        shared x-axis range instead.
+
+    Returns
+    -------
+    None, matplotlib.figure.Figure, bytes or np.ndarray
+        Depending on `output`.
 
     Examples
     --------
@@ -47,8 +79,8 @@ def plot_grid(categories_list, start_dates_list, end_dates_list,
     >>> chart_types = ['line', 'scatter']
     >>> values_list = [[1, 2, 3], [4, 5, 6]]
     >>> titles_list = ['Chart 1', 'Chart 2']
-    >>> plot_grid(categories_list, start_dates_list, end_dates_list,
-                  chart_types, values_list=values_list)
+    >>> png = plot_grid(categories_list, start_dates_list, end_dates_list,
+                        chart_types, values_list=values_list, output='png')
     """
     # Validate chart types
     for chart_type in chart_types:
@@ -85,43 +117,51 @@ def plot_grid(categories_list, start_dates_list, end_dates_list,
               f"Plotting first {min_length} {chart_word}.")
 
     # Truncate lists to the shortest length
-    categories_list = categories_list[:min_length]
-    start_dates_list = start_dates_list[:min_length]
-    end_dates_list = end_dates_list[:min_length]
-    chart_types = chart_types[:min_length]
-    if values_list:
-        values_list = values_list[:min_length]
-    if titles_list:
-        titles_list = titles_list[:min_length]
-
-    # Set default figure properties and apply scaling to height
-    n = len(chart_types)
+    chart_types = [chart_type.lower() for chart_type in
+                   chart_types[:min_length]]
+    rows = list(zip(categories_list, start_dates_list, end_dates_list,
+                    chart_types, values_list or [None] * min_length))
+
+    # Prepare the data of all rows before drawing any of them
+    def _prepare_row(row):
+        categories, start_dates, end_dates, chart_type, values = row
+        return _prepare_grid_row(categories, start_dates, end_dates,
+                                 chart_type, values, cache, kwargs)
+    if workers:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            specs = list(executor.map(_prepare_row, rows))
+    else:
+        specs = [_prepare_row(row) for row in rows]
+
+    # The shared x-axis range and the current date, computed once
+    xlim = kwargs.pop('xlim', None)
+    if xlim is None:
+        xlim = _shared_xlim(specs)
+    if xlim is not None:
+        xlim = [pd.Timestamp(date) for date in xlim]
+    now = datetime.now()
+
+    # Set default figure properties and apply scaling to height, without
+    # modifying FIG_SIZE
+    _phase('draw_artists')
+    n = len(specs)
     default_fig_kw = FIG_SIZE.copy()
     default_fig_kw['figsize'] = (FIG_SIZE['figsize'][0],
                                  FIG_SIZE['figsize'][1] * n)
     default_fig_kw.update(fig_kw)
 
-    fig, axs = plt.subplots(n, 1, sharex=True, **default_fig_kw,
-                            gridspec_kw={'hspace': 0.3})
-
-    if n == 1:
-        axs = [axs]  # Handle single plot case
+    fig, axs = _subplots(n, 1, output=output, sharex=True, **default_fig_kw,
+                         gridspec_kw={'hspace': 0.3}, squeeze=False)
+    axs = axs[:, 0]
 
     # Plot charts
-    for i, (categories, start_dates, end_dates, chart_type) in enumerate(zip(
-            categories_list, start_dates_list, end_dates_list, chart_types)):
-
-        ax = axs[i]
-
-        if chart_type.lower() == 'gantt':
-            gantt(categories, start_dates, end_dates,
-                  values=(values_list[i] if values_list else None),
-                  ax=ax, fig_kw=fig_kw, **kwargs)
+    for i, (spec, ax) in enumerate(zip(specs, axs)):
+        if spec['chart'] == 'gantt':
+            # the shared range is set below, instead of one per row
+            _draw_gantt(spec, ax=ax, output='figure',
+                        **dict(kwargs, xlim=xlim))
         else:
-            grouped_chart(categories, start_dates, end_dates,
-                          chart_type=chart_type,
-                          values=(values_list[i] if values_list else None),
-                          ax=ax, fig_kw=fig_kw, **kwargs)
+            _draw_grouped_chart(spec, ax=ax, output='figure', **kwargs)
 
         # Add label if provided
         if titles_list:
@@ -134,9 +174,51 @@ def plot_grid(categories_list, start_dates_list, end_dates_list,
         else:
             ax.set_xlabel('')
 
+    if xlim is not None:
+        axs[0].set_xlim(_dates_to_num(xlim))
+    for i, ax in enumerate(axs):
         # if now is within 1 year from the max x-axis limit
         # add a vertical line to indicate the current date
-        _plot_now_line(ax, label='Now' if i == 0 else None)
+        _plot_now_line(ax, max_date=xlim[1] if xlim else None,
+                       label='Now' if i == 0 else None, now=now)
+
+    fig.suptitle(kwargs.get('suptitle', 'Plot Grid'))
+    return _render_output(fig, output)
+
 
-    plt.suptitle(kwargs.get('suptitle', 'Plot Grid'))
-    plt.show()
+def _prepare_grid_row(categories, start_dates, end_dates, chart_type, values,
+                      cache, kwargs):
+    """
+    The spec of one row of `plot_grid`, from the data arguments of `gantt`
+    or `grouped_chart` found in `kwargs`.
+    """
+    if chart_type == 'gantt':
+        return prepare('gantt', categories, start_dates, end_dates,
+                       values=values,
+                       use_values_as_height=kwargs.get(
+                           'use_values_as_height', False),
+                       colors=kwargs.get('colors'),
+                       colors_labels=kwargs.get('colors_labels'),
+                       coalesce=kwargs.get('coalesce', False), cache=cache)
+    return prepare('grouped_chart', categories, start_dates, end_dates,
+                   chart_type=chart_type, values=values,
+                   markers=kwargs.get('markers'),
+                   category_colors=kwargs.get('category_colors'),
+                   time_bins=kwargs.get('time_bins'),
+                   count=kwargs.get('count', 'presence'),
+                   coalesce=kwargs.get('coalesce', False), cache=cache)
+
+
+def _shared_xlim(specs):
+    """
+    The range of the intervals (and heatmap bins) of all specs, padded by
+    a tenth on each side, or None if they are all empty.
+    """
+    bounds = [spec[key] for spec in specs
+              for key in ('starts', 'ends', 'edges') if len(spec.get(key, []))]
+    if not bounds:
+        return None
+    min_date = min(dates.min() for dates in bounds)
+    max_date = max(dates.max() for dates in bounds)
+    pad = (max_date - min_date) / 10
+    return [min_date - pad, max_date + pad]
@@ -1,11 +1,12 @@
 import numpy as np
-import matplotlib.pyplot as plt
-from .utils import FIG_SIZE
+from .instrument import _instrumented, _phase
+from .utils import FIG_SIZE, _render_output, _subplots
 
 # TODO: we may end up not using this function
 
 
-def radar(categories, values, fig_kw={}, ax_kw={}, **kwargs):
+@_instrumented('radar')
+def radar(categories, values, fig_kw={}, ax_kw={}, output='show', **kwargs):
     """
     Creates and displays a radar chart based on
     the provided categories and values.
@@ -25,6 +26,10 @@ def radar(categories, values, fig_kw={}, ax_kw={}, **kwargs):
     ax_kw : dict
         Keyword arguments for ax.set() to customize the Axes.
         Default is an empty dict. Example: {'title': 'Radar Chart'}
+    output : str, optional
+        'show' (default) displays the chart, 'figure' returns the Figure
+        and 'png', 'svg' or 'rgba' return the rendered image without
+        touching the screen or the filesystem.
     kwargs : dict
         Additional keyword arguments to pass to ax.fill() and ax.plot()
         for further customization.
@@ -49,11 +54,13 @@ def radar(categories, values, fig_kw={}, ax_kw={}, **kwargs):
     angles += angles[:1]  # Complete the loop for angles as well
 
     # Default figure and axes setup
-    fig_defaults = FIG_SIZE
-    fig_defaults.update(fig_kw)  # Update with any user-provided figure kwargs
+    # Update with any user-provided figure kwargs, keeping FIG_SIZE as is
+    fig_defaults = {**FIG_SIZE, **fig_kw}
 
     # Plot
-    fig, ax = plt.subplots(subplot_kw=dict(polar=True), **fig_defaults)
+    _phase('draw_artists')
+    fig, ax = _subplots(output=output, subplot_kw=dict(polar=True),
+                        **fig_defaults)
     ax.fill(angles, values_copy, color='gray', alpha=0.25, **kwargs)
     ax.plot(angles, values_copy, color='gray', linewidth=2, **kwargs)
 
@@ -63,4 +70,4 @@ def radar(categories, values, fig_kw={}, ax_kw={}, **kwargs):
     ax_defaults.update(ax_kw)  # Update with any user-provided axes kwargs
     ax.set(**ax_defaults)
 
-    plt.show()
+    return _render_output(fig, output)
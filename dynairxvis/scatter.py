@@ -1,12 +1,14 @@
-import matplotlib.pyplot as plt
 import numpy as np
 from .time import grouped_chart
-from .utils import FIG_SIZE, _resolve_orientation
+from .instrument import _instrumented, _phase
+from .utils import (FIG_SIZE, _resolve_orientation, _render_output,
+                    _subplots)
 
 
+@_instrumented('scatter')
 def scatter(categories, start_dates=None, end_dates=None, values=None,
             mode='gantt', orientation='vertical', markers=None, fig_kw={},
-            plot_kw={}, **kwargs):
+            plot_kw={}, output='show', **kwargs):
     """
     Creates and displays a scatter plot or bar chart with custom settings
     based on the mode specified.
@@ -32,6 +34,10 @@ def scatter(categories, start_dates=None, end_dates=None, values=None,
     plot_kw : dict
         Keyword arguments for ax.bar() or ax.scatter() to further
         customize the points or bars.
+    output : str, optional
+        'show' (default) displays the chart, 'figure' returns the Figure
+        and 'png', 'svg' or 'rgba' return the rendered image without
+        touching the screen or the filesystem.
     **kwargs : dict
         Additional keyword arguments for customization not related to
         ax.scatter() or ax.bar().
@@ -52,7 +58,8 @@ def scatter(categories, start_dates=None, end_dates=None, values=None,
     if mode == 'gantt':
         return grouped_chart(categories, start_dates, end_dates,
                              chart_type='scatter', markers=markers,
-                             fig_kw=fig_kw, plot_kw=plot_kw, **kwargs)
+                             fig_kw=fig_kw, plot_kw=plot_kw, output=output,
+                             **kwargs)
     # start scatter/bar modes
     if values is None:
         raise ValueError(
@@ -60,9 +67,9 @@ def scatter(categories, start_dates=None, end_dates=None, values=None,
 
     orientation = _resolve_orientation(orientation)
 
-    fig_defaults = FIG_SIZE
-    fig_defaults.update(fig_kw)
-    fig, ax = plt.subplots(**fig_defaults)
+    fig_defaults = {**FIG_SIZE, **fig_kw}
+    _phase('draw_artists')
+    fig, ax = _subplots(output=output, **fig_defaults)
 
     x_indices = np.arange(len(categories))
 
@@ -103,5 +110,6 @@ def scatter(categories, start_dates=None, end_dates=None, values=None,
 
     ax.set_title(kwargs.get('title', f'{mode.capitalize()} Plot'))
 
-    plt.tight_layout()
-    plt.show()
+    _phase('layout')
+    fig.tight_layout()
+    return _render_output(fig, output)
@@ -0,0 +1,162 @@
+"""
+Reading chart data straight from Parquet files and Arrow datasets.
+
+Event extracts are often much larger than what one chart set needs: a
+handful of columns for one patient and a date window. `read_events` only
+reads the requested columns, and hands the patient and date filters to
+pyarrow.dataset, which skips the Parquet row groups whose min/max
+statistics cannot match, so most of the file is never decoded. Local files
+are memory-mapped, and the result is a DataFrame of Arrow-backed columns
+(pd.ArrowDtype) sharing the Arrow buffers instead of copying them into
+NumPy arrays.
+
+`plot_charts` and `render_batch` accept a source wherever they take a
+DataFrame, with the filters in `source_kw`.
+
+pyarrow is an optional dependency (the 'parquet' extra), only imported
+when a source is read.
+"""
+import os
+
+import pandas as pd
+
+
+def is_source(data):
+    """
+    Whether `data` is a Parquet/Arrow source `read_events` can read: a
+    path, a list of paths, or a pyarrow Dataset or Table.
+    """
+    if isinstance(data, (str, os.PathLike)):
+        return True
+    if isinstance(data, list):
+        return bool(data) and all(isinstance(d, (str, os.PathLike))
+                                  for d in data)
+    return type(data).__module__.startswith('pyarrow')
+
+
+def read_events(source, columns=None, patient_col=None, patients=None,
+                date_cols=None, start=None, end=None):
+    """
+    Reads the columns and rows of a Parquet/Arrow source needed for a
+    chart.
+
+    Parameters
+    ----------
+    source : str, path-like, list of paths, pyarrow.dataset.Dataset or
+             pyarrow.Table
+        A Parquet file or directory of Parquet files (e.g. a partitioned
+        extract), or an Arrow dataset or table.
+    columns : list of str or int, optional
+        The columns to read, by name or position in the schema, e.g. the
+        `column_refs` of `plot_charts`. Default is None, all columns.
+    patient_col : str, optional
+        The column holding the patient id. Needed with `patients`.
+    patients : scalar or list, optional
+        Only the rows of these patient ids are read.
+    date_cols : str or tuple of str, optional
+        The date column, or the (start, end) columns of intervals, that
+        `start` and `end` apply to.
+    start, end : datetime-like, optional
+        The date window. A row is read when its date is within
+        [start, end] or, with (start, end) columns, when its interval
+        overlaps the window.
+
+    Returns
+    -------
+    pandas.DataFrame
+        The requested columns in the order of `columns`, backed by Arrow
+        arrays (pd.ArrowDtype).
+
+    Raises
+    ------
+    ImportError
+        If pyarrow is not installed.
+    ValueError
+        If `patients` is given without `patient_col`, or `start` or `end`
+        without `date_cols`.
+
+    Example
+    -------
+    df = read_events('events.parquet',
+                     columns=['Condition', 'Start_Date', 'End_Date'],
+                     patient_col='patient_id', patients=42,
+                     date_cols=('Start_Date', 'End_Date'),
+                     start='2020-01-01')
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+        from pyarrow import fs
+    except ImportError as e:
+        raise ImportError('Reading Parquet or Arrow sources needs pyarrow: '
+                          'pip install dynairxvis[parquet]') from e
+
+    if isinstance(source, pa.Table):
+        dataset = ds.dataset(source)
+    elif isinstance(source, ds.Dataset):
+        dataset = source
+    else:
+        paths = [os.fspath(path) for path in source] \
+            if isinstance(source, list) else os.fspath(source)
+        dataset = ds.dataset(paths, format='parquet',
+                             filesystem=fs.LocalFileSystem(use_mmap=True))
+
+    names = dataset.schema.names
+    if columns is not None:
+        columns = [names[c] if isinstance(c, int) else c for c in columns]
+
+    table = dataset.to_table(columns=columns,
+                             filter=_filter(dataset.schema, patient_col,
+                                            patients, date_cols, start, end))
+    # zero-copy for the primitive columns: pandas wraps the Arrow arrays
+    return table.to_pandas(types_mapper=pd.ArrowDtype)
+
+
+def _filter(schema, patient_col, patients, date_cols, start, end):
+    """
+    The pyarrow.dataset expression of the patient and date filters of
+    `read_events`, or None for no filter.
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    conditions = []
+    if patients is not None:
+        if patient_col is None:
+            raise ValueError('patients needs a patient_col.')
+        if not isinstance(patients, (list, tuple, set, pd.Index, pd.Series)):
+            patients = [patients]
+        conditions.append(ds.field(patient_col).isin(list(patients)))
+    if start is not None or end is not None:
+        if date_cols is None:
+            raise ValueError('start and end need date_cols.')
+        first, last = (date_cols, date_cols) if isinstance(date_cols, str) \
+            else date_cols
+        # interval [first, last] overlaps [start, end]
+        if start is not None:
+            conditions.append(ds.field(last) >= _scalar(
+                start, schema.field(last).type, pa))
+        if end is not None:
+            conditions.append(ds.field(first) <= _scalar(
+                end, schema.field(first).type, pa))
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None \
+            else expression & condition
+    return expression
+
+
+def _scalar(date, arrow_type, pa):
+    """
+    `date` as an Arrow scalar of the type of the column it is compared
+    with, so the comparison can be checked against row-group statistics.
+    """
+    date = pd.Timestamp(date)
+    if pa.types.is_timestamp(arrow_type):
+        if arrow_type.tz is not None and date.tz is None:
+            date = date.tz_localize(arrow_type.tz)
+        elif arrow_type.tz is None and date.tz is not None:
+            date = date.tz_convert('UTC').tz_localize(None)
+    elif pa.types.is_date(arrow_type):
+        date = date.date()
+    return pa.scalar(date, type=arrow_type)
@@ -0,0 +1,589 @@
+"""
+Chart specs: the data preparation of a chart, separated from its drawing.
+
+`prepare` turns the data arguments of a chart into a spec, a plain dict of
+NumPy arrays and a few labels with the chart name under 'chart'. `draw`
+renders a spec with Matplotlib. A spec is small and picklable, so the
+preparation can run in cheap worker processes, and the spec can be cached
+or sent across processes instead of the DataFrame it was computed from.
+
+Preparing uses NumPy and pandas; the gantt and time charts evaluate their
+colour maps with matplotlib.colors, but no figure is created and pyplot is
+not imported.
+
+With `cache=True`, specs are memoized on a content hash of the data (see
+`dynairxvis.cache`), so preparing the same data again is a lookup.
+"""
+from importlib import import_module
+from inspect import signature
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from .cache import _SPEC_CACHE, _nbytes, content_hash
+from .intervals import (to_datetime64, time_bin_edges, interval_bin_counts,
+                        coalesce_intervals)
+
+# chart: (module, function) drawing its spec
+_DRAW = {
+    'calendar': ('.calendar', '_draw_calendar'),
+    'gantt': ('.gantt', '_draw_gantt'),
+    'grouped_chart': ('.time', '_draw_grouped_chart'),
+    'heatmap': ('.heatmap', '_draw_heatmap'),
+    'heatmap_nq': ('.heatmap', '_draw_heatmap_nq'),
+    'pie': ('.pie', '_draw_pie'),
+}
+# chart: (frame argument, arguments naming its columns); only the named
+# columns of the frame are hashed for the cache key
+_FRAME_COLUMNS = {
+    'calendar': ('df', ('y_column', 'x_column')),
+    'heatmap': ('adf', ('date_col', 'y_col')),
+}
+
+
+def prepare(chart, *args, cache=False, **kwargs):
+    """
+    Prepares the data of a chart into a spec.
+
+    Parameters
+    ----------
+    chart : str
+        One of 'calendar', 'gantt', 'grouped_chart', 'line', 'heatmap',
+        'heatmap_nq' or 'pie'.
+    *args, **kwargs
+        The data arguments of the chart:
+
+        - 'calendar': df, y_column, x_column (df may also be an iterable
+          of DataFrame chunks, as for 'heatmap')
+        - 'gantt': categories, start_dates, end_dates, values=None,
+          use_values_as_height=False, colors=None, colors_labels=None,
+          coalesce=False
+        - 'grouped_chart': categories, start_dates, end_dates,
+          chart_type='line', values=None, markers=None,
+          category_colors=None, time_bins=None, count='presence',
+          coalesce=False
+        - 'line': as 'grouped_chart', with chart_type 'line'
+        - 'heatmap': adf, date_col='obsdate', y_col='Disease' (adf may
+          also be an iterable of DataFrame chunks, e.g. from
+          pd.read_csv(chunksize=...), which is consumed one chunk at a
+          time)
+        - 'heatmap_nq': categories, values, bins=None, quantiles=None
+        - 'pie': categories, start_dates, end_dates, min_label_extent=15
+          (the time pie chart)
+    cache : bool, optional
+        If True, the spec is looked up in, or added to, a bounded LRU cache
+        keyed on a content hash of the data and the arguments above, so
+        the same data is prepared only once. The returned spec is then
+        shared and must not be modified. Default is False.
+
+    Returns
+    -------
+    dict
+        The spec, to be passed to `draw`. The specs of 'gantt' and
+        'grouped_chart' report in 'merged' how many intervals `coalesce`
+        merged away.
+
+    Raises
+    ------
+    ValueError
+        If `chart` has no spec support.
+
+    Example
+    -------
+    prepare_heatmap = partial(prepare, 'heatmap', date_col='obsdate',
+                              y_col='Disease')
+    with ProcessPoolExecutor() as executor:
+        specs = list(executor.map(prepare_heatmap, frames))
+    png = draw(specs[0], output='png')
+    """
+    preparers = {
+        'calendar': _prepare_calendar,
+        'gantt': _prepare_gantt,
+        'grouped_chart': _prepare_grouped_chart,
+        'line': _prepare_grouped_chart,
+        'heatmap': _prepare_heatmap,
+        'heatmap_nq': _prepare_heatmap_nq,
+        'pie': _prepare_pie,
+    }
+    if chart not in preparers:
+        raise ValueError(f"Invalid chart '{chart}'. "
+                         f"Choose from {', '.join(preparers)}.")
+    if not cache:
+        return preparers[chart](*args, **kwargs)
+
+    key = _spec_key(chart, preparers[chart], args, kwargs)
+    spec = _SPEC_CACHE.get(key) if key is not None else None
+    if spec is None:
+        spec = preparers[chart](*args, **kwargs)
+        if key is not None:
+            _SPEC_CACHE.put(key, spec, _nbytes(spec))
+    return spec
+
+
+def _spec_key(chart, preparer, args, kwargs):
+    """
+    The cache key of a spec: the chart and a content hash of all the
+    arguments of its preparer, with the defaults filled in. For a chart of
+    a DataFrame only its referenced columns are hashed. None if an argument
+    cannot be hashed.
+    """
+    bound = signature(preparer).bind(*args, **kwargs)
+    bound.apply_defaults()
+    arguments = dict(bound.arguments)
+    if chart in _FRAME_COLUMNS:
+        frame, columns = _FRAME_COLUMNS[chart]
+        names = [arguments[name] for name in columns]
+        try:
+            arguments[frame] = arguments[frame][names]
+        except (KeyError, TypeError):
+            # let the preparer raise its own error
+            return None
+    digest = content_hash(*arguments.values())
+    return None if digest is None else (preparer.__name__, digest)
+
+
+def draw(spec, **kwargs):
+    """
+    Draws a spec made by `prepare`.
+
+    Parameters
+    ----------
+    spec : dict
+        The spec.
+    **kwargs : dict
+        The drawing arguments of the chart, e.g. `ax`, `vectorized`,
+        `fig_kw`, `output`, 'title'.
+
+    Returns
+    -------
+    None, matplotlib.figure.Figure, bytes or np.ndarray
+        Depending on `output`, as for the chart functions.
+    """
+    module, function = _DRAW[spec['chart']]
+    return getattr(import_module(module, __package__), function)(spec,
+                                                                 **kwargs)
+
+
+def _prepare_heatmap(adf, date_col='obsdate', y_col='Disease'):
+    """
+    Counts the events per category (rows) and year (columns), including
+    the years without events.
+    """
+    counts, rows, years, _ = _count_by_year(adf, date_col, y_col)
+    min_year = min(years)
+    columns = list(range(min_year, max(years) + 1))
+    # Place the years with events in the full range of years
+    full = np.zeros((len(rows), len(columns)), dtype=counts.dtype)
+    full[:, np.asarray(years) - min_year] = counts
+    return {'chart': 'heatmap', 'counts': full, 'rows': rows,
+            'columns': columns}
+
+
+def _prepare_calendar(df, y_column, x_column):
+    """
+    Counts the events per category (rows) and year with events (columns).
+    """
+    counts, rows, years, n_events = _count_by_year(df, x_column, y_column)
+    return {'chart': 'calendar', 'counts': counts, 'rows': rows,
+            'columns': years, 'n_events': n_events}
+
+
+def _count_by_year(chunks, date_col, y_col):
+    """
+    Counts the events per category and year of `date_col`.
+
+    Parameters
+    ----------
+    chunks : pd.DataFrame or iterable of pd.DataFrame
+        The events, in one frame or in chunks that are read one at a time,
+        so only a chunk and the count matrix are held in memory.
+    date_col : str
+        The datetime column.
+    y_col : str
+        The category column.
+
+    Raises
+    ------
+    ValueError
+        If a non-empty chunk's `date_col` does not hold datetimes.
+
+    Returns
+    -------
+    tuple
+        - The integer count matrix of shape (categories, years).
+        - The categories, in order of first appearance.
+        - The years with events, in order of first appearance.
+        - The number of events, including those missing a category or
+          a date, which are not counted in the matrix.
+    """
+    if isinstance(chunks, pd.DataFrame):
+        chunks = [chunks]
+    rows, years = {}, {}
+    counts = np.zeros((0, 0), dtype=np.int64)
+    n_events = 0
+    for chunk in chunks:
+        n_events += len(chunk)
+        if not len(chunk):
+            # e.g. the last chunk of a filtered read; its date column may
+            # not even have a datetime dtype
+            continue
+        if not pd.api.types.is_datetime64_any_dtype(chunk[date_col]):
+            raise ValueError(f"{date_col} must be a datetime column.")
+        # missing categories and dates get the code -1
+        cat_codes, cat_values = pd.factorize(chunk[y_col])
+        year_codes, year_values = pd.factorize(chunk[date_col].dt.year)
+        if not len(cat_values) or not len(year_values):
+            # no event has both a category and a date, e.g. all dates NaT
+            continue
+        # the position of each value of the chunk in the whole matrix
+        row_index = [rows.setdefault(v, len(rows)) for v in cat_values]
+        col_index = [years.setdefault(int(v), len(years))
+                     for v in year_values]
+        if counts.shape != (len(rows), len(years)):
+            counts = np.pad(counts, ((0, len(rows) - counts.shape[0]),
+                                     (0, len(years) - counts.shape[1])))
+        keep = (cat_codes >= 0) & (year_codes >= 0)
+        n_years = len(year_values)
+        local = np.bincount(cat_codes[keep] * n_years + year_codes[keep],
+                            minlength=len(cat_values) * n_years)
+        counts[np.ix_(row_index, col_index)] += local.reshape(-1, n_years)
+    # drop the categories and years seen only next to a missing value
+    used_rows = counts.any(axis=1)
+    used_years = counts.any(axis=0)
+    return (counts[np.ix_(used_rows, used_years)],
+            [v for v, used in zip(rows, used_rows) if used],
+            [v for v, used in zip(years, used_years) if used], n_events)
+
+
+def _prepare_heatmap_nq(categories, values, bins=None, quantiles=None):
+    unique_categories, unique_values, matrix = _count_matrix(
+        categories, values, bins=bins, quantiles=quantiles)
+    return {'chart': 'heatmap_nq', 'counts': matrix,
+            'rows': unique_categories, 'columns': unique_values}
+
+
+def _count_matrix(categories, values, bins=None, quantiles=None):
+    """
+    Counts how often each value occurs per category.
+
+    Categories and values are factorized once and counted with a single
+    np.bincount over the combined (category, value) index, so the cost is
+    linear in the number of values.
+
+    Parameters
+    ----------
+    categories : list of str
+        The category of each entry of `values`.
+    values : list
+        Values, or lists of values, one entry per category.
+    bins : int or sequence of scalars, optional
+        Equal-width bin count or bin edges for quantitative values.
+    quantiles : int, optional
+        Number of quantile bins for quantitative values.
+
+    Returns
+    -------
+    tuple
+        - The sorted unique categories (rows).
+        - The sorted unique values or value bins (columns).
+        - The integer count matrix of shape (categories, values).
+    """
+    # One row per value; lists of values are expanded in one go
+    values = pd.Series(values).reset_index(drop=True)
+    flat_categories = pd.Series(categories).reset_index(drop=True)
+    if values.dtype == object and values.map(
+            lambda v: isinstance(v, list)).any():
+        flat = pd.Series(values.to_numpy(), index=flat_categories.to_numpy(),
+                         dtype=object).explode()
+        flat_categories = pd.Series(flat.index)
+        values = pd.Series(flat.to_numpy())
+
+    cat_codes, unique_categories = pd.factorize(flat_categories, sort=True)
+    if bins is not None:
+        binned = pd.cut(values.astype(float), bins)
+    elif quantiles is not None:
+        binned = pd.qcut(values.astype(float), quantiles,
+                         duplicates='drop')
+    else:
+        binned = None
+
+    if binned is None:
+        val_codes, unique_values = pd.factorize(values, sort=True)
+    else:
+        val_codes = binned.cat.codes.to_numpy()
+        unique_values = binned.cat.categories.astype(str)
+
+    # drop missing values (and values outside the bins)
+    keep = (cat_codes >= 0) & (val_codes >= 0)
+    n_values = len(unique_values)
+    matrix = np.bincount(cat_codes[keep] * n_values + val_codes[keep],
+                         minlength=len(unique_categories) * n_values)
+    matrix = matrix.reshape(len(unique_categories), n_values)
+    return list(unique_categories), list(unique_values), matrix
+
+
+def _prepare_gantt(categories, start_dates, end_dates, values=None,
+                   use_values_as_height=False, colors=None,
+                   colors_labels=None, coalesce=False):
+    """
+    Resolves the row, interval, height and colour of every bar and the
+    entries of the legend. With `coalesce`, the intervals of a category
+    with the same colour key are merged first (see `_coalesce`).
+    """
+    from matplotlib import cm
+    from matplotlib.colors import to_rgba_array
+    from .utils import get_color_palette
+
+    n = len(categories)
+    codes, labels = pd.factorize(pd.Series(categories), sort=False)
+    is_numeric = (values is not None and
+                  pd.api.types.is_numeric_dtype(pd.Series(values)))
+    heights = np.full(n, 0.8)
+    legend = None
+    legend_labels, legend_colors, legend_widths = [], None, None
+
+    if values is None:
+        colors_arr = np.tile(cm.Greys(0.8), (n, 1))  # Gray color
+        color_keys = np.asarray(categories, dtype=object)
+    elif is_numeric:
+        values_arr = np.asarray(values, dtype=float)
+        min_value, max_value = values_arr.min(), values_arr.max()
+        value_range = max_value - min_value
+        if use_values_as_height:
+            # Scale values for height
+            def height_scaling(x): return 0.1 + 0.3 * (x - min_value) / \
+                value_range if value_range != 0 else 0.4
+            heights = np.asarray(height_scaling(values_arr), dtype=float)
+            heights = np.broadcast_to(heights, (n,)).copy()
+            colors_arr = np.tile(to_rgba_array('gray')[0], (n, 1))
+            color_keys = np.asarray(categories, dtype=object)
+            # Legend lines whose widths represent the heights
+            height_values = sorted(set(values))
+            legend = 'heights'
+            legend_labels = [f'{v:.2f}' for v in height_values]
+            legend_widths = [height_scaling(v) * 20 for v in height_values]
+        else:
+            # Use values as hue for colors
+            scaled = ((values_arr - min_value) / value_range
+                      if value_range != 0 else np.zeros(n))
+            colors_arr = cm.Greys(0.2 + 0.6 * scaled)
+            color_keys = np.asarray(values, dtype=object)
+    else:
+        value_codes, unique_values = pd.factorize(pd.Series(values),
+                                                  sort=False)
+        palette = np.asarray(get_color_palette(len(unique_values)))
+        colors_arr = palette[value_codes]
+        color_keys = np.asarray(values, dtype=object)
+
+    # if colors are provided, use them
+    if colors:
+        colors_arr = to_rgba_array(list(colors))
+        color_keys = np.asarray(colors_labels if colors_labels is not None
+                                else colors, dtype=object)
+
+    # One legend entry per colour key, in order of first appearance
+    if colors or (values is not None and not use_values_as_height):
+        _, first = np.unique(pd.factorize(pd.Series(color_keys))[0],
+                             return_index=True)
+        if colors:
+            legend = 'colors'
+            first = sorted(first, key=lambda i: color_keys[i])
+        else:
+            legend = 'values'
+        legend_labels = list(color_keys[first])
+        legend_colors = colors_arr[first]
+
+    starts, ends = to_datetime64(start_dates), to_datetime64(end_dates)
+    colors_arr = np.asarray(colors_arr, dtype=float)
+    merged = 0
+    if coalesce:
+        # a bar keeps its colour and height: intervals are only merged
+        # with those of the same category, colour and height
+        _, keys = np.unique(np.column_stack([codes, heights, colors_arr]),
+                            axis=0, return_inverse=True)
+        index, starts, ends, merged = _coalesce(keys.ravel(), starts, ends,
+                                                coalesce)
+        codes, heights, colors_arr = (codes[index], heights[index],
+                                      colors_arr[index])
+
+    return {'chart': 'gantt', 'codes': codes, 'labels': list(labels),
+            'starts': starts, 'ends': ends, 'heights': heights,
+            'colors': colors_arr, 'legend': legend,
+            'legend_labels': legend_labels, 'legend_colors': legend_colors,
+            'legend_widths': legend_widths, 'merged': merged}
+
+
+def _coalesce(codes, starts, ends, coalesce):
+    """
+    coalesce_intervals() with the gap given by the `coalesce` argument of
+    the charts: True for 0 (overlapping or touching intervals), else a
+    timedelta-like gap tolerance.
+    """
+    return coalesce_intervals(codes, starts, ends,
+                              gap=0 if coalesce is True else coalesce)
+
+
+def _prepare_grouped_chart(categories, start_dates, end_dates,
+                           chart_type='line', values=None, markers=None,
+                           category_colors=None, time_bins=None,
+                           count='presence', coalesce=False):
+    """
+    Resolves the row, interval and style of every category and, for the
+    'heatmap' chart type, the category x time bin count matrix. With
+    `coalesce`, the intervals of each category are merged first.
+    """
+    if isinstance(categories, pd.Series):
+        categories = categories.tolist()
+    codes, labels = pd.factorize(pd.Series(categories, dtype=object),
+                                 sort=False)
+    labels = list(labels)
+    colors = _category_colors(categories, labels, values, category_colors)
+
+    default_markers = ['o', '^', 's', '*', '+', 'x', 'D', 'h']
+    if chart_type == 'line' and markers is None:
+        # use the same marker for all categories
+        category_markers = ['o'] * len(labels)
+    else:
+        # markers cycle over the rows; the last row of a category wins
+        last_rows = dict(zip(categories, range(len(categories))))
+        category_markers = [default_markers[last_rows[cat] %
+                                            len(default_markers)]
+                            for cat in labels]
+
+    starts, ends = to_datetime64(start_dates), to_datetime64(end_dates)
+    merged = 0
+    if coalesce:
+        # the style is per category, so only the intervals change
+        index, starts, ends, merged = _coalesce(codes, starts, ends,
+                                                coalesce)
+        codes = codes[index]
+
+    spec = {'chart': 'grouped_chart', 'chart_type': chart_type,
+            'codes': codes, 'labels': labels, 'starts': starts,
+            'ends': ends, 'colors': colors, 'markers': category_markers,
+            'has_values': values is not None, 'colorbar': None,
+            'value_labels': None, 'value_colors': None, 'merged': merged}
+
+    if values is not None:
+        if isinstance(values, list):
+            values = pd.Series(values)
+        if pd.api.types.is_numeric_dtype(values):
+            # The range of the colorbar
+            spec['colorbar'] = (values.min(), values.max())
+        elif isinstance(values.dtype, pd.CategoricalDtype):
+            # A legend entry per value, coloured as the category of its
+            # first row
+            value_list = values.tolist()
+            unique_values = pd.Categorical(values).categories
+            spec['value_labels'] = unique_values.tolist()
+            spec['value_colors'] = [
+                colors[labels.index(categories[value_list.index(val)])]
+                for val in unique_values]
+
+    if chart_type == 'heatmap':
+        starts, ends = spec['starts'], spec['ends']
+        min_date, max_date = starts.min(), ends.max()
+        if time_bins is None:
+            # Determine time bins
+            total_days = (max_date - min_date) // np.timedelta64(1, 'D')
+            # Increase num_bins based on total duration in days for better
+            # granularity
+            # Example: ~1 bin per month if possible
+            num_bins = max(10, total_days // 30)
+            edges = np.linspace(min_date.astype(np.int64),
+                                max_date.astype(np.int64), num_bins + 1)
+            edges = edges.astype(np.int64).astype('datetime64[ns]')
+        else:
+            # True calendar days, weeks, months or years
+            edges = time_bin_edges(min_date, max_date, time_bins)
+        spec.update(counts=interval_bin_counts(codes, len(labels), starts,
+                                               ends, edges, count=count),
+                    edges=edges, time_bins=time_bins)
+    return spec
+
+
+def _category_colors(categories, labels, values, category_colors):
+    """
+    The colour of each category in `labels`: a shade of grey from
+    `values` (the last value of a category decides), uniform grey, or
+    the given `category_colors` in category order.
+    """
+    from matplotlib import cm
+
+    if category_colors is not None:
+        # Use provided category colors if specified
+        provided = dict(zip(labels, category_colors))
+        return [provided[cat] for cat in labels]
+    if values is None:
+        # Default to uniform grayscale if no values are provided
+        return [cm.Greys(0.8)] * len(labels)
+
+    # Handle numeric and ordinal values
+    if isinstance(values, list):
+        values = pd.Series(values)
+    if pd.api.types.is_numeric_dtype(values):
+        if values.max() == values.min():
+            normalized_values = pd.Series([0.9] * len(values))
+        else:
+            normalized_values = (values - values.min()) / (
+                values.max() - values.min())
+    elif isinstance(values.dtype, pd.CategoricalDtype):
+        # Attempt to convert to ordered categorical if it's not numeric
+        try:
+            values = pd.Categorical(values, ordered=True)
+            numeric_values = values.codes
+            normalized_values = (
+                numeric_values - numeric_values.min()) / (
+                    numeric_values.max() - numeric_values.min())
+        except Exception as e:
+            warnings.warn("Failed to convert values to ordered " +
+                          f"categorical. {str(e)}")
+            return [cm.Greys(0.8)] * len(labels)
+    else:
+        warnings.warn("'values' must be numeric or ordered categorical to " +
+                      "use for color scaling. Defaulting to grayscale.")
+        normalized_values = np.linspace(0.2, 0.8, len(categories))
+
+    # The colormap is applied once to the whole array; the last value of a
+    # category decides its color
+    grays = cm.Greys(0.2 + 0.6 * np.asarray(normalized_values, dtype=float))
+    last_rows = dict(zip(categories, range(len(categories))))
+    return [tuple(grays[last_rows[cat]]) for cat in labels]
+
+
+def _prepare_pie(categories, start_dates, end_dates, min_label_extent=15):
+    """
+    Computes the wedge angles of every interval from int64 timestamps in
+    one pass, and the position and date label of the wedges spanning at
+    least `min_label_extent` degrees.
+    """
+    codes, labels = pd.factorize(pd.Series(categories, dtype=object),
+                                 sort=False)
+    starts = to_datetime64(start_dates)
+    ends = to_datetime64(end_dates)
+    # Base date for normalization and plotting
+    min_ns = starts.astype(np.int64).min()
+    total_ns = ends.astype(np.int64).max() - min_ns
+    start_angles = (starts.astype(np.int64) - min_ns) / total_ns * 360
+    extents = (ends.astype(np.int64) - starts.astype(np.int64)) / \
+        total_ns * 360
+
+    # Same angles as ax.pie(startangle=start_angle + 90, counterclock=False)
+    theta2 = 90 + start_angles
+    theta1 = theta2 - extents
+
+    # Label only the wedges wide enough to hold the dates
+    labelled = extents >= min_label_extent
+    mid = np.deg2rad((theta1[labelled] + theta2[labelled]) / 2)
+    label_text = np.full(len(codes), '', dtype=object)
+    label_text[labelled] = np.char.add(
+        np.char.add(np.datetime_as_string(starts[labelled], unit='D'), '\n'),
+        np.datetime_as_string(ends[labelled], unit='D'))
+    label_x = np.full(len(codes), np.nan)
+    label_y = np.full(len(codes), np.nan)
+    label_x[labelled] = 0.8 * np.cos(mid)
+    label_y[labelled] = 0.8 * np.sin(mid)
+    return {'chart': 'pie', 'codes': codes, 'labels': list(labels),
+            'theta1': theta1, 'theta2': theta2, 'labelled': labelled,
+            'label_x': label_x, 'label_y': label_y, 'label_text': label_text}
@@ -0,0 +1,151 @@
+"""
+Reusable figure templates for rendering the same chart layout many times.
+
+Building a figure, its axes and their tick machinery, and then running
+tight_layout, costs about as much as drawing a small chart. In batch runs
+the layout is the same for every patient, so a template keeps one figure
+per chart type and figure size: each render only removes the previous
+data artists, draws the new ones on the same axes and encodes the result
+with the layout computed on the first render.
+
+Templates are kept per process and are not thread-safe.
+"""
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.category import UnitData
+from matplotlib.figure import Figure
+from matplotlib.transforms import Bbox
+
+from .calendar import calendar
+from .gantt import gantt
+from .heatmap import heatmap, heatmap_nq, chart_w, chart_h
+from .time import line
+from .utils import FIG_SIZE, _render_output
+
+# Charts that draw on a given ax, and so can be rendered on a template
+TEMPLATE_CHARTS = {
+    'calendar': calendar,
+    'gantt': gantt,
+    'heatmap': heatmap,
+    'heatmap_nq': heatmap_nq,
+    'line': line,
+}
+_TEMPLATES = {}
+
+
+def render_template(chart, *args, fig_kw={}, output='png', relayout=False,
+                    **kwargs):
+    """
+    Renders a chart on a cached figure built once per chart type and
+    figure settings.
+
+    Parameters
+    ----------
+    chart : str
+        One of 'calendar', 'gantt', 'heatmap', 'heatmap_nq' or 'line'.
+    *args : tuple
+        Positional arguments of the chart function.
+    fig_kw : dict, optional
+        Keyword arguments for the Figure, e.g. ``{'figsize': (8, 4)}``.
+        Each distinct value gets its own template.
+    output : str, optional
+        'png' (default), 'svg' or 'rgba' for the encoded image, or 'figure'
+        for the template Figure itself, which the next render of the same
+        template will overwrite.
+    relayout : bool, optional
+        The layout (tight_layout) is computed on the first render of a
+        template and reused afterwards. Pass True to compute it again,
+        e.g. when tick labels got much longer. Default is False.
+    **kwargs : dict
+        Keyword arguments of the chart function.
+
+    Returns
+    -------
+    bytes, np.ndarray or matplotlib.figure.Figure
+        Depending on `output`.
+
+    Raises
+    ------
+    ValueError
+        If `chart` has no template support.
+
+    Example
+    -------
+    for patient, group in df.groupby('patient_id'):
+        png = render_template('gantt', group['Condition'], group['Start'],
+                              group['End'], fig_kw={'figsize': (8, 4)})
+    """
+    if chart not in TEMPLATE_CHARTS:
+        raise ValueError(f"Invalid chart '{chart}'. "
+                         f"Choose from {', '.join(TEMPLATE_CHARTS)}.")
+    fig, ax, first = _get_template(chart, fig_kw)
+    TEMPLATE_CHARTS[chart](*args, ax=ax, fig_kw=fig_kw, output='figure',
+                           **kwargs)
+    if first or relayout:
+        fig.tight_layout()
+        # Keep the resulting subplot parameters but drop the layout engine
+        # tight_layout leaves behind, which would make every savefig() draw
+        # the figure twice
+        fig.set_layout_engine(None)
+    return _render_output(fig, output, close=False)
+
+
+def clear_templates():
+    """
+    Drops every cached template figure.
+    """
+    _TEMPLATES.clear()
+
+
+def _get_template(chart, fig_kw):
+    """
+    Returns ``(fig, ax, first)`` for `chart` and `fig_kw`, where `ax` has
+    been emptied of the previous render and `first` tells whether the
+    template was just built.
+    """
+    key = (chart, repr(sorted(fig_kw.items())))
+    if key not in _TEMPLATES:
+        default_fig_kw = ({'figsize': (chart_w, chart_h)}
+                          if chart == 'heatmap' else FIG_SIZE.copy())
+        default_fig_kw.update(fig_kw)
+        # calendar reads its axis labels from fig_kw, they are not
+        # Figure arguments
+        for axis_key in ['xlabel', 'ylabel', 'title']:
+            default_fig_kw.pop(axis_key, None)
+        # A pyplot-free figure: nothing is registered with or shown by
+        # pyplot, and the Agg canvas renders it in memory
+        fig = Figure(**default_fig_kw)
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot()
+        _TEMPLATES[key] = (fig, ax, ax.get_subplotspec())
+        return fig, ax, True
+
+    fig, ax, subplotspec = _TEMPLATES[key]
+    _clear_axes(fig, ax, subplotspec)
+    return fig, ax, False
+
+
+def _clear_axes(fig, ax, subplotspec):
+    """
+    Removes the data artists, legends and colorbars of the previous render
+    while keeping the axes, their tick machinery and the figure layout.
+    """
+    # Colorbars take their space from ax; give it back. This goes first,
+    # as removing a colorbar looks up the axes of its image.
+    for other in fig.axes:
+        if other is not ax:
+            other.remove()
+    ax.set_subplotspec(subplotspec)
+    for artists in [ax.collections, ax.patches, ax.lines, ax.texts,
+                    ax.images, ax.artists, ax.tables]:
+        for artist in list(artists):
+            artist.remove()
+    ax.containers.clear()
+    if ax.get_legend() is not None:
+        ax.get_legend().remove()
+    # Category positions, data limits and fixed limits start afresh
+    for axis in [ax.xaxis, ax.yaxis]:
+        if isinstance(axis.units, UnitData):
+            axis.set_units(UnitData())
+    ax.dataLim.set_points(Bbox.null().get_points())
+    ax.ignore_existing_data_limits = True
+    ax.set_autoscale_on(True)
@@ -1,14 +1,26 @@
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
+from matplotlib.cm import ScalarMappable
+from matplotlib.collections import LineCollection
+from matplotlib.colors import Normalize
+from matplotlib.lines import Line2D
 import numpy as np
 import pandas as pd
-import itertools
-from .utils import FIG_SIZE
+from .instrument import _instrumented, _phase
+from .specs import prepare
+from .utils import FIG_SIZE, _dates_to_num, _render_output, _subplots
 
+# Line2D properties of the markers, see _plot_scatter_or_line_batched
+_MARKER_KEYS = {'marker', 'markersize', 'ms', 'markerfacecolor', 'mfc',
+                'markeredgecolor', 'mec', 'markeredgewidth', 'mew',
+                'markerfacecoloralt', 'mfcalt', 'fillstyle', 'markevery'}
 
+
+@_instrumented('grouped_chart')
 def grouped_chart(categories, start_dates, end_dates, chart_type='line',
                   values=None, markers=None, ax=None, fig_kw={},
-                  plot_kw={}, **kwargs):
+                  plot_kw={}, output='show', cache=False, vectorized=False,
+                  **kwargs):
     """
     Creates and displays a grouped chart (line, scatter, or Gantt)
     based on the provided data.
@@ -18,9 +30,11 @@ def grouped_chart(categories, start_dates, end_dates, chart_type='line',
     categories : list of str
         Categories or names.
     start_dates : list of datetime
-        Start dates for each task.
+        Start dates for each task. A datetime64 or int64 (nanoseconds since
+        the epoch) array or a timezone-aware column is also accepted, and
+        converted to Matplotlib date numbers in one vectorised pass.
     end_dates : list of datetime
-        End dates for each task.
+        End dates for each task, as `start_dates`.
     chart_type : str, optional
         Type of chart to create ('line', 'scatter', 'gantt').
         Default is 'line'.
@@ -39,11 +53,39 @@ def grouped_chart(categories, start_dates, end_dates, chart_type='line',
     plot_kw : dict, optional
         Keyword arguments for ax.plot()/ax.scatter()/ax.barh()
         to customize the chart.
+    output : str, optional
+        'show' (default) displays the chart, 'figure' returns the Figure
+        and 'png', 'svg' or 'rgba' return the rendered image without
+        touching the screen or the filesystem.
+    cache : bool, optional
+        If True, the grouped categories, colours and (for 'heatmap') the
+        count matrix are memoized on a content hash of the data and of
+        the data-affecting arguments, so redrawing the same data skips
+        them. Default is False.
+    vectorized : bool, optional
+        If True, 'line' and 'scatter' charts draw each category with a
+        single LineCollection and/or a single ax.scatter() call instead of
+        one artist per interval. `plot_kw` is then passed to those
+        artists, except that the marker keys of a line chart ('marker',
+        'markersize', ...) style markers at the interval ends, as with
+        ax.plot(). Keys a LineCollection does not take raise a
+        ValueError. Default is False.
     **kwargs : dict
         Additional keyword arguments for customization not related
         to ax.plot()/ax.scatter()/ax.barh().
         This includes 'xlabel', 'title', any axis formatter settings,
-        and 'legend'.
+        and 'legend'. For 'heatmap', 'time_bins' ('D', 'W', 'M' or 'Y')
+        bins the intervals by calendar day, week, month or year, and
+        'count' ('presence' or 'overlap') sets whether a cell shows 0/1
+        or the number of intervals overlapping it. Bins are half-open,
+        [edge, next edge): an interval starting exactly on an edge is
+        counted from the bin that edge opens, no longer from the bin
+        before it, and a zero-length interval counts in the bin holding
+        its date instead of being dropped. The rows are centred on the
+        category ticks. 'coalesce' (True, or a
+        timedelta-like gap such as '1D') merges the overlapping, touching
+        or (up to the gap) nearby intervals of each category before
+        drawing; see dynairxvis.intervals.coalesce_intervals.
 
     Examples
     --------
@@ -67,96 +109,158 @@ def grouped_chart(categories, start_dates, end_dates, chart_type='line',
                           ('end_dates', end_dates),
                           ('values', values),
                           ('markers', markers)]:
-        if var is not None and not isinstance(var, (list, pd.Series)):
-            print(f"Error: '{var_name}' must be a list or a Pandas Series.")
+        if var is not None and not isinstance(
+                var, (list, np.ndarray, pd.Series, pd.Index)):
+            print(f"Error: '{var_name}' must be a list, a NumPy array or a "
+                  "Pandas Series.")
             return
 
-    if isinstance(categories, pd.Series):
-        categories = categories.tolist()
+    spec = prepare(
+        'grouped_chart', categories, start_dates, end_dates,
+        chart_type=chart_type, values=values, markers=markers,
+        category_colors=kwargs.get('category_colors'),
+        time_bins=kwargs.get('time_bins'),
+        count=kwargs.get('count', 'presence'),
+        coalesce=kwargs.get('coalesce', False), cache=cache)
+    return _draw_grouped_chart(spec, ax=ax, vectorized=vectorized,
+                               fig_kw=fig_kw, plot_kw=plot_kw, output=output,
+                               **kwargs)
 
-    # Set default figure properties
-    default_fig_kw = FIG_SIZE
-    default_fig_kw.update(fig_kw)
-    if ax is None:
-        fig, ax = plt.subplots(**default_fig_kw)
 
-    unique_cats = sorted(set(categories), key=categories.index)
-    category_colors = _get_cat_cols(categories, values, kwargs)
+def _draw_grouped_chart(spec, ax=None, fig_kw={}, plot_kw={}, output='show',
+                        vectorized=False, **kwargs):
+    """
+    Draws a grouped_chart spec (see dynairxvis.specs). The arguments are
+    those of `grouped_chart`.
+    """
+    chart_type = spec['chart_type']
+    unique_cats = spec['labels']
+    codes = spec['codes']
+    category_colors = spec['colors']
+    category_markers = spec['markers']
 
-    # category_colors = kwargs.get('category_colors',
-    #                              {cat: color for cat, color in zip(
-    #                                  unique_cats, gray_color_palette)})
-    default_markers = ['o', '^', 's', '*', '+', 'x', 'D', 'h']
-    marker_cycle = itertools.cycle(default_markers)
-    if chart_type == 'line' and markers is None:
-        # use the same marker for all categories
-        category_markers = {cat: 'o' for cat in unique_cats}
-    else:
-        category_markers = {cat: marker for cat,
-                            marker in zip(categories, marker_cycle)}
+    # Set default figure properties, without modifying FIG_SIZE
+    default_fig_kw = {**FIG_SIZE, **fig_kw}
+    # Only a figure created here is closed once it has been encoded
+    own_figure = ax is None
+    _phase('draw_artists')
+    if ax is None:
+        fig, ax = _subplots(output=output, **default_fig_kw)
 
-    # To keep track of which categories have been plotted
-    plotted_cats = set()
-    category_positions = {cat: i + 1 for i, cat in enumerate(unique_cats)}
+    # The dates are converted to Matplotlib date numbers once, for all rows
+    starts = _dates_to_num(spec['starts'])
+    ends = _dates_to_num(spec['ends'])
 
     # Function to plot scatter and line plots
     def _plot_scatter_or_line():
-        for start, end, cat in zip(start_dates, end_dates, categories):
-            position = category_positions[cat]
-            color = category_colors[cat]
-            marker = category_markers[cat]
-            if 'color' not in plot_kw:  # Prevent conflict
-                plot_kw['color'] = color
+        # To keep track of which categories have been plotted
+        plotted = np.zeros(len(unique_cats), dtype=bool)
+        ax.xaxis_date()
+        for start, end, code in zip(starts, ends, codes):
+            cat = unique_cats[code]
+            position = code + 1
+            marker = category_markers[code]
+            label = cat if not plotted[code] else ""
+            # Prevent conflict, without mutating the caller's plot_kw
+            cat_plot_kw = {'color': category_colors[code]}
+            cat_plot_kw.update(plot_kw)
             if chart_type == 'scatter':
                 ax.scatter([start, end], [position, position], marker=marker,
-                           **plot_kw,
-                           label=cat if cat not in plotted_cats else "")
+                           **cat_plot_kw, label=label)
             elif chart_type == 'line':
                 if start == end:
                     # Plot a point if start and end dates are the same
                     ax.scatter([start, end], [position, position],
-                               marker=marker, **plot_kw,
-                               label=cat if cat not in plotted_cats else "")
+                               marker=marker, **cat_plot_kw, label=label)
                 else:
                     ax.plot([start, end], [position, position],
-                            **plot_kw,
-                            label=cat if cat not in plotted_cats else "")
-            plotted_cats.add(cat)
+                            **cat_plot_kw, label=label)
+            plotted[code] = True
 
-    def _plot_heatmap():
-        # Determine time bins
-        min_date, max_date = min(start_dates), max(end_dates)
-        total_days = (max_date - min_date).days
-        # Increase num_bins based on total duration in days for better
-        # granularity
-        # Example: ~1 bin per month if possible
-        num_bins = max(10, total_days // 30)
-
-        time_bins = np.linspace(mdates.date2num(min_date),
-                                mdates.date2num(max_date), num_bins + 1)
-
-        # Create heatmap data
-        heatmap_data = np.zeros((len(unique_cats), num_bins))
-        for start, end, cat in zip(start_dates, end_dates, categories):
-            cat_idx = unique_cats.index(cat)
-            start_idx = np.searchsorted(time_bins, mdates.date2num(start)) - 1
-            end_idx = np.searchsorted(time_bins, mdates.date2num(end)) - 1
-            # Fill all bins between start_idx and end_idx
-            heatmap_data[cat_idx,
-                         max(0, start_idx):min(end_idx + 1, num_bins)] = 1
+    # Batched version: one LineCollection and/or one scatter per category
+    def _plot_scatter_or_line_batched():
+        # The marker keys of ax.plot() do not apply to a LineCollection:
+        # they go to the markers drawn at the interval ends and points
+        marker_kw = {key: value for key, value in plot_kw.items()
+                     if chart_type == 'line' and key in _MARKER_KEYS}
+        if chart_type == 'line':
+            unsupported = [key for key in plot_kw
+                           if key not in _MARKER_KEYS and key != 'color' and
+                           not hasattr(LineCollection, f'set_{key}')]
+            if unsupported:
+                raise ValueError(
+                    f"plot_kw {', '.join(map(repr, unsupported))} not "
+                    "supported by the vectorized line chart.")
+        order = np.argsort(codes, kind='stable')
+        bounds = np.cumsum(np.bincount(codes,
+                                       minlength=len(unique_cats)))[:-1]
+        for code, rows in enumerate(np.split(order, bounds)):
+            cat = unique_cats[code]
+            position = code + 1
+            cat_plot_kw = {key: value for key, value in plot_kw.items()
+                           if key not in marker_kw}
+            color = cat_plot_kw.pop('color', category_colors[code])
+            if chart_type == 'scatter':
+                x = np.concatenate([starts[rows], ends[rows]])
+                ax.scatter(x, np.full(len(x), position),
+                           marker=category_markers[code], color=color,
+                           label=cat, **cat_plot_kw)
+                continue
+            # Zero-length intervals are drawn as points, the rest as segments
+            is_point = starts[rows] == ends[rows]
+            label = cat
+            segment_rows = rows[~is_point]
+            if len(segment_rows):
+                segments = np.empty((len(segment_rows), 2, 2))
+                segments[:, 0, 0] = starts[segment_rows]
+                segments[:, 1, 0] = ends[segment_rows]
+                segments[:, :, 1] = position
+                ax.add_collection(LineCollection(segments, colors=color,
+                                                 label=label, **cat_plot_kw),
+                                  autolim=False)
+                label = '_nolegend_'
+                if 'marker' in marker_kw:
+                    # as ax.plot(), a marker at both ends of each segment
+                    x = np.concatenate([starts[segment_rows],
+                                        ends[segment_rows]])
+                    ax.plot(x, np.full(len(x), position), linestyle='none',
+                            color=color, **marker_kw)
+            if is_point.any():
+                x = starts[rows[is_point]]
+                if marker_kw:
+                    ax.plot(x, np.full(len(x), position), linestyle='none',
+                            color=color, label=label,
+                            **{'marker': category_markers[code],
+                               **marker_kw})
+                else:
+                    ax.scatter(x, np.full(len(x), position),
+                               marker=category_markers[code], color=color,
+                               label=label, **cat_plot_kw)
+        # Data limits are known from the arrays, no need to measure the paths
+        if len(codes):
+            ax.update_datalim([(min(starts.min(), ends.min()), 1),
+                               (max(starts.max(), ends.max()),
+                                len(unique_cats))])
+            ax.autoscale_view()
 
-        # Plotting the heatmap
-        ax.imshow(heatmap_data, aspect='auto', cmap='Greys',
-                  extent=[mdates.num2date(time_bins[0]),
-                          mdates.num2date(time_bins[-1]), 0,
-                          len(unique_cats)], origin='lower',
-                  interpolation='nearest')
+    def _plot_heatmap():
+        # Plotting the heatmap, rows centred on the category ticks
+        x_edges = _dates_to_num(spec['edges'])
+        if spec['time_bins'] is None:
+            ax.imshow(spec['counts'], aspect='auto', cmap='Greys',
+                      extent=[x_edges[0], x_edges[-1], 0.5,
+                              len(unique_cats) + 0.5], origin='lower',
+                      interpolation='nearest')
+        else:
+            # calendar bins have unequal widths, so use a mesh over the edges
+            ax.pcolormesh(x_edges, np.arange(len(unique_cats) + 1) + 0.5,
+                          spec['counts'], cmap='Greys')
         # fig.colorbar(cax, ax=ax)
-        ax.set_yticks(np.arange(len(unique_cats)))
-        ax.set_yticklabels(unique_cats)
-        ax.xaxis_date()
 
-    if chart_type == 'scatter' or chart_type == 'line':
+    batched = vectorized and chart_type != 'heatmap'
+    if batched:
+        _plot_scatter_or_line_batched()
+    elif chart_type == 'scatter' or chart_type == 'line':
         _plot_scatter_or_line()
     elif chart_type == 'heatmap':
         _plot_heatmap()
@@ -164,105 +268,45 @@ def grouped_chart(categories, start_dates, end_dates, chart_type='line',
     # Common plot settings
     ax.set_yticks(range(1, len(unique_cats) + 1))
     ax.set_yticklabels(unique_cats)
-    ax.xaxis_date()
+    if batched:
+        # The artists hold date numbers already. Registering a date converter
+        # would make Matplotlib convert every segment at draw time.
+        ax.xaxis.set_major_locator(mdates.AutoDateLocator())
+    else:
+        ax.xaxis_date()
     ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y'))
     ax.set_xlabel(kwargs.get('xlabel', 'Date'))
     ax.set_ylabel(kwargs.get('ylabel', 'Categories'))
     ax.set_title(kwargs.get('title', f'{chart_type.capitalize()} Chart'))
 
-    if values is not None:
-        # Handle numeric and ordinal values
-        # Check if values are numeric; if not, try converting them
-        if isinstance(values, list):
-            values = pd.Series(values)
-        if pd.api.types.is_numeric_dtype(values):
-            # Create a colorbar if values are used for coloring
-            sm = plt.cm.ScalarMappable(
-                cmap=plt.cm.Greys,
-                norm=plt.Normalize(vmin=values.min(), vmax=values.max()))
-            sm._A = []  # Fake up the array of the scalar mappable.
-            cbar = plt.colorbar(sm, ax=ax)
-            cbar.set_label('Value Scale')
-        elif isinstance(values.dtype, pd.CategoricalDtype):
-            # Generate a legend based on the unique "values"
-            unique_values = pd.Categorical(values).categories
-            value_to_category_map = {
-                val: categories[values.tolist().index(val)]
-                for val in unique_values}
-            handles = [
-                plt.Line2D([0], [0],
-                           color=category_colors[value_to_category_map[val]],
-                           lw=4) for val in unique_values]
-
-            # Convert unique_values to a list
-            unique_values_list = unique_values.tolist()
-            ax.legend(handles=handles, labels=unique_values_list,
-                      title="Values", loc="best")
-    elif kwargs.get('legend', False) and chart_type != 'heatmap':
+    _phase('legend')
+    if spec['colorbar'] is not None:
+        # Create a colorbar if values are used for coloring
+        vmin, vmax = spec['colorbar']
+        sm = ScalarMappable(cmap='Greys',
+                            norm=Normalize(vmin=vmin, vmax=vmax))
+        sm._A = []  # Fake up the array of the scalar mappable.
+        cbar = ax.figure.colorbar(sm, ax=ax)
+        cbar.set_label('Value Scale')
+    elif spec['value_labels'] is not None:
+        # Generate a legend based on the unique "values"
+        handles = [Line2D([0], [0], color=color, lw=4)
+                   for color in spec['value_colors']]
+        ax.legend(handles=handles, labels=spec['value_labels'],
+                  title="Values", loc="best")
+    elif (not spec['has_values'] and kwargs.get('legend', False) and
+          chart_type != 'heatmap'):
         # Standard category legend
         ax.legend(title="Categories", loc="best")
+    if output != 'show':
+        return _render_output(ax.figure, output, close=own_figure)
     if ax is None:
         plt.tight_layout()
         plt.show()
         plt.close('all')
 
 
-def _get_cat_cols(categories, values, kwargs):
-    unique_cats = sorted(set(categories), key=categories.index)
-    # Color and marker setup
-    # gray_color_palette = plt.cm.Greys(
-    #     np.linspace(0.2, 0.8, len(unique_cats)))
-    # gray_color_palette = 'black'
-    # Check for user-provided category colors in kwargs
-    category_colors = kwargs.get('category_colors')
-
-    if category_colors is None:
-        if values is not None:
-            # Handle numeric and ordinal values
-            # Check if values are numeric; if not, try converting them
-            if isinstance(values, list):
-                values = pd.Series(values)
-            if pd.api.types.is_numeric_dtype(values):
-                if values.max() == values.min():
-                    normalized_values = pd.Series([0.9] * len(values))
-                else:
-                    normalized_values = (values - values.min()) / (
-                        values.max() - values.min())
-            elif isinstance(values.dtype, pd.CategoricalDtype):
-                # Attempt to convert to ordered categorical if it's not numeric
-                try:
-                    values = pd.Categorical(values, ordered=True)
-                    numeric_values = values.codes
-                    normalized_values = (
-                        numeric_values - numeric_values.min()) / (
-                            numeric_values.max() - numeric_values.min())
-                except Exception as e:
-                    print("Warning: failed to convert values to ordered " +
-                          f"categorical. {str(e)}")
-                    return  # Exit if conversion fails
-            else:
-                print("Warning: 'values' must be numeric or ordered " +
-                      "categorical to use for color scaling. Defaulting to " +
-                      "grayscale.")
-                normalized_values = np.linspace(0.2, 0.8, len(categories))
-
-            # Map normalized values to grayscale using categories as keys
-            category_colors = {
-                cat: plt.cm.Greys(0.2 + 0.6 * val) for cat,
-                val in zip(categories, normalized_values)}
-        else:
-            # Default to uniform grayscale if no values are provided
-            single_color = plt.cm.Greys(0.8)  # gray color
-            category_colors = {cat: single_color for cat in unique_cats}
-    else:
-        # Use provided category colors if specified
-        category_colors = {
-            cat: color for cat, color in zip(unique_cats,
-                                             category_colors)}
-
-    return category_colors
-
-
+@_instrumented('line')
 def line(categories, start_dates, end_dates, values=None, markers=None,
          fig_kw={}, plot_kw={}, **kwargs):
     """
@@ -301,7 +345,8 @@ def line(categories, start_dates, end_dates, values=None, markers=None,
         change the style of the lines.
     **kwargs : dict
         Additional keyword arguments for further customization of the chart.
-        Includes options like 'xlabel', 'title', 'legend', and any axis
+        Includes options like 'xlabel', 'title', 'legend', 'vectorized',
+        'output', 'cache' and 'coalesce' (see grouped_chart) and any axis
         formatter settings. For example, setting 'legend' to True will
         include a legend on the chart.
 
@@ -315,6 +360,6 @@ def line(categories, start_dates, end_dates, values=None, markers=None,
     >>> markers = {'Task A': '^', 'Task B': 's', 'Task C': 'o'}
     >>> line(categories, start_dates, end_dates, markers=markers)
     """
-    grouped_chart(categories, start_dates, end_dates, chart_type='line',
-                  values=values, markers=markers, fig_kw=fig_kw,
-                  plot_kw=plot_kw, **kwargs)
+    return grouped_chart(categories, start_dates, end_dates,
+                         chart_type='line', values=values, markers=markers,
+                         fig_kw=fig_kw, plot_kw=plot_kw, **kwargs)
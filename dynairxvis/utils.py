@@ -1,9 +1,13 @@
+import io
+import os
 import pandas as pd
 import numpy as np
-import matplotlib.cm as cm
-import matplotlib.dates as mdates
 from datetime import datetime
-import matplotlib.pyplot as plt
+from .cache import _PROFILE_CACHE, content_hash
+from .instrument import _phase
+from .intervals import to_datetime64
+# Matplotlib is imported inside the functions that draw, so profiling and
+# data preparation do not pay for pyplot and backend start-up.
 
 
 FIG_SIZE = {'figsize': (6, 4)}
@@ -15,6 +19,22 @@ DT_CHARTS = {"Q": ['Histogram'],
              "NOT": NOQT,
              "NQT": NOQT
              }
+# Values of the `output` argument of the chart functions
+OUTPUTS = ['show', 'figure', 'png', 'svg', 'rgba']
+# savefig() metadata that changes with the time or the software versions; it
+# is left out so the same chart always encodes to the same bytes
+DETERMINISTIC_METADATA = {
+    'png': {'Software': None},
+    'svg': {'Creator': None, 'Date': None},
+    'pdf': {'Creator': None, 'Producer': None, 'CreationDate': None},
+}
+# Vector formats in which `rasterize` turns dense data layers into images
+VECTOR_FORMATS = ['svg', 'pdf', 'eps', 'ps']
+# Default policy of `rasterize`: the data artists of an Axes are rasterized
+# when it holds more than 'artists' of them, and any single one with more
+# than 'vertices' vertices, at 'dpi' unless savefig() is given another dpi
+RASTER_POLICY = {'artists': 1000, 'vertices': 10000, 'dpi': 200}
+PROFILE_MODES = ['exact', 'sample', 'sketch']
 
 
 def _infer_data_type(column):
@@ -42,7 +62,7 @@ def _apply_inference(df):
     return {col: _infer_data_type(df[col]) for col in df.columns}
 
 
-def profile(df, col_count=3):
+def profile(df, col_count=3, mode='exact', sample_size=100000, cache=False):
     """
     Determines appropriate chart types based on the DataFrame's
     column data types and count. This function infers data types for the first
@@ -55,6 +75,24 @@ def profile(df, col_count=3):
         The DataFrame for which to infer chart types.
     col_count : int, optional
         The number of columns to consider for the type inference. Default is 3.
+        If None, all columns are profiled.
+    mode : str, optional
+        How distinct values of numeric columns are counted:
+        - 'exact' (default): nunique() over the whole column.
+        - 'sample': nunique() over `sample_size` randomly chosen rows.
+        - 'sketch': a HyperLogLog estimate over the whole column, which
+          needs a single hashing pass and constant memory.
+    sample_size : int, optional
+        Number of rows used by the 'sample' mode. Default is 100000.
+    cache : bool, optional
+        If True, the types of numeric columns, the only ones whose values
+        are scanned, are cached in a bounded LRU cache (see
+        `dynairxvis.cache.cache_info`), so profiling the same frame again
+        skips counting their distinct values. The key is the name, dtype
+        and a content hash of the whole column, so it costs one hashing
+        pass; it pays off for the 'exact' mode on repeated calls. The
+        'sample' mode, which is cheaper than that pass, is not cached.
+        Default is False.
 
     Returns:
     --------
@@ -68,17 +106,24 @@ def profile(df, col_count=3):
     Raises:
     -------
     ValueError
-        If the DataFrame is empty or has fewer columns than `col_count`.
+        If the DataFrame is empty or has fewer columns than `col_count`,
+        or if `mode` is not one of 'exact', 'sample' or 'sketch'.
     """
     if df.empty:
         raise ValueError("The provided DataFrame is empty.")
+    if col_count is None:
+        col_count = len(df.columns)
     if len(df.columns) < col_count:
         raise ValueError(
             f"The DataFrame must have at least {col_count} columns.")
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"Invalid mode '{mode}'. "
+                         f"Choose from {', '.join(PROFILE_MODES)}.")
 
     try:
         # Infer data types for the specified number of columns
-        col_types = _apply_inference(df.iloc[:, :col_count])
+        col_types = _infer_data_types(df.iloc[:, :col_count], mode=mode,
+                                      sample_size=sample_size, cache=cache)
         col_codes = ''.join(sorted(col_types.values()))
         suggested_charts = DT_CHARTS.get(col_codes,
                                          ['No appropriate chart found'])
@@ -87,6 +132,92 @@ def profile(df, col_count=3):
         raise RuntimeError(f"Failed to profile the DataFrame: {str(e)}")
 
 
+def _infer_data_types(df, mode='exact', sample_size=100000, cache=False):
+    """
+    Same rules as _infer_data_type, applied to all columns of `df` at once.
+
+    The dtype checks need no data, so only numeric columns are scanned, and
+    their distinct values are counted with one nunique() call for all of
+    them (or one sketch per column), on the full frame or on a sample.
+    """
+    n_rows = len(df)
+    col_types = [None] * len(df.columns)
+    keys = [None] * len(df.columns)
+    # Hashing a column costs more than sampling it
+    cache = cache and mode != 'sample'
+
+    numeric = []
+    for j, column_dtype in enumerate(df.dtypes):
+        # Temporal: check if the column is datetime
+        if pd.api.types.is_datetime64_any_dtype(column_dtype):
+            col_types[j] = 'T'
+        # Quantitative or ordinal, decided by the distinct values below
+        elif column_dtype.kind in 'iuf':
+            if cache:
+                digest = content_hash(df.iloc[:, j])
+                keys[j] = (df.columns[j], str(column_dtype), digest, n_rows,
+                           mode)
+                col_types[j] = _PROFILE_CACHE.get(keys[j])
+                if col_types[j] is not None:
+                    continue
+            numeric.append(j)
+        # Ordinal: ordered categories
+        elif (isinstance(column_dtype, pd.CategoricalDtype) and
+              column_dtype.ordered):
+            col_types[j] = 'O'
+        # Nominal: everything else
+        else:
+            col_types[j] = 'N'
+
+    if numeric:
+        data = df.iloc[:, numeric]
+        if mode == 'sample' and n_rows > sample_size:
+            rng = np.random.default_rng(0)
+            rows = np.sort(rng.choice(n_rows, sample_size, replace=False))
+            data = data.iloc[rows]
+        if mode == 'sketch':
+            distinct = [_approx_nunique(data.iloc[:, k])
+                        for k in range(len(numeric))]
+        else:
+            distinct = data.nunique().to_numpy()
+        for j, n_unique in zip(numeric, distinct):
+            if n_unique / len(data) > 0.1:  # Arbitrary threshold
+                col_types[j] = 'Q'
+            elif n_unique <= 10:  # Small number of unique values
+                col_types[j] = 'O'
+            else:
+                col_types[j] = 'N'
+
+        for j in numeric:
+            if keys[j] is not None:
+                _PROFILE_CACHE.put(keys[j], col_types[j])
+    return dict(zip(df.columns, col_types))
+
+
+def _approx_nunique(column, precision=12):
+    """
+    Estimates the number of distinct non-null values of `column` with a
+    HyperLogLog sketch of 2 ** `precision` registers (about 1.6% standard
+    error for the default), in one vectorised pass over hashed values.
+    """
+    hashes = pd.util.hash_array(column.dropna().to_numpy())
+    m = 1 << precision
+    register = (hashes >> np.uint64(64 - precision)).astype(np.int64)
+    # keep a guard bit so the remaining bits are never all zero
+    rest = (hashes << np.uint64(precision)) | np.uint64(1 << (precision - 1))
+    # rank = position of the first set bit = leading zeros + 1
+    rank = 64 - np.floor(np.log2(rest.astype(np.float64))).astype(np.int64)
+    registers = np.zeros(m, dtype=np.int64)
+    np.maximum.at(registers, register, rank)
+
+    estimate = 0.7213 / (1 + 1.079 / m) * m * m / np.sum(2.0 ** -registers)
+    empty = np.count_nonzero(registers == 0)
+    if estimate <= 2.5 * m and empty:
+        # small range correction (linear counting)
+        estimate = m * np.log(m / empty)
+    return int(round(estimate))
+
+
 def findIndex(a, str):
     indices = [idx for idx, s in enumerate(a) if str in s]
     return indices[0] if indices else 0
@@ -98,7 +229,7 @@ def is_valid_array(input_array):
 
     Parameters:
     -----------
-    input_array : list, np.ndarray, pd.Series
+    input_array : list, np.ndarray, pd.Series or pd.Index
         The input to check for array-like and non-empty properties.
 
     Returns:
@@ -106,18 +237,40 @@ def is_valid_array(input_array):
     bool
         True if the input is array-like and non-empty, False otherwise.
     """
-    return isinstance(
-        input_array, (list, np.ndarray, pd.Series)) and len(input_array) > 0
+    return isinstance(input_array, (list, np.ndarray, pd.Series,
+                                    pd.Index)) and len(input_array) > 0
 
 
 def get_color_palette(n_colors):
     """
     Generate a grayscale color palette with n distinct colors.
     """
+    import matplotlib.cm as cm
     return [cm.Greys(i / n_colors) for i in range(n_colors)]
 
 
-def _plot_now_line(ax, max_date=None, label='Now'):
+def _dates_to_num(dates):
+    """
+    Convert datetime-like values to Matplotlib date numbers in a single
+    vectorised pass.
+
+    Parameters
+    ----------
+    dates : list of datetime, np.ndarray, pd.Series or pd.Index
+        The dates to convert (see `dynairxvis.intervals.to_datetime64`).
+        Timezone-aware values are converted to UTC, which is what
+        Matplotlib does for individual Timestamps.
+
+    Returns
+    -------
+    np.ndarray
+        Float array of date numbers, one per input value.
+    """
+    import matplotlib.dates as mdates
+    return mdates.date2num(to_datetime64(dates))
+
+
+def _plot_now_line(ax, max_date=None, label='Now', now=None):
     """
     Plot a vertical line at the current datetime if within 1 year from the max
     x-axis limit.
@@ -126,36 +279,245 @@ def _plot_now_line(ax, max_date=None, label='Now'):
     ----------
     ax : matplotlib.axes.Axes
         The axis to plot the "now" line on.
-    max_date : datetime, optional
+    max_date : datetime or np.datetime64, optional
         The maximum date to consider for plotting the "now" line.
         If not provided, it will be inferred from the axis limits.
     label : str, optional default 'Now'
+    now : datetime, optional
+        The current datetime, so that several axes get the same line.
+        Default is datetime.now().
     """
-    if not isinstance(ax, plt.Axes):
+    import matplotlib.dates as mdates
+    from matplotlib.axes import Axes
+    if not isinstance(ax, Axes):
         raise TypeError("ax must be a matplotlib.axes.Axes instance")
 
-    now = datetime.now()
+    if now is None:
+        now = datetime.now()
 
+    # Compare as Matplotlib date numbers (days), whatever the date type
     if max_date is None:
-        xlims = ax.get_xlim()
-        max_date = mdates.num2date(xlims[1])
-    elif not isinstance(max_date, datetime):
+        max_num = ax.get_xlim()[1]
+    elif isinstance(max_date, (datetime, np.datetime64)):
+        # Make 'now' timezone-aware to match 'max_date'
+        tzinfo = getattr(max_date, 'tzinfo', None)
+        if tzinfo is not None and tzinfo.utcoffset(max_date) is not None:
+            now = now.astimezone(tzinfo)
+        max_num = _dates_to_num([max_date])[0]
+    else:
         raise TypeError("max_date must be a datetime instance")
-
-    # Make 'now' timezone-aware to match 'max_date'
-    if (max_date.tzinfo is not None and
-            max_date.tzinfo.utcoffset(max_date) is not None):
-        now = now.astimezone(max_date.tzinfo)
+    now_num = mdates.date2num(now)
     # TODO: in future make the year scale of the x-axis a package wide setting
     # then the following code can be amended to use that setting
     # Plot "now" vertical line if within 1 year from max xlim
-    if (max_date - now).days <= 365:
-        ax.axvline(mdates.date2num(now), color='red', linestyle='--',
-                   linewidth=1)
-        ax.annotate(label, (mdates.date2num(now), ax.get_ylim()[1] * 0.95),
+    if max_num - now_num < 366:
+        ax.axvline(now_num, color='red', linestyle='--', linewidth=1)
+        ax.annotate(label, (now_num, ax.get_ylim()[1] * 0.95),
                     xytext=(10, 0), textcoords='offset points', color='red')
-    if not isinstance(ax, plt.Axes):
-        raise TypeError("ax must be a matplotlib.axes.Axes instance")
+
+
+def _figure(output='show', **fig_kw):
+    """
+    A new figure for a chart that will be finished with `output`.
+
+    Only a figure to be shown is created with pyplot. For the other
+    outputs the Figure is created directly on an Agg canvas: it is not
+    registered with pyplot and touches no global state, so charts can be
+    rendered concurrently in threads.
+
+    Parameters
+    ----------
+    output : str, optional
+        The `output` argument of the chart function. Default is 'show'.
+    **fig_kw : dict
+        Keyword arguments for the Figure, e.g. 'figsize' and 'dpi'.
+
+    Returns
+    -------
+    matplotlib.figure.Figure
+    """
+    if output == 'show':
+        import matplotlib.pyplot as plt
+        return plt.figure(**fig_kw)
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    fig = Figure(**fig_kw)
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def _subplots(nrows=1, ncols=1, output='show', sharex=False, squeeze=True,
+              subplot_kw=None, gridspec_kw=None, **fig_kw):
+    """
+    plt.subplots() on a figure from `_figure`, so only charts that are
+    shown go through pyplot.
+
+    Returns
+    -------
+    (matplotlib.figure.Figure, Axes or np.ndarray of Axes)
+    """
+    fig = _figure(output, **fig_kw)
+    return fig, fig.subplots(nrows, ncols, sharex=sharex, squeeze=squeeze,
+                             subplot_kw=subplot_kw, gridspec_kw=gridspec_kw)
+
+
+def _render_output(fig, output='show', close=True):
+    """
+    Finishes a chart as requested by the `output` argument of the chart
+    functions.
+
+    Parameters
+    ----------
+    fig : matplotlib.figure.Figure
+        The figure the chart was drawn on.
+    output : str, optional
+        - 'show' (default): display the figure with plt.show().
+        - 'figure': return the Figure itself. Unless it was drawn on an
+          Axes given by the caller, it is not managed by pyplot (see
+          `_figure`).
+        - 'png' or 'svg': return the encoded image as bytes.
+        - 'rgba': return the rendered pixels as a (height, width, 4)
+          uint8 array.
+        The encoded outputs are rendered into memory, never to a file or
+        the screen, at the dpi the figure was created with.
+    close : bool, optional
+        Whether to close `fig` once it is encoded. Chart functions pass
+        False when they drew on an Axes supplied by the caller.
+
+    Returns
+    -------
+    None, matplotlib.figure.Figure, bytes or np.ndarray
+        Depending on `output`.
+
+    Raises
+    ------
+    ValueError
+        If `output` is not one of 'show', 'figure', 'png', 'svg' or 'rgba'.
+    """
+    if output == 'show':
+        import matplotlib.pyplot as plt
+        plt.show()
+        return None
+    if output == 'figure':
+        return fig
+    _phase('encode')
+    try:
+        if output == 'rgba':
+            fig.canvas.draw()
+            return np.asarray(fig.canvas.buffer_rgba()).copy()
+        if output in ['png', 'svg']:
+            buffer = io.BytesIO()
+            _savefig(fig, buffer, format=output)
+            return buffer.getvalue()
+        raise ValueError(f"Invalid output '{output}'. "
+                         f"Choose from {', '.join(OUTPUTS)}.")
+    finally:
+        # a figure from _figure() is not known to pyplot, nothing to close
+        if close and fig.canvas.manager is not None:
+            import matplotlib.pyplot as plt
+            plt.close(fig)
+
+
+def _savefig(fig, fname, format=None, rasterize=False, **kwargs):
+    """
+    fig.savefig() with byte-deterministic PNG, SVG and PDF output.
+
+    The timestamps and creator strings of DETERMINISTIC_METADATA are left
+    out (metadata given in `kwargs` still wins) and SVG element ids are
+    derived from a fixed salt instead of a random one, so the same figure
+    always gives the same file.
+
+    Parameters
+    ----------
+    fig : matplotlib.figure.Figure
+        The figure to save.
+    fname : str, path-like or file-like
+        Passed to fig.savefig().
+    format : str, optional
+        The file format. Defaults to the extension of `fname`, or the
+        'savefig.format' rcParam.
+    rasterize : bool or dict, optional
+        For the VECTOR_FORMATS, whether the dense data layers are written
+        as images (see `_rasterize_dense`) while axes, text and legends
+        stay vectors. True uses RASTER_POLICY, and a dict overrides some
+        of its 'artists', 'vertices' and 'dpi' entries. Default is False.
+    **kwargs : dict
+        Further keyword arguments for fig.savefig().
+
+    Returns
+    -------
+    int
+        The size of the saved file in bytes.
+    """
+    import matplotlib
+    if format is None:
+        if isinstance(fname, (str, os.PathLike)):
+            format = os.path.splitext(fname)[1][1:].lower()
+        format = format or matplotlib.rcParams['savefig.format']
+    if format in DETERMINISTIC_METADATA:
+        kwargs['metadata'] = {**DETERMINISTIC_METADATA[format],
+                              **(kwargs.get('metadata') or {})}
+    marked = []
+    if rasterize and format in VECTOR_FORMATS:
+        policy = dict(RASTER_POLICY, **(rasterize if isinstance(
+            rasterize, dict) else {}))
+        marked = _rasterize_dense(fig, policy['artists'], policy['vertices'])
+        if marked:
+            kwargs.setdefault('dpi', policy['dpi'])
+    start = fname.tell() if hasattr(fname, 'tell') else 0
+    try:
+        with matplotlib.rc_context({'svg.hashsalt': 'dynairxvis'}):
+            fig.savefig(fname, format=format, **kwargs)
+    finally:
+        # the figure is left as it was, e.g. for a later PNG
+        for artist in marked:
+            artist.set_rasterized(False)
+    if hasattr(fname, 'tell'):
+        return fname.tell() - start
+    return os.path.getsize(fname)
+
+
+def _rasterize_dense(fig, max_artists, max_vertices):
+    """
+    Marks the dense data layers of `fig` as rasterized: all the patches,
+    collections and lines of an Axes holding more than `max_artists` of
+    them, and any single one of them with more than `max_vertices`
+    vertices. Text, legends, axes and spines are left alone. Matplotlib
+    writes consecutive rasterized artists as one image.
+
+    Returns
+    -------
+    list
+        The artists that were marked, which were not rasterized before.
+    """
+    marked = []
+    for ax in fig.axes:
+        layers = [artist for artist in ax.patches + ax.collections + ax.lines
+                  if not artist.get_rasterized()]
+        if len(layers) <= max_artists:
+            layers = [artist for artist in layers
+                      if _n_vertices(artist) > max_vertices]
+        for artist in layers:
+            artist.set_rasterized(True)
+        marked.extend(layers)
+    return marked
+
+
+def _n_vertices(artist):
+    """
+    The number of vertices a vector backend writes for a data artist.
+    """
+    from matplotlib.collections import Collection, QuadMesh
+    from matplotlib.lines import Line2D
+    if isinstance(artist, QuadMesh):
+        return artist.get_coordinates()[..., 0].size
+    if isinstance(artist, Collection):
+        n = sum(len(path.vertices) for path in artist.get_paths())
+        # markers are written once per offset
+        return n * max(len(artist.get_offsets()), 1)
+    if isinstance(artist, Line2D):
+        return len(artist.get_xydata())
+    return len(artist.get_path().vertices)
 
 
 def _resolve_orientation(orientation):
@@ -1,9 +1,12 @@
 import numpy as np
-import matplotlib.pyplot as plt
-from .utils import FIG_SIZE
+from matplotlib import colormaps
+from .instrument import _instrumented, _phase
+from .utils import FIG_SIZE, _render_output, _subplots
 
 
-def violin(values, horizontal=False, fig_kw={}, plot_kw={}, **kwargs):
+@_instrumented('violin')
+def violin(values, horizontal=False, fig_kw={}, plot_kw={}, output='show',
+           **kwargs):
     """
     Creates and displays a violin plot based on the provided values.
 
@@ -14,9 +17,13 @@ def violin(values, horizontal=False, fig_kw={}, plot_kw={}, **kwargs):
       horizontal : bool, optional
         Whether to display the violin plot horizontally. Defaults to False.
       fig_kw : dict
-        Keyword arguments for plt.figure() to customize the figure.
+        Keyword arguments for the Figure to customize it.
       plot_kw : dict
-        Keyword arguments for plt.violinplot() for further customization.
+        Keyword arguments for ax.violinplot() for further customization.
+      output : str, optional
+        'show' (default) displays the chart, 'figure' returns the Figure
+        and 'png', 'svg' or 'rgba' return the rendered image without
+        touching the screen or the filesystem.
       **kwargs : dict
         Additional keyword arguments for customization.
 
@@ -26,13 +33,13 @@ def violin(values, horizontal=False, fig_kw={}, plot_kw={}, **kwargs):
 
       violin(values)
     """
-    # Setup default figure size
-    default_fig_kw = FIG_SIZE
-    # Update with any user-provided figure kwargs
-    default_fig_kw.update(fig_kw)
+    # Setup default figure size, updated with any user-provided figure
+    # kwargs without modifying FIG_SIZE
+    default_fig_kw = {**FIG_SIZE, **fig_kw}
 
     # Setup figure with combined default and provided figure kwargs
-    plt.figure(**default_fig_kw)
+    _phase('draw_artists')
+    fig, ax = _subplots(output=output, **default_fig_kw)
 
     # Setup default plot parameters for the violin plot
     default_plot_kw = {'showmeans': False, 'showmedians': True,
@@ -40,12 +47,13 @@ def violin(values, horizontal=False, fig_kw={}, plot_kw={}, **kwargs):
     default_plot_kw.update(plot_kw)  # Update with any user kwargs
 
     # Plot the violin plot
-    parts = plt.violinplot(values, vert=not horizontal, **default_plot_kw)
+    parts = ax.violinplot(values, vert=not horizontal, **default_plot_kw)
 
     # Apply a default grayscale color map if no color is provided in plot_kw
     colors = plot_kw.get('colors', None)
     if colors is None:
-        colors = plt.cm.Greys(np.linspace(0.3, 0.7, len(parts['bodies'])))
+        colors = colormaps['Greys'](np.linspace(0.3, 0.7,
+                                                len(parts['bodies'])))
     edgecolor = plot_kw.get('edgecolor', 'black')
     for part, color in zip(parts['bodies'], colors):
         part.set_facecolor(color)
@@ -62,33 +70,35 @@ def violin(values, horizontal=False, fig_kw={}, plot_kw={}, **kwargs):
 
     # Dynamic axis labels
     if horizontal:
-        plt.xlabel(kwargs.get('xlabel', 'Values'))
-        plt.ylabel(kwargs.get('ylabel', ''))
+        ax.set_xlabel(kwargs.get('xlabel', 'Values'))
+        ax.set_ylabel(kwargs.get('ylabel', ''))
     else:
-        plt.ylabel(kwargs.get('ylabel', 'Values'))
-        plt.xlabel(kwargs.get('xlabel', ''))
+        ax.set_ylabel(kwargs.get('ylabel', 'Values'))
+        ax.set_xlabel(kwargs.get('xlabel', ''))
 
     # Title setup
-    plt.title(kwargs.get('title', 'Violin Plot of Values'))
+    ax.set_title(kwargs.get('title', 'Violin Plot of Values'))
 
     # Apply xticks
-    plt.xticks(kwargs.get('xticks', [1]),
-               kwargs.get('xticks_labels', ['Value Set']))
+    ax.set_xticks(kwargs.get('xticks', [1]),
+                  kwargs.get('xticks_labels', ['Value Set']))
 
     # Enable grid
-    plt.grid(kwargs.get('grid', True), which='both',
-             axis='y' if not horizontal else 'x',
-             linestyle=kwargs.get('grid_linestyle', '--'),
-             linewidth=kwargs.get('grid_linewidth', 0.5))
+    ax.grid(kwargs.get('grid', True), which='both',
+            axis='y' if not horizontal else 'x',
+            linestyle=kwargs.get('grid_linestyle', '--'),
+            linewidth=kwargs.get('grid_linewidth', 0.5))
 
     # Apply legend if specified
     if kwargs.get('legend', False):
-        plt.legend(kwargs.get('legend_labels', ['Violin Plot']),
-                   loc=kwargs.get('legend_loc', 'best'))
+        _phase('legend')
+        ax.legend(kwargs.get('legend_labels', ['Violin Plot']),
+                  loc=kwargs.get('legend_loc', 'best'))
 
     # Adjust layout
     if kwargs.get('tight_layout', True):
-        plt.tight_layout()
+        _phase('layout')
+        fig.tight_layout()
 
     # Show plot
-    plt.show()
+    return _render_output(fig, output)
@@ -0,0 +1,100 @@
+import os
+import time
+
+import pandas as pd
+
+import dynairxvis.plot as plot_module
+from dynairxvis.batch import render_batch, _render_job
+
+DF = pd.DataFrame({
+    'patient': [1, 1, 2, 2],
+    'Condition': ['Diabetes', 'Asthma', 'COPD', 'Asthma'],
+    'Start_Date': pd.to_datetime(['2021-01-01', '2021-01-03',
+                                  '2021-01-06', '2022-01-06']),
+    'End_Date': pd.to_datetime(['2021-06-01', '2021-08-03',
+                                '2021-10-04', '2022-06-06']),
+})
+REFS = ['Condition', 'Start_Date', 'End_Date']
+
+
+def test_render_batch(tmp_path):
+    jobs = [(group, REFS, {}) for group in DF.groupby('patient')]
+    jobs.append((DF, ['Missing'], {}))
+    manifest = render_batch(jobs, workers=2, out_dir=tmp_path)
+    assert [job['name'] for job in manifest] == ['0_1', '1_2', '2']
+    for job in manifest[:2]:
+        assert job['error'] is None
+        assert job['seconds'] > 0
+        assert len(job['paths']) == 6  # the NT chart set
+        assert job['bytes'] == sum(map(os.path.getsize, job['paths']))
+        for path in job['paths']:
+            assert path.startswith(str(tmp_path))
+            with open(path, 'rb') as f:
+                assert f.read(4) == b'\x89PNG'
+    assert manifest[2]['error'].startswith('KeyError')
+    assert manifest[2]['paths'] == []
+
+
+def test_render_job_timeout(tmp_path, monkeypatch):
+    def swallow(*args, **kwargs):
+        # chart code catching every Exception does not stop the timeout
+        try:
+            time.sleep(5)
+        except Exception:
+            time.sleep(5)
+    monkeypatch.setattr(plot_module, 'plot_charts', swallow)
+    start = time.perf_counter()
+    entry = _render_job('slow', DF, REFS, {}, out_dir=tmp_path, timeout=0.2)
+    assert time.perf_counter() - start < 2
+    assert entry['error'].startswith('TimeoutError')
+
+
+class _KillWorker:
+    # Unpickling it in the worker process ends the process
+    def __reduce__(self):
+        return os._exit, (1,)
+
+
+def test_render_batch_broken_pool(tmp_path):
+    jobs = [(DF, REFS, {}), (_KillWorker(), REFS, {}), (DF, REFS, {})]
+    manifest = render_batch(jobs, workers=1, out_dir=tmp_path)
+    assert [job['name'] for job in manifest] == ['0', '1', '2']
+    assert manifest[0]['error'] is None
+    assert len(manifest[0]['paths']) == 6
+    for job in manifest[1:]:
+        assert job['error'].startswith('BrokenProcessPool')
+        assert job['paths'] == []
+
+
+def test_render_batch_cache(tmp_path):
+    cache_dir = tmp_path / 'cache'
+    jobs = [(group, REFS, {}) for group in DF.groupby('patient')]
+    first = render_batch(jobs, workers=1, out_dir=tmp_path / 'a',
+                         cache_dir=cache_dir)
+    assert not any(job['cached'] for job in first)
+    # one patient changed
+    changed = DF.copy()
+    changed.loc[3, 'Condition'] = 'Diabetes'
+    jobs = [(group, REFS, {}) for group in changed.groupby('patient')]
+    second = render_batch(jobs, workers=1, out_dir=tmp_path / 'b',
+                          cache_dir=cache_dir)
+    assert [job['cached'] for job in second] == [True, False]
+    assert second[0]['bytes'] == first[0]['bytes'] > 0
+    for before, after in zip(first[0]['paths'], second[0]['paths']):
+        with open(before, 'rb') as f, open(after, 'rb') as g:
+            assert f.read() == g.read()
+    assert len(second[1]['paths']) == 6
+    assert not list(cache_dir.glob('tmp*'))
+
+
+def test_render_batch_rasterize(tmp_path):
+    jobs = [(DF, REFS, {})]
+    vector, = render_batch(jobs, workers=1, out_dir=tmp_path / 'a',
+                           fmt='svg')
+    # every layer of these small charts counts as dense
+    raster, = render_batch(jobs, workers=1, out_dir=tmp_path / 'b',
+                           fmt='svg', rasterize={'artists': 0})
+    assert raster['error'] is None
+    assert raster['bytes'] != vector['bytes']
+    with open(raster['paths'][0], 'rb') as f:
+        assert b'<image' in f.read()
@@ -0,0 +1,123 @@
+import functools
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+from dynairxvis import cache, specs
+from dynairxvis.cache import LRUCache, cache_info, clear_caches, content_hash
+from dynairxvis.gantt import gantt
+from dynairxvis.heatmap import heatmap
+from dynairxvis.utils import profile
+
+
+def _events(n=50, seed=0):
+    rng = np.random.default_rng(seed)
+    start = pd.Series(pd.Timestamp('2015-01-01') + pd.to_timedelta(
+        rng.integers(0, 3000, n), unit='D'))
+    return pd.DataFrame({
+        'Condition': rng.choice(['Asthma', 'COPD', 'Diabetes'], n),
+        'Start_Date': start,
+        'End_Date': start + pd.to_timedelta(rng.integers(1, 400, n),
+                                            unit='D'),
+        'Value': rng.integers(0, 10, n),
+    })
+
+
+def test_lru_bounds_and_counters():
+    lru = LRUCache(max_entries=2, max_bytes=100)
+    lru.put('a', 1, nbytes=10)
+    lru.put('b', 2, nbytes=10)
+    assert lru.get('a') == 1  # 'b' is now the least recently used
+    lru.put('c', 3, nbytes=10)
+    assert lru.get('b') is None
+    assert (lru.hits, lru.misses, len(lru)) == (1, 1, 2)
+    # the size bound drops entries too, and oversized values are skipped
+    lru.put('d', 4, nbytes=95)
+    assert len(lru) == 1 and lru.nbytes == 95
+    lru.put('e', 5, nbytes=101)
+    assert lru.get('e') is None
+    lru.clear()
+    assert lru.info() == {'hits': 0, 'misses': 0, 'entries': 0, 'bytes': 0,
+                          'max_entries': 2, 'max_bytes': 100}
+
+
+def test_content_hash():
+    df = _events()
+    copy = df.copy()
+    copy.index = copy.index + 100
+    # the same contents hash the same, whatever the index
+    assert content_hash(df) == content_hash(copy)
+    assert content_hash(df['Condition']) == \
+        content_hash(list(df['Condition']))
+    copy.loc[copy.index[-1], 'Value'] += 1
+    assert content_hash(df) != content_hash(copy)
+    # dtypes, categories and argument order are part of the hash
+    assert content_hash(df['Value']) != \
+        content_hash(df['Value'].astype(float))
+    ordered = df['Condition'].astype(pd.CategoricalDtype(
+        ['COPD', 'Asthma', 'Diabetes'], ordered=True))
+    assert content_hash(ordered) != \
+        content_hash(ordered.cat.reorder_categories(
+            ['Asthma', 'COPD', 'Diabetes']))
+    assert content_hash(1, None) != content_hash(None, 1)
+    assert content_hash([[1, 2], [3]]) != content_hash([[1], [2, 3]])
+    assert content_hash(object()) is None
+
+
+def test_repeated_and_cosmetic_calls_skip_preparation(monkeypatch):
+    df = _events()
+    c, s, e, v = (df['Condition'], df['Start_Date'], df['End_Date'],
+                  df['Value'])
+    expected = gantt(c, s, e, values=v, title='A', output='rgba')
+    clear_caches()
+    first = gantt(c, s, e, values=v, title='A', output='rgba', cache=True)
+    np.testing.assert_array_equal(first, expected)
+
+    calls = []
+
+    @functools.wraps(specs._prepare_gantt)
+    def counting(*args, **kwargs):
+        calls.append(args)
+        return counting.__wrapped__(*args, **kwargs)
+    monkeypatch.setattr(specs, '_prepare_gantt', counting)
+    # new objects with the same contents, and another title
+    again = gantt(list(c), list(s), list(e), values=list(v), title='B',
+                  output='rgba', cache=True)
+    assert again.shape == expected.shape
+    assert not calls
+    assert cache_info()['specs']['hits'] == 1
+    # a data-affecting argument misses
+    gantt(c, s, e, values=v, use_values_as_height=True, output='rgba',
+          cache=True)
+    assert len(calls) == 1
+
+
+def test_heatmap_key_uses_referenced_columns():
+    df = _events()
+    clear_caches()
+    kwargs = {'date_col': 'Start_Date', 'y_col': 'Condition',
+              'output': 'figure', 'cache': True}
+    heatmap(df, **kwargs)
+    other = df.assign(Value=df['Value'] + 1)
+    heatmap(other, **kwargs)
+    plt.close('all')
+    assert cache_info()['specs']['hits'] == 1
+    other.loc[0, 'Condition'] = 'Other'
+    spec = specs.prepare('heatmap', other, 'Start_Date', 'Condition',
+                         cache=True)
+    assert cache_info()['specs']['misses'] == 2
+    assert 'Other' in spec['rows']
+    assert specs.prepare('heatmap', other, 'Start_Date', 'Condition',
+                         cache=True) is spec
+
+
+def test_profile_counters():
+    df = _events()
+    clear_caches()
+    profile(df, col_count=None, cache=True)
+    profile(df, col_count=None, cache=True)
+    info = cache_info()['profiles']
+    # only the numeric 'Value' column is scanned
+    assert (info['misses'], info['hits'], info['entries']) == (1, 1, 1)
+    assert info['max_entries'] == cache.PROFILE_CACHE_ENTRIES
@@ -1,8 +1,10 @@
 import pytest
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 # Adjust the import to match your module's structure
 from dynairxvis.plot import calendar
+from dynairxvis.specs import prepare
 
 
 # Helper: create a sample DataFrame with datetime and categorical columns.
@@ -74,6 +76,15 @@ def test_calendar_without_ax():
         when no ax is provided."
 
 
+def test_calendar_positional_fig_kw():
+    df = create_sample_df()
+    # the arguments of the original signature keep their positions
+    fig = calendar(df, 'disease', 'date', 0.2, None, {'figsize': (5, 3)},
+                   output='figure')
+    assert fig.get_size_inches().tolist() == [5, 3]
+    plt.close(fig)
+
+
 # Optional Test 6: Check that the expected number of background
 # rectangles is created.
 def test_background_rectangles_count():
@@ -96,3 +107,73 @@ def test_background_rectangles_count():
         1.0, 1.0, 1.0)]
     assert len(bg_patches) == expected_cells, f"Expected {expected_cells} \
         background cells but found {len(bg_patches)}."
+
+
+# Test 7: vectorized mode draws one collection for the cells and one for
+# the dots, with the same number of dots as events when they all fit.
+def test_calendar_vectorized_collections():
+    df = create_sample_df()
+    fig, ax = plt.subplots(figsize=(8, 6))
+    calendar(df=df, y_column='disease', x_column='date', ax=ax,
+             vectorized=True)
+
+    assert len(ax.patches) == 0, "Vectorized mode should not add patches"
+    cells, dots = ax.collections
+    assert len(cells.get_paths()) == 4, "Expected 2 diseases x 2 years"
+    assert len(dots.get_paths()) == len(df), "Expected one dot per event"
+    assert len(ax.texts) == 0
+    plt.close(fig)
+
+
+# Test 8: cells with more events than dots that fit show a count instead.
+def test_calendar_vectorized_overflow_label():
+    df = pd.DataFrame({
+        'date': pd.to_datetime(['2021-01-01'] * 5000 + ['2022-01-01']),
+        'disease': ['flu'] * 5000 + ['covid']
+    })
+    fig, ax = plt.subplots(figsize=(8, 6))
+    calendar(df=df, y_column='disease', x_column='date', ax=ax,
+             dot_size=0.5, vectorized=True)
+
+    cells, dots = ax.collections
+    assert [t.get_text() for t in ax.texts] == ['5000']
+    assert len(dots.get_paths()) == 1, "Only the covid event fits as a dot"
+    plt.close(fig)
+
+
+# Test 9: an iterable of chunks gives the same counts as the whole frame.
+def test_calendar_from_chunks():
+    df = pd.concat([create_sample_df()] * 50, ignore_index=True)
+    df.loc[::7, 'date'] = pd.NaT
+    spec = prepare('calendar', df, 'disease', 'date')
+    chunked = prepare('calendar', (df.iloc[i:i + 30]
+                                   for i in range(0, len(df), 30)),
+                      'disease', 'date')
+    np.testing.assert_array_equal(chunked['counts'], spec['counts'])
+    assert chunked['rows'] == spec['rows']
+    assert chunked['columns'] == spec['columns']
+    assert chunked['n_events'] == len(df)
+    assert spec['counts'].sum() == df['date'].notna().sum()
+
+
+def test_calendar_from_empty_and_nat_chunks():
+    df = create_sample_df()
+    empty = pd.DataFrame({'disease': [], 'date': []}, dtype=object)
+    no_dates = df.assign(date=pd.NaT)
+    chunks = [empty, df.iloc[:3], no_dates, df.iloc[:0], df.iloc[3:]]
+    spec = prepare('calendar', iter(chunks), 'disease', 'date')
+    expected = prepare('calendar', df, 'disease', 'date')
+    np.testing.assert_array_equal(spec['counts'], expected['counts'])
+    assert spec['rows'] == expected['rows']
+    assert spec['columns'] == expected['columns']
+    assert spec['n_events'] == 2 * len(df)
+    fig = calendar(iter(chunks), 'disease', 'date', output='figure')
+    assert len(fig.axes[0].patches) > 0
+    plt.close(fig)
+
+
+def test_calendar_rejects_non_date_x_column():
+    df = create_sample_df()
+    df['date'] = df['date'].astype(str)
+    with pytest.raises(ValueError, match='date must be a datetime column'):
+        calendar(df, 'disease', 'date', output='figure')
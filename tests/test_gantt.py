@@ -1,3 +1,5 @@
+import numpy as np
+import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 from unittest.mock import patch
@@ -45,3 +47,91 @@ def test_gantt_chart(mock_show):
             f" expected {start_date}, got {bar_start}")
 
     plt.close(fig)  # Clean up by closing the figure
+
+
+@patch('matplotlib.pyplot.show')
+def test_gantt_chart_vectorized(mock_show):
+    categories = ['Task A', 'Task B', 'Task A']
+    start_dates = [datetime(2020, 1, 1), datetime(2020, 6, 1),
+                   datetime(2020, 8, 1)]
+    end_dates = [datetime(2021, 1, 1), datetime(2020, 7, 1),
+                 datetime(2020, 9, 1)]
+    values = ['low', 'high', 'low']
+
+    fig, ax = plt.subplots()
+    gantt(categories, start_dates, end_dates, values=values, ax=ax,
+          vectorized=True)
+
+    # One collection per colour and no per-row rectangles
+    assert len(ax.patches) == 0, "Vectorized mode should not add patches"
+    assert len(ax.collections) == 2, "Expected one collection per colour"
+
+    # Each bar is a closed rectangle of five vertices in its colour's path
+    verts = np.concatenate([c.get_paths()[0].vertices.reshape(-1, 5, 2)
+                            for c in ax.collections])
+    assert len(verts) == len(categories), "Incorrect number of bars drawn"
+    starts = sorted(d.replace(tzinfo=None)
+                    for d in mdates.num2date(verts[:, 0, 0]))
+    assert starts == sorted(start_dates), "Bars start at the wrong dates"
+
+    labels = [t.get_text() for t in ax.get_yticklabels()]
+    assert labels == ['Task A', 'Task B'], "Categories not on the y-axis"
+    legend = ax.get_legend()
+    assert [t.get_text() for t in legend.get_texts()] == ['low', 'high']
+
+    plt.close(fig)
+
+
+def test_gantt_coalesce():
+    categories = ['Drug A'] * 3 + ['Drug B'] * 2
+    start_dates = [datetime(2020, 1, 1), datetime(2020, 1, 15),
+                   datetime(2020, 6, 1), datetime(2020, 1, 1),
+                   datetime(2020, 1, 1)]
+    end_dates = [datetime(2020, 2, 1), datetime(2020, 3, 1),
+                 datetime(2020, 7, 1), datetime(2020, 2, 1),
+                 datetime(2020, 2, 1)]
+    fig, ax = plt.subplots()
+    gantt(categories, start_dates, end_dates, ax=ax, coalesce=True)
+    # the overlap and the duplicate are merged
+    assert len(ax.patches) == 3
+    widths = sorted(round(p.get_width()) for p in ax.patches)
+    assert widths == [30, 31, 60]
+    plt.close(fig)
+
+    # bars of another colour are not merged
+    fig, ax = plt.subplots()
+    gantt(categories, start_dates, end_dates, values=[1, 2, 2, 3, 3],
+          ax=ax, coalesce=True)
+    assert len(ax.patches) == 4
+    plt.close(fig)
+
+
+def test_gantt_datetime64_inputs():
+    categories = ['Task A', 'Task B', 'Task C']
+    start_dates = [datetime(2020, 1, 1), datetime(2020, 6, 1),
+                   datetime(2020, 8, 1)]
+    end_dates = [datetime(2021, 1, 1), datetime(2020, 7, 1),
+                 datetime(2020, 9, 1)]
+    starts = np.array(start_dates, dtype='datetime64[ns]')
+    ends = np.array(end_dates, dtype='datetime64[ns]')
+    for vectorized in [False, True]:
+        expected = gantt(categories, start_dates, end_dates,
+                         vectorized=vectorized, output='rgba')
+        for s, e in [(starts, ends), (starts.astype('datetime64[s]'), ends),
+                     (starts.astype(np.int64), ends.astype(np.int64)),
+                     (pd.Series(starts).dt.tz_localize('UTC'),
+                      pd.DatetimeIndex(ends).tz_localize('UTC'))]:
+            np.testing.assert_array_equal(
+                gantt(categories, s, e, vectorized=vectorized,
+                      output='rgba'), expected)
+
+
+def test_gantt_positional_fig_kw():
+    categories = ['Task A', 'Task B']
+    start_dates = [datetime(2020, 1, 1), datetime(2020, 6, 1)]
+    end_dates = [datetime(2021, 1, 1), datetime(2020, 7, 1)]
+    # the arguments of the original signature keep their positions
+    fig = gantt(categories, start_dates, end_dates, None, False, None,
+                {'figsize': (3, 2)}, {'linewidth': 3}, output='figure')
+    assert tuple(fig.get_size_inches()) == (3, 2)
+    assert fig.axes[0].patches[0].get_linewidth() == 3
@@ -1,6 +1,11 @@
+import numpy as np
+import pandas as pd
 import matplotlib.pyplot as plt
+from matplotlib.collections import QuadMesh
 from unittest.mock import patch
-from dynairxvis.plot import box
+from dynairxvis.plot import box, heatmap
+from dynairxvis.heatmap import heatmap_nq
+from dynairxvis.specs import prepare
 
 
 @patch('matplotlib.pyplot.show')
@@ -45,3 +50,135 @@ def test_box_creates_plot(mock_show):
     )
 
     plt.close(fig)
+
+
+def _disease_events(n_diseases, years):
+    rows = [(f'Disease {d}', f'{y}-06-01') for d in range(n_diseases)
+            for y in years]
+    df = pd.DataFrame(rows, columns=['Disease', 'obsdate'])
+    df['obsdate'] = pd.to_datetime(df['obsdate'])
+    return df
+
+
+@patch('matplotlib.pyplot.show')
+def test_heatmap_vectorized_single_mesh(mock_show):
+    df = _disease_events(3, [2020, 2021, 2022])
+    heatmap(df, vectorized=True)
+    ax = plt.gcf().axes[0]
+    assert len(ax.patches) == 0, "Vectorized heatmap should add no patches"
+    meshes = [c for c in ax.collections if isinstance(c, QuadMesh)]
+    assert len(meshes) == 1
+    # cells are large, so every non-zero cell is annotated
+    assert len(ax.texts) == 9
+    plt.close('all')
+
+
+@patch('matplotlib.pyplot.show')
+def test_heatmap_vectorized_skips_unreadable_labels(mock_show):
+    df = _disease_events(500, range(1990, 2020))
+    heatmap(df, vectorized=True)
+    ax = plt.gcf().axes[0]
+    assert len(ax.texts) == 0, "Tiny cells should not be annotated"
+    assert len(ax.get_yticks()) < 500, "Tick labels should be thinned"
+    plt.close('all')
+
+
+def test_heatmap_cell_labels_in_their_cells():
+    df = pd.concat([_disease_events(3, [2020, 2021])] +
+                   [_disease_events(1, [2021])] * 2)
+    spec = prepare('heatmap', df)
+    for vectorized in [False, True]:
+        fig = heatmap(df, vectorized=vectorized, output='figure')
+        ax = fig.axes[0]
+        labels = {(t.get_position(), t.get_text()) for t in ax.texts}
+        # each count is written at the centre of its own cell, on every row
+        assert labels == {((j + 0.5, i + 0.5), str(count))
+                          for (i, j), count in np.ndenumerate(spec['counts'])
+                          if count}
+        plt.close(fig)
+
+
+def test_heatmap_vectorized_colorbar_ticks():
+    df = pd.concat([_disease_events(2, [2020, 2021])] * 3000)
+    fig = heatmap(df, vectorized=True, output='figure')
+    colorbar = fig.axes[1]
+    fig.canvas.draw()
+    # a bounded number of ticks, not one per count up to 3000
+    assert 2 <= len(colorbar.get_xticks()) <= 12
+    plt.close(fig)
+
+
+def test_heatmap_positional_fig_kw():
+    df = _disease_events(3, [2020, 2021])
+    # the arguments of the original signature keep their positions
+    fig = heatmap(df, 'obsdate', 'Disease', {'figsize': (5, 3)},
+                  output='figure')
+    assert fig.get_size_inches().tolist() == [5, 3]
+    plt.close(fig)
+
+
+def test_heatmap_nq_counts():
+    fig, ax = plt.subplots()
+    heatmap_nq(['B', 'A', 'B', 'A'], values=[1, [2, 1], 2, 3], ax=ax)
+    matrix = ax.images[0].get_array()
+    # rows A, B; columns 1, 2, 3
+    np.testing.assert_array_equal(matrix, [[1, 1, 1], [1, 1, 0]])
+    labels = [t.get_text() for t in ax.get_xticklabels()]
+    assert labels == ['1', '2', '3']
+    plt.close(fig)
+
+
+def test_heatmap_nq_positional_fig_kw():
+    # the arguments of the original signature keep their positions
+    fig = heatmap_nq(['A', 'B'], [1, 2], None, None, None, 'heatmap',
+                     {'figsize': (5, 3)}, 'Blues', output='figure')
+    assert fig.get_size_inches().tolist() == [5, 3]
+    assert fig.axes[0].images[0].get_cmap().name == 'Blues'
+    plt.close(fig)
+
+
+def test_heatmap_nq_bins():
+    rng = np.random.default_rng(0)
+    values = rng.normal(60, 15, 10000)
+    categories = ['eGFR'] * 5000 + ['BP'] * 5000
+    fig, ax = plt.subplots()
+    heatmap_nq(categories, values=values, ax=ax, bins=8)
+    matrix = ax.images[0].get_array()
+    assert matrix.shape == (2, 8)
+    assert matrix.sum() == 10000
+    plt.close(fig)
+
+    fig, ax = plt.subplots()
+    heatmap_nq(categories, values=values, ax=ax, quantiles=4)
+    matrix = ax.images[0].get_array()
+    assert matrix.shape == (2, 4)
+    assert matrix.sum(axis=0).tolist() == [2500] * 4
+    plt.close(fig)
+
+
+def test_heatmap_from_chunks(tmp_path):
+    rng = np.random.default_rng(0)
+    n = 1000
+    df = pd.DataFrame({
+        'Disease': rng.choice(['Asthma', 'COPD', 'Diabetes', None], n),
+        'obsdate': pd.Timestamp('2000-01-01') + pd.to_timedelta(
+            rng.integers(0, 8000, n), unit='D'),
+    })
+    path = tmp_path / 'events.csv'
+    df.to_csv(path, index=False)
+    expected = heatmap(df, output='rgba')
+    chunks = pd.read_csv(path, chunksize=150, parse_dates=['obsdate'])
+    np.testing.assert_array_equal(heatmap(chunks, output='rgba'), expected)
+    # a generator is consumed one chunk at a time
+    chunks = (df.iloc[i:i + 99] for i in range(0, n, 99))
+    np.testing.assert_array_equal(heatmap(chunks, output='rgba'), expected)
+
+
+def test_heatmap_from_chunks_with_empty_and_nat_chunks():
+    df = _disease_events(3, [2020, 2021, 2022])
+    expected = heatmap(df, output='rgba')
+    empty = pd.DataFrame({'Disease': [], 'obsdate': []}, dtype=object)
+    no_dates = df.head(4).assign(obsdate=pd.NaT)
+    chunks = [empty, df.iloc[:5], no_dates, df.iloc[:0], df.iloc[5:]]
+    np.testing.assert_array_equal(heatmap(iter(chunks), output='rgba'),
+                                  expected)
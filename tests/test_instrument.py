@@ -0,0 +1,122 @@
+import threading
+import time
+from datetime import datetime
+
+import matplotlib.pyplot as plt
+import pandas as pd
+import pytest
+
+from dynairxvis import instrument
+from dynairxvis.instrument import (record_spans, add_span_listener,
+                                   remove_span_listener, SPANS)
+from dynairxvis.bar import bar
+from dynairxvis.gantt import gantt
+from dynairxvis.heatmap import heatmap
+from dynairxvis.plot import plot_charts
+
+
+categories = ['Task A', 'Task B', 'Task C']
+start_dates = [datetime(2020, 1, 1), datetime(2020, 6, 1),
+               datetime(2020, 8, 1)]
+end_dates = [datetime(2021, 1, 1), datetime(2020, 7, 1),
+             datetime(2020, 9, 1)]
+
+
+def test_record_spans_reports_phases():
+    with record_spans() as records:
+        png = gantt(categories, start_dates, end_dates, values=[1, 2, 3],
+                    output='png')
+    assert png.startswith(b'\x89PNG')
+    assert len(records) == 1
+    record = records[0]
+    assert record['chart'] == 'gantt'
+    assert record['rows'] == 3
+    assert record['depth'] == 0
+    assert list(record['spans']) == SPANS
+    assert record['spans']['draw_artists'] > 0
+    assert record['spans']['legend'] > 0
+    assert record['spans']['encode'] > 0
+    # the spans add up to the whole call
+    assert sum(record['spans'].values()) == pytest.approx(record['seconds'])
+
+
+def test_nested_charts_are_not_counted_twice():
+    with record_spans() as records:
+        bar(categories, [1, 2, 3], output='png')
+    assert [(r['chart'], r['depth']) for r in records] == \
+        [('scatter', 1), ('bar', 0)]
+    inner, outer = records
+    assert outer['seconds'] >= inner['seconds']
+    assert sum(outer['spans'].values()) < inner['seconds']
+
+
+def test_nested_chart_resumes_caller_phase():
+    @instrument._instrumented('inner')
+    def inner():
+        instrument._phase('encode')
+
+    @instrument._instrumented('outer')
+    def outer():
+        instrument._phase('draw_artists')
+        inner()
+        time.sleep(0.05)
+
+    with record_spans() as records:
+        outer()
+    spans = records[-1]['spans']
+    # the time after the inner call is still the caller's drawing time
+    assert spans['draw_artists'] >= 0.05
+    assert spans['prepare'] < 0.05
+
+
+def test_plot_charts_and_layout_spans():
+    df = pd.DataFrame({'Condition': categories * 2,
+                       'Value': [1, 2, 3, 4, 5, 6],
+                       'Date': pd.to_datetime(start_dates + end_dates)})
+    with record_spans() as records:
+        plot_charts(df, ['Condition', 'Value'])
+        heatmap(df, date_col='Date', y_col='Condition', output='figure')
+    plt.close('all')
+    assert records[-2]['chart'] == 'plot_charts'
+    charts = [r for r in records[:-2] if r['depth'] == 1]
+    assert charts and all(r['chart'] != 'plot_charts' for r in charts)
+    assert records[-1]['chart'] == 'heatmap'
+    assert records[-1]['spans']['layout'] > 0
+    # 'figure' output is not encoded
+    assert records[-1]['spans']['encode'] == 0
+
+
+def test_listeners_and_disabled_state():
+    seen = []
+    add_span_listener(seen.append)
+    try:
+        gantt(categories, start_dates, end_dates, output='figure')
+    finally:
+        remove_span_listener(seen.append)
+    plt.close('all')
+    assert [r['chart'] for r in seen] == ['gantt']
+    assert instrument._listeners == []
+    # without listeners nothing is timed or recorded
+    gantt(categories, start_dates, end_dates, output='figure')
+    plt.close('all')
+    assert len(seen) == 1
+    assert not getattr(instrument._local, 'stack', [])
+
+
+def test_spans_are_per_thread():
+    results = {}
+
+    def render(name):
+        results[name] = gantt(categories, start_dates, end_dates,
+                              output='figure')
+
+    with record_spans() as records:
+        threads = [threading.Thread(target=render, args=(i,))
+                   for i in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    for fig in results.values():
+        plt.close(fig)
+    assert [r['depth'] for r in records] == [0, 0]
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+from datetime import datetime
+from dynairxvis.intervals import (to_datetime64, time_bin_edges,
+                                  interval_bin_counts, coalesce_intervals)
+
+
+def test_to_datetime64_tz_aware():
+    dates = pd.Series(pd.to_datetime(['2021-01-01 01:00'])).dt.tz_localize(
+        'Europe/Paris')
+    result = to_datetime64(dates)
+    assert result.dtype == np.dtype('datetime64[ns]')
+    assert result[0] == np.datetime64('2021-01-01T00:00')
+
+
+def test_time_bin_edges_months():
+    edges = time_bin_edges(datetime(2020, 1, 15), datetime(2020, 3, 2), 'M')
+    expected = np.array(['2020-01-01', '2020-02-01', '2020-03-01',
+                         '2020-04-01'], dtype='datetime64[ns]')
+    np.testing.assert_array_equal(edges, expected)
+
+
+def test_time_bin_edges_weeks_start_on_monday():
+    edges = time_bin_edges(datetime(2024, 1, 3), datetime(2024, 1, 10), 'W')
+    # 2024-01-01 was a Monday
+    assert edges[0] == np.datetime64('2024-01-01')
+    assert all(pd.DatetimeIndex(edges).dayofweek == 0)
+    assert edges[-1] > np.datetime64('2024-01-10')
+
+
+def test_time_bin_edges_invalid_freq():
+    with pytest.raises(ValueError):
+        time_bin_edges(datetime(2020, 1, 1), datetime(2021, 1, 1), 'Q')
+
+
+def test_interval_bin_counts():
+    edges = time_bin_edges(datetime(2020, 1, 1), datetime(2020, 4, 30), 'M')
+    codes = [0, 0, 1]
+    starts = [datetime(2020, 1, 10), datetime(2020, 2, 5),
+              datetime(2020, 4, 1)]
+    ends = [datetime(2020, 2, 10), datetime(2020, 3, 1),
+            datetime(2020, 4, 2)]
+
+    overlap = interval_bin_counts(codes, 2, starts, ends, edges,
+                                  count='overlap')
+    # the second interval ends exactly on 1 March, so it stops in February
+    np.testing.assert_array_equal(overlap, [[1, 2, 0, 0], [0, 0, 0, 1]])
+
+    presence = interval_bin_counts(codes, 2, starts, ends, edges)
+    np.testing.assert_array_equal(presence, [[1, 1, 0, 0], [0, 0, 0, 1]])
+
+
+def test_interval_bin_counts_invalid_count():
+    with pytest.raises(ValueError):
+        interval_bin_counts([0], 1, [datetime(2020, 1, 1)],
+                            [datetime(2020, 1, 2)],
+                            time_bin_edges(datetime(2020, 1, 1),
+                                           datetime(2020, 1, 2), 'D'),
+                            count='sum')
+
+
+def test_coalesce_intervals():
+    codes = [1, 0, 0, 0, 0, 1]
+    starts = pd.to_datetime(['2020-01-01', '2020-03-01', '2020-01-01',
+                             '2020-01-10', '2020-02-01', '2020-01-05'])
+    ends = pd.to_datetime(['2020-01-10', '2020-04-01', '2020-01-31',
+                           '2020-01-20', '2020-02-15', '2020-01-06'])
+    index, merged_starts, merged_ends, n_merged = coalesce_intervals(
+        codes, starts, ends)
+    # 1 Jan - 31 Jan contains 10 - 20 Jan; 1 Feb is a day later
+    assert n_merged == 2
+    np.testing.assert_array_equal(index, [0, 1, 2, 4])
+    np.testing.assert_array_equal(
+        merged_starts, to_datetime64(['2020-01-01', '2020-03-01',
+                                      '2020-01-01', '2020-02-01']))
+    np.testing.assert_array_equal(
+        merged_ends, to_datetime64(['2020-01-10', '2020-04-01',
+                                    '2020-01-31', '2020-02-15']))
+
+    # with a gap tolerance of a day, January and February of category 0
+    # merge, but not March, and never intervals of another category
+    index, merged_starts, merged_ends, n_merged = coalesce_intervals(
+        codes, starts, ends, gap='1D')
+    assert n_merged == 3
+    np.testing.assert_array_equal(index, [0, 1, 2])
+    assert merged_ends[2] == np.datetime64('2020-02-15')
+    assert coalesce_intervals([], [], [])[3] == 0
@@ -1,6 +1,11 @@
+import io
+import numpy as np
+import pandas as pd
 import matplotlib.pyplot as plt
+from datetime import datetime
+from matplotlib.patches import Wedge
 from unittest.mock import patch
-from dynairxvis.plot import pie
+from dynairxvis.plot import pie, table_list
 from .test_utils import CATEGORIES, VALUES
 
 
@@ -37,6 +42,12 @@ def test_pie_with_custom_fig_kw(mock_show):
         "Custom figure size not applied")
     plt.close(fig)
 
+    # the arguments of the original signature keep their positions
+    fig = pie(CATEGORIES, VALUES, False, None, None, {'figsize': (6, 3)},
+              output='figure')
+    assert list(fig.get_size_inches()) == [6, 3]
+    plt.close(fig)
+
 
 @patch('matplotlib.pyplot.show')
 def test_pie_with_custom_colors_and_startangle(mock_show):
@@ -60,3 +71,134 @@ def test_pie_with_autopct(mock_show):
     assert any('%' in label for label in text_labels), (
         "Percentage labels not applied")
     plt.close(fig)
+
+
+@patch('matplotlib.pyplot.show')
+def test_pie_time_vectorized(mock_show):
+    categories = ['Drug A'] * 3 + ['Drug B']
+    start_dates = [datetime(2020, 1, 1), datetime(2020, 6, 1),
+                   datetime(2020, 6, 10), datetime(2020, 3, 1)]
+    end_dates = [datetime(2020, 5, 1), datetime(2020, 6, 2),
+                 datetime(2021, 1, 1), datetime(2020, 9, 1)]
+    pie(categories, time=True, start_dates=start_dates, end_dates=end_dates,
+        vectorized=True)
+    fig = plt.gcf()
+    ax_a, ax_b = fig.axes
+    assert ax_a.get_title() == 'Drug A'
+    assert len(ax_a.collections) == 1, "Expected one collection per category"
+    assert len(ax_a.collections[0].get_paths()) == 3
+    # the one-day interval is too narrow to be labelled
+    assert len(ax_a.texts) == 2
+    assert ax_b.texts[0].get_text() == '2020-03-01\n2020-09-01'
+    plt.close(fig)
+
+
+def test_pie_time_datetime64():
+    categories = ['Drug A', 'Drug A', 'Drug B']
+    # out of order, so the wedges are sorted
+    start_dates = pd.Series(pd.to_datetime(
+        ['2020-06-10', '2020-01-01', '2020-03-01'])).dt.tz_localize('UTC')
+    end_dates = np.array(['2021-01-01', '2020-05-01', '2020-09-01'],
+                         dtype='datetime64[D]')
+    fig = pie(categories, time=True, start_dates=start_dates,
+              end_dates=end_dates.astype('datetime64[ns]').astype(np.int64),
+              output='figure')
+    ax_a, ax_b = fig.axes
+    # every wedge keeps the label of its own interval
+    assert [text.get_text() for text in ax_a.texts
+            if text.get_text()] == ['2020-01-01\n2020-05-01',
+                                    '2020-06-10\n2021-01-01']
+    plt.close(fig)
+    np.testing.assert_array_equal(
+        pie(categories, time=True, start_dates=start_dates,
+            end_dates=end_dates, output='rgba'),
+        pie(categories, time=True, start_dates=list(start_dates),
+            end_dates=list(end_dates.astype('datetime64[ns]')),
+            output='rgba'))
+
+
+def test_table_list_to_stream():
+    out = io.StringIO()
+    table_list(pd.Series(['Aspirin', 'Metformin'], name='Medication'),
+               file=out)
+    lines = out.getvalue().splitlines()
+    assert 'Medication' in lines[0]
+    assert lines[1:] == ['Aspirin  ', 'Metformin']
+
+
+def test_table_list_chunks_limit_and_pages():
+    chunks = (pd.DataFrame({'Drug': [f'D{i}' for i in range(j, j + 4)]})
+              for j in range(0, 12, 4))
+    out = io.StringIO()
+    table_list(chunks, file=out, limit=6, page_size=4)
+    lines = out.getvalue().splitlines()
+    assert lines[1:5] == ['D0', 'D1', 'D2', 'D3']
+    # the header is repeated after a blank line for the second page
+    assert lines[5] == '' and 'Drug' in lines[6]
+    assert lines[7:] == ['D4', 'D5', '...']
+
+
+def test_table_list_defaults_to_stdout(capsys):
+    table_list(['a', 'bb'], chunksize=1)
+    captured = capsys.readouterr().out.splitlines()
+    assert captured[1:] == ['a ', 'bb']
+
+
+
+def test_table_list_same_width_across_chunks():
+    out = io.StringIO()
+    table_list(pd.Series(['a', 'bbbbbbbb', 'c', 'd'], name='Drug'),
+               file=out, chunksize=2)
+    assert out.getvalue().splitlines()[1:] == [
+        'a       ', 'bbbbbbbb', 'c       ', 'd       ']
+
+
+def test_table_list_header_of_empty_data():
+    out = io.StringIO()
+    table_list(pd.Series([], name='Drug', dtype=object), file=out)
+    assert out.getvalue() == '\033[1m\033[4mDrug\033[0m\n'
+    out = io.StringIO()
+    table_list(iter([pd.DataFrame({'Drug': []})] * 2), file=out)
+    assert out.getvalue() == '\033[1m\033[4mDrug\033[0m\n'
+
+
+def test_pie_time_vectorized_matches_legacy_wedges():
+    categories = ['Drug A'] * 3 + ['Drug B']
+    start_dates = [datetime(2020, 6, 10), datetime(2020, 1, 1),
+                   datetime(2020, 6, 1), datetime(2020, 3, 1)]
+    end_dates = [datetime(2021, 1, 1), datetime(2020, 5, 1),
+                 datetime(2020, 6, 2), datetime(2020, 9, 1)]
+    legacy = pie(categories, time=True, start_dates=start_dates,
+                 end_dates=end_dates, output='figure')
+    fig = pie(categories, time=True, start_dates=start_dates,
+              end_dates=end_dates, vectorized=True, min_label_extent=0,
+              output='figure')
+    for legacy_ax, ax in zip(legacy.axes, fig.axes):
+        # the interval wedges of the legacy chart, in drawing order
+        wedges = legacy_ax.patches[::2]
+        paths = ax.collections[0].get_paths()
+        assert len(paths) == len(wedges)
+        for wedge, path in zip(wedges, paths):
+            expected = Wedge((0, 0), 1, wedge.theta1, wedge.theta2)
+            np.testing.assert_allclose(path.vertices,
+                                       expected.get_path().vertices)
+        legacy_texts = [text for text in legacy_ax.texts if text.get_text()]
+        assert [(text.get_text(), text.get_ha())
+                for text in ax.texts] == [(text.get_text(), text.get_ha())
+                                          for text in legacy_texts]
+        np.testing.assert_allclose(
+            [text.get_position() for text in ax.texts],
+            [text.get_position() for text in legacy_texts])
+    plt.close(legacy)
+    plt.close(fig)
+
+
+def test_pie_time_cache_not_passed_to_figure():
+    categories = ['Drug A', 'Drug B']
+    start_dates = [datetime(2020, 1, 1), datetime(2020, 3, 1)]
+    end_dates = [datetime(2020, 5, 1), datetime(2020, 9, 1)]
+    fig = pie(categories, time=True, start_dates=start_dates,
+              end_dates=end_dates, cache=True, min_label_extent=5,
+              output='figure')
+    assert len(fig.axes) == 2
+    plt.close(fig)
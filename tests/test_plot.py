@@ -1,6 +1,18 @@
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import patch
+from datetime import datetime
 import os
-from dynairxvis.plot import plot
+import shutil
+import subprocess
+import sys
+import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+import numpy as np
+import pandas as pd
+import pytest
+import dynairxvis.plot as plot_module
+from dynairxvis.plot import plot, gantt
+from dynairxvis.utils import FIG_SIZE
 from .test_utils import CATEGORIES, VALUES
 
 
@@ -23,3 +35,194 @@ def test_plot_saves_file(mock_show):
 #     plot('foo', CATEGORIES, VALUES)
 #     mock_print.assert_called_with("**WARNING: ** 'foo' is not" +
 #                                   " a supported plot type.")
+
+
+START = [datetime(2020, 1, 1), datetime(2020, 6, 1), datetime(2021, 2, 1)]
+END = [datetime(2020, 5, 1), datetime(2021, 1, 1), datetime(2021, 9, 1)]
+CHART_ARGS = {
+    'bar': ((CATEGORIES, VALUES), {}),
+    'box': ((VALUES,), {}),
+    'dot': ((VALUES,), {}),
+    'gantt': ((CATEGORIES, START, END), {}),
+    'line': ((CATEGORIES, START, END), {}),
+    'heatmap': ((pd.DataFrame({'obsdate': pd.to_datetime(START),
+                               'Disease': CATEGORIES}),), {}),
+    'hist': ((VALUES,), {}),
+    'pie': ((CATEGORIES, VALUES), {}),
+    'radar': ((CATEGORIES, VALUES), {}),
+    'scatter': ((CATEGORIES,), {'start_dates': START, 'end_dates': END}),
+    'violin': ((VALUES,), {}),
+}
+
+
+@pytest.mark.parametrize('plot_name', sorted(CHART_ARGS))
+@patch('matplotlib.pyplot.show')
+def test_plot_output(mock_show, plot_name):
+    args, kwargs = CHART_ARGS[plot_name]
+    fig = plot(plot_name, *args, output='figure', **kwargs)
+    assert isinstance(fig, Figure)
+    plt.close(fig)
+
+    n_figs = len(plt.get_fignums())
+    png = plot(plot_name, *args, output='png', **kwargs)
+    assert png.startswith(b'\x89PNG')
+    svg = plot(plot_name, *args, output='svg', **kwargs)
+    assert b'<svg' in svg
+    rgba = plot(plot_name, *args, output='rgba', **kwargs)
+    assert rgba.ndim == 3 and rgba.shape[2] == 4 and rgba.dtype == np.uint8
+    # encoded figures are closed and nothing was shown
+    assert len(plt.get_fignums()) == n_figs
+    mock_show.assert_not_called()
+
+
+def test_plot_output_in_threads():
+    names = sorted(CHART_ARGS)
+    fig_kw = {'figsize': (4, 3), 'dpi': 50}
+
+    def render(name):
+        args, kwargs = CHART_ARGS[name]
+        return plot(name, *args, output='rgba', fig_kw=fig_kw, **kwargs)
+
+    n_figs = len(plt.get_fignums())
+    expected = [render(name) for name in names]
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        rendered = list(executor.map(render, names * 3))
+    for i, rgba in enumerate(rendered):
+        np.testing.assert_array_equal(rgba, expected[i % len(names)])
+    # the figures were never registered with pyplot, and fig_kw did not
+    # change the default figure size
+    assert len(plt.get_fignums()) == n_figs
+    assert FIG_SIZE == {'figsize': (6, 4)}
+
+
+@patch('matplotlib.pyplot.gcf', side_effect=AssertionError('used gcf'))
+def test_plot_saves_its_own_figure(mock_gcf, tmp_path):
+    filename = str(tmp_path / 'gantt.png')
+    plot('gantt', CATEGORIES, START, END, filename=filename)
+    assert os.path.isfile(filename)
+    plt.close('all')
+
+
+def test_output_with_given_ax_keeps_figure():
+    fig, ax = plt.subplots()
+    png = gantt(CATEGORIES, START, END, ax=ax, output='png')
+    assert png.startswith(b'\x89PNG')
+    assert plt.fignum_exists(fig.number)
+    with pytest.raises(ValueError):
+        gantt(CATEGORIES, START, END, ax=ax, output='jpeg2000')
+    plt.close(fig)
+
+
+@pytest.mark.parametrize('fmt', ['png', 'svg', 'pdf'])
+def test_savefig_is_deterministic(fmt, monkeypatch):
+    from io import BytesIO
+    from dynairxvis.utils import _savefig
+
+    encoded = []
+    for epoch in ['0', '1700000000']:
+        # the time Matplotlib would write into SVG and PDF files
+        monkeypatch.setenv('SOURCE_DATE_EPOCH', epoch)
+        fig = gantt(CATEGORIES, START, END, output='figure')
+        buffer = BytesIO()
+        _savefig(fig, buffer, format=fmt)
+        plt.close(fig)
+        encoded.append(buffer.getvalue())
+    assert encoded[0] == encoded[1]
+    assert b'Matplotlib' not in encoded[0]
+
+
+@pytest.mark.parametrize('fmt', ['png', 'svg', 'pdf'])
+def test_savefig_is_deterministic_across_processes(fmt):
+    code = ('import sys, hashlib; from io import BytesIO; '
+            'from dynairxvis.plot import gantt; '
+            'from dynairxvis.utils import _savefig; '
+            "fig = gantt(['A', 'B', 'A'], ['2020-01-01', '2020-02-01', "
+            "'2020-03-01'], ['2020-01-09', '2020-02-09', '2020-03-09'], "
+            "output='figure'); buffer = BytesIO(); "
+            '_savefig(fig, buffer, format=sys.argv[1]); '
+            'print(hashlib.sha1(buffer.getvalue()).hexdigest())')
+    digests = set()
+    for seed in ['1', '2']:
+        env = dict(os.environ, PYTHONHASHSEED=seed,
+                   SOURCE_DATE_EPOCH=seed + '000000')
+        result = subprocess.run([sys.executable, '-c', code, fmt], env=env,
+                                capture_output=True, text=True, check=True)
+        digests.add(result.stdout)
+    assert len(digests) == 1
+
+
+def test_render_key_follows_the_source(tmp_path):
+    # a copy of the package whose drawing code is then edited
+    shutil.copytree(os.path.dirname(plot_module.__file__),
+                    tmp_path / 'dynairxvis',
+                    ignore=shutil.ignore_patterns('__pycache__'))
+    code = ('from dynairxvis.plot import _render_key; '
+            "print(_render_key('gantt', [1, 2], {}))")
+
+    def key():
+        return subprocess.run([sys.executable, '-c', code], cwd=tmp_path,
+                              capture_output=True, text=True,
+                              check=True).stdout
+
+    before = key()
+    assert key() == before
+    with open(tmp_path / 'dynairxvis' / 'gantt.py', 'a') as f:
+        f.write('\n# edited\n')
+    assert key() != before
+
+
+def test_plot_render_cache(tmp_path):
+    cache_dir = tmp_path / 'cache'
+    png = plot('gantt', CATEGORIES, START, END, output='png',
+               cache_dir=cache_dir)
+    assert png == gantt(CATEGORIES, START, END, output='png')
+    assert len(list(cache_dir.glob('*/*.png'))) == 1
+
+    # a hit is read back without drawing, for equal data in new objects
+    with patch('dynairxvis.gantt._draw_gantt',
+               side_effect=AssertionError('drawn again')):
+        assert plot('gantt', list(CATEGORIES), list(START), list(END),
+                    output='png', cache_dir=cache_dir) == png
+        filename = str(tmp_path / 'gantt.png')
+        assert plot('gantt', CATEGORIES, START, END, filename=filename,
+                    cache_dir=cache_dir) == filename
+        # an unchanged file is not rewritten
+        mtime = os.stat(filename).st_mtime_ns
+        plot('gantt', CATEGORIES, START, END, filename=filename,
+             overwrite=True, cache_dir=cache_dir)
+        assert os.stat(filename).st_mtime_ns == mtime
+    with open(filename, 'rb') as f:
+        assert f.read() == png
+
+    # other options miss the cache
+    svg = plot('gantt', CATEGORIES, START, END, title='Other', output='svg',
+               cache_dir=cache_dir)
+    assert b'Other' in svg
+    assert len(list(cache_dir.glob('*/*'))) == 2
+    with pytest.raises(ValueError, match='cache_dir'):
+        plot('gantt', CATEGORIES, START, END, output='figure',
+             cache_dir=cache_dir)
+
+
+def test_plot_rasterizes_dense_layers(tmp_path):
+    rng = np.random.default_rng(0)
+    n = 1500
+    starts = list(pd.Timestamp('2000-01-01') + pd.to_timedelta(
+        rng.integers(0, 5000, n), unit='D'))
+    ends = [start + pd.Timedelta(days=30) for start in starts]
+    categories = list(rng.choice(['A', 'B', 'C'], n))
+    sizes = {}
+    for rasterize in [False, True]:
+        filename = str(tmp_path / f'gantt_{rasterize}.pdf')
+        sizes[rasterize] = plot('gantt', categories, starts, ends,
+                                filename=filename, rasterize=rasterize)
+        assert sizes[rasterize] == os.path.getsize(filename)
+    assert sizes[True] < sizes[False] / 2
+    # the bars become one image, the title stays text
+    svg = plot('gantt', categories, starts, ends, output='svg',
+               rasterize={'dpi': 50})
+    assert svg.count(b'<image') == 1
+    assert b'Gantt Chart' in svg
+    # below the thresholds nothing is rasterized
+    svg = plot('gantt', CATEGORIES, START, END, output='svg', rasterize=True)
+    assert svg == gantt(CATEGORIES, START, END, output='svg')
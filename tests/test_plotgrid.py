@@ -1,6 +1,10 @@
+import matplotlib.dates as mdates
 import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
 from unittest.mock import patch
 from datetime import datetime
+from dynairxvis import utils
 from dynairxvis.plotgrid import plot_grid
 
 
@@ -131,3 +135,47 @@ def test_plot_grid_with_fig_kw(mock_show):
     assert all(fig.get_size_inches() == (10, 5)), \
         "Figure size should be set by fig_kw"
     plt.close(fig)
+
+
+def test_plot_grid_headless_shared_range():
+    fig_size = dict(utils.FIG_SIZE)
+    rows = 4
+    categories = [['Task A', 'Task B']] * rows
+    start_dates = [[datetime(2020, 1, 1), datetime(2020 + i, 6, 1)]
+                   for i in range(rows)]
+    end_dates = [[datetime(2021, 1, 1), datetime(2020 + i, 7, 1)]
+                 for i in range(rows)]
+    chart_types = ['gantt', 'line'] * (rows // 2)
+    fig = plot_grid(categories, start_dates, end_dates, chart_types,
+                    fig_kw={'figsize': (8, 8)}, output='figure',
+                    vectorized=True)
+    # one range for all rows, that of the widest row padded by a tenth
+    xlims = {ax.get_xlim() for ax in fig.axes}
+    assert len(xlims) == 1
+    assert utils.FIG_SIZE == fig_size
+    plt.close(fig)
+    open_figures = plt.get_fignums()
+    png = plot_grid(categories, start_dates, end_dates, chart_types,
+                    output='png', workers=2)
+    assert png[:4] == b'\x89PNG'
+    assert plt.get_fignums() == open_figures
+    # concurrent preparation draws the same grid
+    np.testing.assert_array_equal(
+        plot_grid(categories, start_dates, end_dates, chart_types,
+                  output='rgba', workers=2),
+        plot_grid(categories, start_dates, end_dates, chart_types,
+                  output='rgba'))
+
+
+def test_plot_grid_xlim_array():
+    categories = [['Task A', 'Task B']] * 2
+    start_dates = [[datetime(2020, 1, 1), datetime(2020, 6, 1)]] * 2
+    end_dates = [[datetime(2021, 1, 1), datetime(2020, 7, 1)]] * 2
+    for xlim in [pd.DatetimeIndex(['2019-01-01', '2022-01-01']),
+                 np.array(['2019-01-01', '2022-01-01'],
+                          dtype='datetime64[ns]')]:
+        fig = plot_grid(categories, start_dates, end_dates,
+                        ['gantt', 'line'], xlim=xlim, output='figure')
+        for ax in fig.axes:
+            assert ax.get_xlim() == tuple(mdates.date2num(xlim))
+        plt.close(fig)
@@ -0,0 +1,96 @@
+import sys
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import pytest
+
+from dynairxvis.batch import render_batch
+from dynairxvis.gantt import gantt
+from dynairxvis.plot import plot_charts
+from dynairxvis.sources import is_source, read_events
+
+pa = pytest.importorskip('pyarrow')
+ds = pytest.importorskip('pyarrow.dataset')
+
+REFS = ['Condition', 'Start_Date', 'End_Date']
+
+
+def _events(n=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    start = pd.Series(pd.Timestamp('2000-01-01') + pd.to_timedelta(
+        rng.integers(0, 8000, n), unit='D'))
+    return pd.DataFrame({
+        'patient': np.sort(rng.integers(0, 100, n)),
+        'Condition': rng.choice(['Asthma', 'COPD', 'Diabetes'], n),
+        'Start_Date': start,
+        'End_Date': start + pd.to_timedelta(rng.integers(1, 400, n),
+                                            unit='D'),
+        'Value': rng.integers(0, 10, n),
+    })
+
+
+@pytest.fixture
+def parquet(tmp_path):
+    df = _events()
+    path = tmp_path / 'events.parquet'
+    df.to_parquet(path, row_group_size=100)
+    return df, path
+
+
+def test_read_events_projection_and_filters(parquet):
+    df, path = parquet
+    events = read_events(path, columns=['End_Date', 1], patient_col='patient',
+                         patients=[3, 4], date_cols=('Start_Date', 'End_Date'),
+                         start='2005-01-01', end='2010-01-01')
+    assert list(events.columns) == ['End_Date', 'Condition']
+    assert all(isinstance(dtype, pd.ArrowDtype) for dtype in events.dtypes)
+    expected = df[df['patient'].isin([3, 4]) &
+                  (df['End_Date'] >= '2005-01-01') &
+                  (df['Start_Date'] <= '2010-01-01')]
+    assert events['Condition'].tolist() == expected['Condition'].tolist()
+    assert (events['End_Date'].to_numpy(dtype='datetime64[ns]') ==
+            expected['End_Date'].to_numpy()).all()
+    # the patient filter rules out row groups by their statistics
+    fragment, = ds.dataset(path).get_fragments()
+    assert len(fragment.split_by_row_group(
+        ds.field('patient').isin([3, 4]))) < fragment.num_row_groups / 4
+    with pytest.raises(ValueError, match='patient_col'):
+        read_events(path, patients=3)
+    with pytest.raises(ValueError, match='date_cols'):
+        read_events(path, start='2005-01-01')
+
+
+def test_arrow_backed_frames_draw_the_same(parquet):
+    df, path = parquet
+    events = read_events(pa.Table.from_pandas(df), columns=REFS,
+                         patient_col='patient', patients=5)
+    one = df[df['patient'] == 5]
+    np.testing.assert_array_equal(
+        gantt(events['Condition'], events['Start_Date'], events['End_Date'],
+              output='rgba'),
+        gantt(one['Condition'], one['Start_Date'], one['End_Date'],
+              output='rgba'))
+
+
+def test_plot_charts_and_render_batch_read_sources(parquet, tmp_path):
+    df, path = parquet
+    assert is_source(path) and is_source(str(path))
+    assert not is_source(df) and not is_source(['a', 1])
+    plt.close('all')
+    plot_charts(path, REFS, source_kw={'patient_col': 'patient',
+                                       'patients': 5})
+    assert len(plt.get_fignums()) == 6  # the NT chart set
+    plt.close('all')
+    jobs = [(path, REFS, {'source_kw': {'patient_col': 'patient',
+                                        'patients': patient}})
+            for patient in [5, 6]]
+    manifest = render_batch(jobs, workers=1, out_dir=tmp_path / 'out')
+    assert [len(job['paths']) for job in manifest] == [6, 6]
+    assert all(job['error'] is None for job in manifest)
+
+
+def test_read_events_without_pyarrow(monkeypatch, parquet):
+    monkeypatch.setitem(sys.modules, 'pyarrow', None)
+    with pytest.raises(ImportError, match=r'dynairxvis\[parquet\]'):
+        read_events(parquet)
@@ -0,0 +1,100 @@
+import pickle
+import subprocess
+import sys
+
+import matplotlib
+import numpy as np
+import pandas as pd
+import pytest
+
+from dynairxvis.calendar import calendar
+from dynairxvis.gantt import gantt
+from dynairxvis.heatmap import heatmap, heatmap_nq
+from dynairxvis.pie import pie
+from dynairxvis.specs import prepare, draw
+from dynairxvis.time import grouped_chart
+
+matplotlib.use('Agg')
+
+
+def _events(n=40, seed=0):
+    rng = np.random.default_rng(seed)
+    start = pd.Series(pd.Timestamp('2015-01-01') + pd.to_timedelta(
+        rng.integers(0, 3000, n), unit='D'))
+    return pd.DataFrame({
+        'Condition': rng.choice(['Asthma', 'COPD', 'Diabetes'], n),
+        'Start_Date': start,
+        'End_Date': start + pd.to_timedelta(rng.integers(1, 400, n),
+                                            unit='D'),
+        'Value': rng.integers(0, 10, n),
+    })
+
+
+def _cases(df):
+    """(chart, prepare args, prepare kwargs, chart function call)"""
+    c, s, e, v = (df['Condition'], df['Start_Date'], df['End_Date'],
+                  df['Value'])
+    return [
+        ('gantt', (c, s, e), {'values': v},
+         lambda **kw: gantt(c, s, e, values=v, **kw)),
+        ('grouped_chart', (c, s, e), {'chart_type': 'scatter', 'values': v},
+         lambda **kw: grouped_chart(c, s, e, chart_type='scatter', values=v,
+                                    **kw)),
+        ('grouped_chart', (c, s, e), {'chart_type': 'heatmap',
+                                      'time_bins': 'Y'},
+         lambda **kw: grouped_chart(c, s, e, chart_type='heatmap',
+                                    time_bins='Y', **kw)),
+        ('heatmap', (df,), {'date_col': 'Start_Date', 'y_col': 'Condition'},
+         lambda **kw: heatmap(df, date_col='Start_Date', y_col='Condition',
+                              **kw)),
+        ('heatmap_nq', (list(c), list(v)), {},
+         lambda **kw: heatmap_nq(list(c), values=list(v), **kw)),
+        ('calendar', (df, 'Condition', 'Start_Date'), {},
+         lambda **kw: calendar(df, 'Condition', 'Start_Date', **kw)),
+        ('pie', (c, s, e), {},
+         lambda **kw: pie(c, time=True, start_dates=s, end_dates=e,
+                          vectorized=True, **kw)),
+    ]
+
+
+@pytest.mark.parametrize('case', range(7))
+def test_pickled_spec_draws_the_chart(case):
+    df = _events()
+    chart, args, kwargs, render = _cases(df)[case]
+    spec = pickle.loads(pickle.dumps(prepare(chart, *args, **kwargs)))
+    assert spec['chart'] == chart
+    np.testing.assert_array_equal(draw(spec, output='rgba'),
+                                  render(output='rgba'))
+
+
+def test_prepare_does_not_mutate_or_keep_frames():
+    df = _events()
+    columns = list(df.columns)
+    spec = prepare('heatmap', df, date_col='Start_Date', y_col='Condition')
+    assert list(df.columns) == columns
+    assert not any(isinstance(v, (pd.DataFrame, pd.Series))
+                   for v in spec.values())
+    assert spec['counts'].sum() == len(df)
+    assert spec['columns'] == list(range(df['Start_Date'].dt.year.min(),
+                                         df['Start_Date'].dt.year.max() + 1))
+
+
+def test_prepare_invalid_chart():
+    with pytest.raises(ValueError, match='Invalid chart'):
+        prepare('radar', [1, 2])
+
+
+def test_prepare_without_pyplot():
+    code = ('import sys, pandas as pd; '
+            'from dynairxvis.specs import prepare; '
+            "c = ['a', 'b', 'a']; "
+            "s = pd.to_datetime(['2020-01-01', '2020-03-01', '2021-01-01']); "
+            'e = s + pd.Timedelta(days=30); '
+            "prepare('gantt', c, s, e, values=[1, 2, 3]); "
+            "prepare('line', c, s, e, values=[1, 2, 3]); "
+            "prepare('pie', c, s, e); "
+            "prepare('heatmap', pd.DataFrame({'d': s, 'y': c}), 'd', 'y'); "
+            "print('matplotlib.pyplot' in sys.modules)")
+    result = subprocess.run([sys.executable, '-c', code],
+                            capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == 'False'
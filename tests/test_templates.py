@@ -0,0 +1,60 @@
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import pytest
+
+from dynairxvis.templates import (render_template, clear_templates,
+                                  _TEMPLATES)
+
+
+def _patient(seed, n=12):
+    rng = np.random.default_rng(seed)
+    start = pd.Series(pd.Timestamp('2015-01-01') + pd.to_timedelta(
+        rng.integers(0, 3000, n), unit='D'))
+    end = start + pd.to_timedelta(rng.integers(1, 400, n), unit='D')
+    conditions = list(rng.choice(['Asthma', 'COPD', 'Diabetes'][:2 + seed],
+                                 n))
+    return conditions, start, end
+
+
+def _args(chart, conditions, start, end):
+    df = pd.DataFrame({'Condition': conditions, 'Start_Date': start})
+    return {
+        'gantt': ((conditions, start, end), {}),
+        'line': ((conditions, start, end), {'values': pd.Series(range(12))}),
+        'heatmap': ((df,), {'date_col': 'Start_Date', 'y_col': 'Condition'}),
+        'heatmap_nq': ((conditions,), {'values': list(range(12)),
+                                       'colorbar': True}),
+        'calendar': ((df,), {'y_column': 'Condition',
+                             'x_column': 'Start_Date'}),
+    }[chart]
+
+
+@pytest.mark.parametrize('chart', ['gantt', 'line', 'heatmap', 'heatmap_nq',
+                                   'calendar'])
+def test_render_template_reuses_figure(chart):
+    clear_templates()
+    n_figs = len(plt.get_fignums())
+    images = []
+    for seed in [0, 1, 0]:
+        args, kwargs = _args(chart, *_patient(seed))
+        images.append(render_template(chart, *args, output='rgba', **kwargs))
+    assert len(_TEMPLATES) == 1
+    # the previous patient leaves nothing behind
+    assert np.array_equal(images[0], images[2])
+    assert not np.array_equal(images[0], images[1])
+    # templates are not pyplot figures
+    assert len(plt.get_fignums()) == n_figs
+
+
+def test_render_template_outputs():
+    clear_templates()
+    args, kwargs = _args('gantt', *_patient(0))
+    assert render_template('gantt', *args, **kwargs).startswith(b'\x89PNG')
+    fig = render_template('gantt', *args, output='figure', **kwargs)
+    assert fig.get_layout_engine() is None
+    assert render_template('gantt', *args, output='figure', **kwargs) is fig
+    render_template('gantt', *args, fig_kw={'figsize': (8, 3)}, **kwargs)
+    assert len(_TEMPLATES) == 2
+    with pytest.raises(ValueError):
+        render_template('radar', ['a', 'b'], [1, 2])
@@ -3,6 +3,7 @@ from datetime import datetime
 from dynairxvis.time import grouped_chart, line
 
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection, PathCollection, QuadMesh
 
 
 @pytest.fixture
@@ -40,6 +41,33 @@ def test_grouped_chart_heatmap(sample_data):
     assert len(ax.images) == 1
 
 
+def test_grouped_chart_heatmap_counts():
+    from dynairxvis.specs import prepare
+    categories = ['A', 'B', 'C', 'A', 'B']
+    start_dates = [datetime(2020, 1, 1), datetime(2020, 3, 15),
+                   datetime(2020, 6, 10), datetime(2020, 9, 20),
+                   datetime(2020, 2, 1)]
+    end_dates = [datetime(2020, 2, 20), datetime(2020, 5, 1),
+                 datetime(2020, 7, 5), datetime(2020, 11, 1),
+                 datetime(2020, 2, 3)]
+    spec = prepare('grouped_chart', categories, start_dates, end_dates,
+                   chart_type='heatmap')
+    # the counts of the per-interval loop the sweep replaced
+    assert spec['counts'].tolist() == [[1, 1, 0, 0, 0, 0, 0, 0, 1, 1],
+                                       [0, 1, 1, 1, 0, 0, 0, 0, 0, 0],
+                                       [0, 0, 0, 0, 0, 1, 1, 0, 0, 0]]
+
+    # where they differ: a zero-length interval (A) is counted, and an
+    # interval starting on the second edge (C) starts in the second bin
+    spec = prepare('grouped_chart', ['A', 'B', 'C'],
+                   [datetime(2020, 1, 1), datetime(2020, 1, 1),
+                    datetime(2020, 1, 31, 12)],
+                   [datetime(2020, 1, 1), datetime(2020, 11, 1),
+                    datetime(2020, 11, 1)], chart_type='heatmap')
+    assert spec['counts'].tolist() == [[1] + [0] * 9, [1] * 10,
+                                       [0] + [1] * 9]
+
+
 def test_grouped_chart_invalid_type(sample_data, capsys):
     categories, start_dates, end_dates, markers = sample_data
     grouped_chart(categories, start_dates, end_dates, chart_type='invalid',
@@ -91,6 +119,17 @@ def test_grouped_chart_with_plot_kw(sample_data):
     plt.close(ax.figure)
 
 
+def test_grouped_chart_positional_fig_kw(sample_data):
+    categories, start_dates, end_dates, markers = sample_data
+    # the arguments of the original signature keep their positions
+    fig = grouped_chart(categories, start_dates, end_dates, 'line', None,
+                        None, None, {'figsize': (3, 2)}, {'linewidth': 3},
+                        output='figure')
+    assert fig.get_size_inches().tolist() == [3, 2]
+    assert all(line.get_linewidth() == 3 for line in fig.axes[0].lines)
+    plt.close(fig)
+
+
 def test_grouped_chart_with_kwargs_labels_and_title(sample_data):
     categories, start_dates, end_dates, markers = sample_data
     grouped_chart(
@@ -145,3 +184,105 @@ def test_grouped_chart_with_legend(sample_data):
 #         assert line.get_color() == category_colors[category], f"Color for {category} not applied correctly"
 #     plt.close(ax.figure)
 
+
+def test_grouped_chart_line_vectorized(sample_data):
+    categories, start_dates, end_dates, markers = sample_data
+    categories = categories + ['Task A']
+    start_dates = start_dates + [datetime(2021, 6, 1)]
+    # zero-length interval is drawn as a point
+    end_dates = end_dates + [datetime(2021, 6, 1)]
+    fig, ax = plt.subplots()
+    grouped_chart(categories, start_dates, end_dates, chart_type='line',
+                  ax=ax, vectorized=True, legend=True)
+    assert len(ax.lines) == 0
+    segments = [c for c in ax.collections if isinstance(c, LineCollection)]
+    assert len(segments) == 3, "Expected one LineCollection per category"
+    assert sum(len(c.get_segments()) for c in segments) == 3
+    points = [c for c in ax.collections if isinstance(c, PathCollection)]
+    assert len(points) == 1 and len(points[0].get_offsets()) == 1
+    labels = [t.get_text() for t in ax.get_legend().get_texts()]
+    assert labels == ['Task A', 'Task B', 'Task C']
+    plt.close(fig)
+
+
+def test_grouped_chart_line_vectorized_marker_kw(sample_data):
+    categories, start_dates, end_dates, markers = sample_data
+    categories = categories + ['Task A']
+    start_dates = start_dates + [datetime(2021, 6, 1)]
+    end_dates = end_dates + [datetime(2021, 6, 1)]
+    plot_kw = {'marker': 'o', 'markersize': 3, 'linewidth': 2}
+    fig, ax = plt.subplots()
+    grouped_chart(categories, start_dates, end_dates, chart_type='line',
+                  ax=ax, vectorized=True, plot_kw=plot_kw)
+    segments = [c for c in ax.collections if isinstance(c, LineCollection)]
+    assert all(c.get_linewidth()[0] == 2 for c in segments)
+    # markers at both ends of the 3 segments, and the point
+    assert sum(len(line.get_xdata()) for line in ax.lines) == 7
+    assert all(line.get_marker() == 'o' and line.get_markersize() == 3
+               for line in ax.lines)
+    plt.close(fig)
+
+    fig, ax = plt.subplots()
+    with pytest.raises(ValueError, match='drawstyle'):
+        grouped_chart(categories, start_dates, end_dates, chart_type='line',
+                      ax=ax, vectorized=True, plot_kw={'drawstyle': 'steps'})
+    plt.close(fig)
+
+
+def test_grouped_chart_scatter_vectorized(sample_data):
+    categories, start_dates, end_dates, markers = sample_data
+    fig, ax = plt.subplots()
+    grouped_chart(categories * 2, start_dates * 2, end_dates * 2,
+                  chart_type='scatter', ax=ax, vectorized=True)
+    assert len(ax.collections) == len(categories)
+    # start and end markers of both intervals in one call per category
+    assert all(len(c.get_offsets()) == 4 for c in ax.collections)
+    plt.close(fig)
+
+
+def test_grouped_chart_does_not_mutate_plot_kw(sample_data):
+    categories, start_dates, end_dates, markers = sample_data
+    plot_kw = {'linewidth': 2}
+    fig, ax = plt.subplots()
+    grouped_chart(categories, start_dates, end_dates, chart_type='line',
+                  ax=ax, plot_kw=plot_kw)
+    assert plot_kw == {'linewidth': 2}
+    plt.close(fig)
+
+
+def test_grouped_chart_heatmap_calendar_bins(sample_data):
+    categories, start_dates, end_dates, markers = sample_data
+    fig, ax = plt.subplots()
+    grouped_chart(categories, start_dates, end_dates, chart_type='heatmap',
+                  ax=ax, time_bins='M', count='overlap')
+    meshes = [c for c in ax.collections if isinstance(c, QuadMesh)]
+    assert len(meshes) == 1
+    # January 2020 to January 2021 inclusive is 13 monthly bins
+    assert meshes[0].get_array().shape == (len(categories), 13)
+    plt.close(fig)
+
+
+def test_line_coalesce(sample_data):
+    from dynairxvis.specs import prepare
+    categories = ['Task A'] * 3
+    start_dates = [datetime(2020, 1, 1), datetime(2020, 2, 2),
+                   datetime(2020, 6, 1)]
+    end_dates = [datetime(2020, 2, 1), datetime(2020, 3, 1),
+                 datetime(2020, 7, 1)]
+    spec = prepare('line', categories, start_dates, end_dates,
+                   coalesce='1D')
+    assert spec['merged'] == 1 and len(spec['starts']) == 2
+    fig, ax = plt.subplots()
+    line(categories, start_dates, end_dates, ax=ax, vectorized=True,
+         coalesce='1D')
+    segments = [c for c in ax.collections if isinstance(c, LineCollection)]
+    assert sum(len(c.get_segments()) for c in segments) == 2
+    plt.close(fig)
+
+
+def test_grouped_chart_non_numeric_values_warn(sample_data):
+    categories, start_dates, end_dates, _ = sample_data
+    with pytest.warns(UserWarning, match='Defaulting to grayscale'):
+        fig = grouped_chart(categories, start_dates, end_dates,
+                            values=['low', 'high', 'low'], output='figure')
+    plt.close(fig)
@@ -1,7 +1,13 @@
 import pytest
+import subprocess
+import sys
 from datetime import datetime, timedelta
-from dynairxvis.utils import _plot_now_line, _resolve_orientation
+from dynairxvis.utils import (_plot_now_line, _resolve_orientation,
+                              _apply_inference, _approx_nunique, profile)
+import dynairxvis.utils as utils
 import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
 
 CATEGORIES = ['N1', 'N2', 'N3']
 VALUES = [10, 15, 35]
@@ -54,3 +60,69 @@ def test_resolve_orientation():
     assert _resolve_orientation('verT') == 'vertical'
     with pytest.raises(ValueError):
         _resolve_orientation('BLA')
+
+
+def _wide_frame(n=2000):
+    rng = np.random.default_rng(1)
+    return pd.DataFrame({
+        'name': rng.choice(['a', 'b', 'c'], n),
+        'level': rng.integers(0, 5, n),
+        'value': rng.normal(size=n),
+        'ids': rng.integers(0, 50, n),
+        'date': pd.date_range('2020-01-01', periods=n, freq='h'),
+        'grade': pd.Categorical(rng.choice(['lo', 'hi'], n),
+                                categories=['lo', 'hi'], ordered=True),
+    })
+
+
+def test_profile_matches_per_column_inference():
+    df = _wide_frame()
+    col_types, col_codes, _ = profile(df, col_count=None, cache=False)
+    assert col_types == _apply_inference(df)
+    assert col_codes == ''.join(sorted(col_types.values()))
+    sampled, _, _ = profile(df, col_count=None, mode='sample',
+                            sample_size=500, cache=False)
+    assert sampled == col_types
+    sketched, _, _ = profile(df, col_count=None, mode='sketch', cache=False)
+    assert sketched == col_types
+    with pytest.raises(ValueError):
+        profile(df, mode='exactish')
+
+
+def test_approx_nunique():
+    values = pd.Series(np.arange(200000) % 50000)
+    assert abs(_approx_nunique(values) - 50000) / 50000 < 0.05
+    assert _approx_nunique(pd.Series([1, 2, 3, 3, None])) == 3
+
+
+def test_profile_cache(monkeypatch):
+    df = _wide_frame()
+    utils._PROFILE_CACHE.clear()
+    # not cached unless asked for
+    expected = profile(df, col_count=None)
+    assert len(utils._PROFILE_CACHE) == 0
+    assert profile(df, col_count=None, cache=True) == expected
+    # only the numeric columns are scanned, and cached
+    assert len(utils._PROFILE_CACHE) == 3
+    # the sample mode is not cached
+    profile(df, col_count=None, mode='sample', sample_size=500, cache=True)
+    assert len(utils._PROFILE_CACHE) == 3
+
+    def fail(*args, **kwargs):
+        raise AssertionError('column was profiled again')
+    monkeypatch.setattr(pd.DataFrame, 'nunique', fail)
+    assert profile(df, col_count=None, cache=True) == expected
+    # a changed, renamed or retyped column misses the cache
+    for changed in [df.assign(value=1), df.rename(columns={'ids': 'idx'}),
+                    df.astype({'ids': 'float64'})]:
+        with pytest.raises(RuntimeError):
+            profile(changed, col_count=None, cache=True)
+
+
+def test_profile_imports_without_matplotlib():
+    code = ('import sys; import dynairxvis.plot; '
+            'from dynairxvis.utils import profile; '
+            'print(any(m.startswith("matplotlib") for m in sys.modules))')
+    result = subprocess.run([sys.executable, '-c', code],
+                            capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == 'False'